@@ -0,0 +1,360 @@
+"""
+Approximate nearest-neighbor indexes used as novelty backends.
+
+An index only maps vectors to candidate row ids; the owning memory keeps the
+rows (see VectorMatrix) and rescores the candidates exactly. Both indexes
+support incremental inserts, ``truncate`` after the matrix drops rows, and
+persist next to the memory directory. A saved index records a fingerprint of
+the keys in row order; ``sync`` rebuilds it when the owner's rows no longer
+match (reordered on reload, or dropped while the index was not attached).
+"""
+import os
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _as_rows(vectors: np.ndarray, dim: int) -> np.ndarray:
+    return np.asarray(vectors, dtype=np.float32).reshape(-1, dim)
+
+
+def key_fingerprint(keys) -> str:
+    """Digest of a key sequence in row order."""
+    h = hashlib.sha1()
+    for key in keys:
+        h.update(str(key).encode('utf-8'))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class _RowIndex:
+    """Shared row bookkeeping: ``sync`` against the owner's matrix and key order."""
+
+    fingerprint: Optional[str] = None
+
+    def sync(self, matrix: np.ndarray, keys: Optional[List[str]] = None) -> None:
+        """Index rows of ``matrix`` stored after the last save.
+
+        With ``keys`` (the owner's keys in row order) the indexed prefix is
+        checked against the saved fingerprint first; on a mismatch every row
+        is indexed again, since the saved row ids point at other keys.
+        """
+        n = int(matrix.shape[0])
+        if keys is not None and (len(self) > n or key_fingerprint(keys[:len(self)]) != self.fingerprint):
+            if len(self):
+                logger.info(f"ANN index {self.path} does not match the stored rows; rebuilding")
+            self.reset()
+        if n > len(self):
+            self.add_many(np.arange(len(self), n), matrix[len(self):n])
+
+    def _saved_fingerprint(self, keys: Optional[List[str]]) -> np.ndarray:
+        return np.array(key_fingerprint(keys) if keys is not None else "")
+
+
+class LSHIndex(_RowIndex):
+    """Random-hyperplane LSH: ``n_tables`` hash tables of ``n_bits`` sign bits each."""
+
+    def __init__(self, dim: int, n_bits: int = 16, n_tables: int = 8, seed: int = 0, path: Optional[str] = None):
+        self.dim = int(dim)
+        self.n_bits = int(n_bits)
+        self.n_tables = int(n_tables)
+        self.seed = int(seed)
+        self.path = path
+        rng = np.random.default_rng(self.seed)
+        self._planes = rng.normal(size=(self.n_tables * self.n_bits, self.dim)).astype(np.float32)
+        self._weights = (np.uint64(1) << np.arange(self.n_bits, dtype=np.uint64))
+        self._codes = np.zeros((0, self.n_tables), dtype=np.uint64)
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(self.n_tables)]
+        self._load()
+
+    def __len__(self) -> int:
+        return int(self._codes.shape[0])
+
+    def _hash(self, rows: np.ndarray) -> np.ndarray:
+        bits = (rows @ self._planes.T > 0).reshape(rows.shape[0], self.n_tables, self.n_bits)
+        return (bits.astype(np.uint64) * self._weights).sum(axis=2, dtype=np.uint64)
+
+    def add_many(self, row_ids, vectors: np.ndarray) -> None:
+        row_ids = np.asarray(row_ids, dtype=np.int64).reshape(-1)
+        if row_ids.size == 0:
+            return
+        codes = self._hash(_as_rows(vectors, self.dim))
+        old_n = len(self)
+        end = int(row_ids.max()) + 1
+        if end > old_n:
+            grown = np.zeros((end, self.n_tables), dtype=np.uint64)
+            grown[:old_n] = self._codes
+            self._codes = grown
+        seen = set()
+        for row, code in zip(row_ids.tolist(), codes):
+            if row < old_n or row in seen:
+                # Overwritten row: drop it from its previous buckets
+                for t, table in enumerate(self._tables):
+                    bucket = table.get(int(self._codes[row, t]))
+                    if bucket is not None and row in bucket:
+                        bucket.remove(row)
+            seen.add(row)
+            self._codes[row] = code
+            for t, table in enumerate(self._tables):
+                table.setdefault(int(code[t]), []).append(row)
+
+    def add(self, row: int, vector: np.ndarray) -> None:
+        self.add_many([row], vector)
+
+    def candidates(self, vector: np.ndarray) -> Optional[np.ndarray]:
+        code = self._hash(_as_rows(vector, self.dim))[0]
+        found: List[int] = []
+        for t, table in enumerate(self._tables):
+            found.extend(table.get(int(code[t]), ()))
+        if not found:
+            return None
+        return np.unique(np.asarray(found, dtype=np.int64))
+
+    def truncate(self, n: int) -> None:
+        """Forget rows >= n after the owning matrix shrank."""
+        for row in range(int(n), len(self)):
+            for t, table in enumerate(self._tables):
+                bucket = table.get(int(self._codes[row, t]))
+                if bucket is not None and row in bucket:
+                    bucket.remove(row)
+        self._codes = self._codes[: int(n)].copy()
+
+    def reset(self) -> None:
+        self._codes = np.zeros((0, self.n_tables), dtype=np.uint64)
+        self._tables = [{} for _ in range(self.n_tables)]
+        self.fingerprint = None
+
+    def save(self, keys: Optional[List[str]] = None) -> None:
+        """Persist the codes; ``keys`` (row order) lets the next ``sync`` verify them."""
+        if self.path is None:
+            return
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, codes=self._codes, meta=np.array([self.dim, self.n_bits, self.n_tables, self.seed]), keys=self._saved_fingerprint(keys))
+        os.replace(tmp, self.path)
+
+    def _load(self) -> None:
+        if self.path is None or not os.path.isfile(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                meta = [int(x) for x in data["meta"]]
+                codes = data["codes"]
+                fingerprint = str(data["keys"]) if "keys" in data.files else ""
+        except Exception as e:
+            logger.warning(f"Could not load LSH index {self.path}: {e}")
+            return
+        if meta != [self.dim, self.n_bits, self.n_tables, self.seed]:
+            return
+        self._codes = codes.astype(np.uint64)
+        self.fingerprint = fingerprint or None
+        for row, code in enumerate(self._codes):
+            for t, table in enumerate(self._tables):
+                table.setdefault(int(code[t]), []).append(row)
+
+
+class IVFIndex(_RowIndex):
+    """Inverted-file index: k-means coarse quantizer probed at ``n_probe`` lists.
+
+    Rows are buffered until ``train_size`` have arrived; until then the index
+    is untrained and ``candidates`` returns None so callers scan exactly.
+    """
+
+    def __init__(self, dim: int, n_lists: int = 64, n_probe: int = 4, metric: str = "euclidean", train_size: int = 0, iters: int = 10, seed: int = 0, path: Optional[str] = None):
+        self.dim = int(dim)
+        self.n_lists = int(n_lists)
+        self.n_probe = int(n_probe)
+        self.metric = metric
+        self.train_size = int(train_size) or 8 * self.n_lists
+        self.iters = int(iters)
+        self.seed = int(seed)
+        self.path = path
+        self.centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros((0,), dtype=np.int32)
+        self._lists: List[List[int]] = [[] for _ in range(self.n_lists)]
+        self._pending_rows: List[int] = []
+        self._pending: List[np.ndarray] = []
+        self._load()
+
+    def __len__(self) -> int:
+        return int(self._assign.shape[0])
+
+    def _prep(self, rows: np.ndarray) -> np.ndarray:
+        rows = _as_rows(rows, self.dim)
+        if self.metric == "cosine":
+            rows = rows / (np.linalg.norm(rows, axis=1, keepdims=True) + 1e-9)
+        return rows
+
+    def _nearest_lists(self, rows: np.ndarray, k: int) -> np.ndarray:
+        c = self.centroids
+        d = (c * c).sum(axis=1)[None, :] - 2.0 * (rows @ c.T)
+        if k == 1:
+            return np.argmin(d, axis=1)[:, None]
+        k = min(k, c.shape[0])
+        return np.argpartition(d, k - 1, axis=1)[:, :k]
+
+    def _train(self, rows: np.ndarray) -> None:
+        rng = np.random.default_rng(self.seed)
+        k = min(self.n_lists, rows.shape[0])
+        c = rows[rng.choice(rows.shape[0], size=k, replace=False)].copy()
+        for _ in range(self.iters):
+            self.centroids = c
+            labels = self._nearest_lists(rows, 1)[:, 0]
+            sums = np.zeros_like(c)
+            np.add.at(sums, labels, rows)
+            counts = np.bincount(labels, minlength=k).astype(np.float32)
+            empty = counts == 0
+            c = np.where(empty[:, None], c, sums / np.maximum(counts, 1.0)[:, None]).astype(np.float32)
+        self.centroids = c
+        self.n_lists = k
+        self._lists = [[] for _ in range(k)]
+
+    def _assign_rows(self, row_ids: np.ndarray, rows: np.ndarray) -> None:
+        labels = self._nearest_lists(rows, 1)[:, 0]
+        for row, lab in zip(row_ids.tolist(), labels.tolist()):
+            prev = int(self._assign[row])
+            if prev >= 0 and row in self._lists[prev]:
+                self._lists[prev].remove(row)
+            self._assign[row] = lab
+            self._lists[lab].append(row)
+
+    def add_many(self, row_ids, vectors: np.ndarray) -> None:
+        row_ids = np.asarray(row_ids, dtype=np.int64).reshape(-1)
+        if row_ids.size == 0:
+            return
+        rows = self._prep(vectors)
+        end = int(row_ids.max()) + 1
+        if end > len(self):
+            grown = np.full((end,), -1, dtype=np.int32)
+            grown[: len(self)] = self._assign
+            self._assign = grown
+        if self.centroids is not None:
+            self._assign_rows(row_ids, rows)
+            return
+        self._pending_rows.extend(row_ids.tolist())
+        self._pending.append(rows)
+        if len(self._pending_rows) >= self.train_size:
+            pending = np.concatenate(self._pending, axis=0)
+            self._train(pending)
+            # A row may be pending twice if it was overwritten; keep the latest
+            latest: Dict[int, int] = {row: i for i, row in enumerate(self._pending_rows)}
+            order = np.fromiter(latest.values(), dtype=np.int64)
+            self._assign_rows(np.fromiter(latest.keys(), dtype=np.int64), pending[order])
+            self._pending_rows, self._pending = [], []
+
+    def add(self, row: int, vector: np.ndarray) -> None:
+        self.add_many([row], vector)
+
+    def candidates(self, vector: np.ndarray) -> Optional[np.ndarray]:
+        if self.centroids is None:
+            return None
+        probe = self._nearest_lists(self._prep(vector), self.n_probe)[0]
+        found: List[int] = []
+        for lab in probe.tolist():
+            found.extend(self._lists[lab])
+        if not found:
+            return None
+        return np.asarray(found, dtype=np.int64)
+
+    def truncate(self, n: int) -> None:
+        """Forget rows >= n (assigned or still buffered) after the owning matrix shrank."""
+        n = int(n)
+        for row, lab in enumerate(self._assign[n:].tolist(), start=n):
+            if lab >= 0 and row in self._lists[lab]:
+                self._lists[lab].remove(row)
+        self._assign = self._assign[:n].copy()
+        if self._pending_rows:
+            keep = np.asarray(self._pending_rows, dtype=np.int64) < n
+            pending = np.concatenate(self._pending, axis=0)[keep]
+            self._pending_rows = [row for row in self._pending_rows if row < n]
+            self._pending = [pending] if len(pending) else []
+
+    def reset(self) -> None:
+        """Forget every row; trained centroids are kept and reused."""
+        self._assign = np.zeros((0,), dtype=np.int32)
+        self._lists = [[] for _ in range(self.n_lists)]
+        self._pending_rows, self._pending = [], []
+        self.fingerprint = None
+
+    def save(self, keys: Optional[List[str]] = None) -> None:
+        """Persist centroids and assignments; ``keys`` (row order) lets the next ``sync`` verify them."""
+        if self.path is None or self.centroids is None:
+            return
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, centroids=self.centroids, assign=self._assign, keys=self._saved_fingerprint(keys))
+        os.replace(tmp, self.path)
+
+    def _load(self) -> None:
+        if self.path is None or not os.path.isfile(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                centroids = data["centroids"].astype(np.float32)
+                assign = data["assign"].astype(np.int32)
+                fingerprint = str(data["keys"]) if "keys" in data.files else ""
+        except Exception as e:
+            logger.warning(f"Could not load IVF index {self.path}: {e}")
+            return
+        if centroids.ndim != 2 or centroids.shape[1] != self.dim:
+            return
+        self.centroids = centroids
+        self.n_lists = centroids.shape[0]
+        self._lists = [[] for _ in range(self.n_lists)]
+        # Trailing unassigned rows are re-added by sync(); the saved fingerprint
+        # covers them too, so it no longer applies
+        n = len(assign)
+        while n and assign[n - 1] < 0:
+            n -= 1
+        self._assign = assign[:n]
+        self.fingerprint = (fingerprint or None) if n == len(assign) else None
+        for row, lab in enumerate(self._assign.tolist()):
+            if lab >= 0:
+                self._lists[lab].append(row)
+
+
+def check_recall(index: Any, matrix: np.ndarray, metric: str = "euclidean", n_queries: int = 100, noise: float = 0.05, seed: int = 0) -> Dict[str, float]:
+    """Recall@1 of ``index`` against exact search over ``matrix``.
+
+    Queries are stored rows plus Gaussian noise scaled to each row's RMS.
+    Also reports the mean fraction of rows the index asked to rescore.
+    """
+    from .vector_matrix import VectorMatrix
+
+    n = int(matrix.shape[0])
+    if n == 0:
+        return {"recall": 1.0, "candidate_fraction": 0.0, "queries": 0}
+    exact = VectorMatrix(matrix.shape[1], capacity=n)
+    exact.extend([str(i) for i in range(n)], matrix)
+    nearest = exact.nearest_cosine if metric == "cosine" else exact.nearest_euclidean
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, n, size=int(n_queries))
+    hits = 0
+    scanned = 0.0
+    for row in picks:
+        base = np.asarray(matrix[row], dtype=np.float32)
+        q = base + noise * float(np.sqrt(np.mean(base ** 2)) + 1e-9) * rng.normal(size=base.shape).astype(np.float32)
+        want, _ = nearest(q)
+        cand = index.candidates(q)
+        if cand is None:
+            got = want
+            scanned += 1.0
+        else:
+            got, _ = nearest(q, rows=cand)
+            scanned += len(cand) / n
+        hits += int(got == want)
+    return {"recall": hits / len(picks), "candidate_fraction": scanned / len(picks), "queries": int(len(picks))}
+
+
+def create_index(memcfg: Dict[str, Any], dim: int, path: str, metric: str = "euclidean") -> Optional[Any]:
+    """Build the index selected by ``memory.ann`` ("none", "lsh" or "ivf")."""
+    kind = str(memcfg.get("ann", "none") or "none").lower()
+    if kind == "lsh":
+        return LSHIndex(dim, n_bits=int(memcfg.get("ann_bits", 16)), n_tables=int(memcfg.get("ann_tables", 8)), path=path + "_lsh.npz")
+    if kind == "ivf":
+        return IVFIndex(dim, n_lists=int(memcfg.get("ann_lists", 64)), n_probe=int(memcfg.get("ann_probe", 4)), metric=metric, path=path + "_ivf.npz")
+    if kind != "none":
+        raise ValueError(f"Unknown ANN index: {kind}")
+    return None
@@ -1,29 +1,313 @@
-from typing import Any
+"""
+Hot/warm/cold tiering over several memory backends.
+
+- RAM tier: an LRU of the ``ram_keys`` most recently stored or loaded states.
+- Disk tier: ``backends`` (HFFS, entangled). A store goes to the backend
+  that finds the batch most novel, the original auto heuristic.
+- Cold tier: an optional compressed backend. A background thread moves disk
+  keys untouched for ``cold_after`` seconds there, and moves cold keys back
+  to disk once they are loaded again.
+
+A key->tier directory, journaled next to the data, resolves every load in
+O(1) instead of asking a single "active" backend. Novelty queries cover the
+disk tier; cold keys are archived for recall only.
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
 import numpy as np
 
+from .key_index import AppendOnlyIndex
+
+logger = logging.getLogger(__name__)
+
+# Directory location of keys held by the cold tier; disk keys map to their backend index
+COLD = -1
+TIERS = ("ram", "disk", "cold", "miss")
+
 
 class AutoMemory:
-    def __init__(self, backends: list[Any]):
+    def __init__(self, backends: list[Any], cold: Optional[Any] = None, ram_keys: int = 1024, cold_after: float = 0.0, demote_interval: float = 5.0, directory_path: Optional[str] = None, metrics: Optional[Any] = None):
         self.backends = backends
-        self.active_idx = 0 if backends else -1
+        self.cold = cold
+        self.ram_keys = max(0, int(ram_keys))
+        self.cold_after = float(cold_after)
+        self.demote_interval = float(demote_interval)
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        # Held while a store or a tier move writes to a backend, so a move never overwrites a newer store
+        self._move_lock = threading.Lock()
+        self._ram: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._promote: Dict[str, None] = {}
+        self._hits = {tier: 0 for tier in TIERS}
+        self._started = time.time()
+        self._journal = AppendOnlyIndex(directory_path) if directory_path else None
+        self._directory: Dict[str, int] = dict(self._journal.items()) if self._journal is not None else {}
+        if not self._directory:
+            self._seed_directory()
+        # Disk keys by last store/load, oldest first, so demotion reads only the idle head
+        self._idle: "OrderedDict[str, float]" = OrderedDict((key, self._started) for key, loc in self._directory.items() if loc != COLD)
+        self._stop_event = threading.Event()
+        self._thread = None
+        if self.cold is not None and self.cold_after > 0:
+            self._thread = threading.Thread(target=self._tier_loop, name="AutoMemoryTiers", daemon=True)
+            self._thread.start()
 
     @property
     def sponge_size(self):
-        return self.backends[self.active_idx].sponge_size
+        return self.backends[0].sponge_size
+
+    def _tier(self, loc: int) -> Any:
+        return self.cold if loc == COLD else self.backends[loc]
+
+    def _seed_directory(self) -> None:
+        """Adopt keys already held by the backends (first start, or no journal)."""
+        tiers = list(enumerate(self.backends)) + ([(COLD, self.cold)] if self.cold is not None else [])
+        for loc, backend in tiers:
+            keys = getattr(backend, 'keys', None)
+            if keys is None:
+                continue
+            for key in keys():
+                self._directory.setdefault(key, loc)
+        if self._journal is not None and self._directory:
+            self._journal.set_many(list(self._directory.items()))
+
+    def _relocate_locked(self, items: List[tuple]) -> None:
+        for key, loc in items:
+            self._directory[key] = loc
+        if self._journal is not None and items:
+            self._journal.set_many(items)
+
+    def _touch_locked(self, key: str, now: float) -> None:
+        self._idle[key] = now
+        self._idle.move_to_end(key)
+
+    def _ram_put_locked(self, key: str, arr: np.ndarray) -> None:
+        if self.ram_keys <= 0:
+            return
+        self._ram[key] = arr
+        self._ram.move_to_end(key)
+        while len(self._ram) > self.ram_keys:
+            self._ram.popitem(last=False)
+
+    def _choose_many(self, vectors) -> np.ndarray:
+        # Pick the backend with the largest distance per row -> treats it as more novel
+        if len(self.backends) == 1:
+            return np.zeros((len(vectors),), dtype=np.int64)
+        distances = np.stack([b.distance_to_nearest_batch(vectors) for b in self.backends], axis=0)
+        return np.argmax(distances, axis=0)
+
+    def _write_disk(self, keys: List[str], vectors: np.ndarray) -> Dict[int, List[str]]:
+        """Store into the chosen disk backends; returns stale copies to delete, by location."""
+        choice = self._choose_many(vectors)
+        for idx in np.unique(choice).tolist():
+            sel = np.flatnonzero(choice == idx)
+            self.backends[idx].store_many([keys[i] for i in sel], vectors[sel])
+        stale: Dict[int, List[str]] = {}
+        with self._lock:
+            for key, idx in zip(keys, choice.tolist()):
+                prev = self._directory.get(key)
+                if prev is not None and prev != idx:
+                    stale.setdefault(prev, []).append(key)
+            self._relocate_locked(list(zip(keys, choice.tolist())))
+        return stale
 
-    def _choose(self, vector) -> int:
-        # Simple heuristic: pick backend with largest distance -> treats it as more novel
-        distances = [b.distance_to_nearest(vector) for b in self.backends]
-        return int(np.argmax(distances))
+    def _drop(self, stale: Dict[int, List[str]]) -> None:
+        for loc, keys in stale.items():
+            delete_many = getattr(self._tier(loc), 'delete_many', None)
+            if delete_many is not None:
+                delete_many(keys)
 
     def store(self, key: str, vector):
-        idx = self._choose(vector)
-        self.active_idx = idx
-        self.backends[idx].store(key, vector)
+        self.store_many([key], np.asarray(vector)[None])
+
+    def store_many(self, keys, vectors):
+        if len(keys) == 0:
+            return
+        keys = list(keys)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape((len(keys),) + tuple(self.sponge_size))
+        with self._move_lock:
+            stale = self._write_disk(keys, vectors)
+            # Still under the move lock: a concurrent store of the same key
+            # could otherwise route elsewhere and have its fresh copy dropped here
+            self._drop(stale)
+            now = time.time()
+            with self._lock:
+                for key, vec in zip(keys, vectors):
+                    self._ram_put_locked(key, vec.copy())
+                    self._touch_locked(key, now)
+                    self._promote.pop(key, None)
 
     def load(self, key: str):
-        # Read from current active
-        return self.backends[self.active_idx].load(key)
+        return self.load_many([key])[0]
+
+    def load_many(self, keys):
+        out = np.zeros((len(keys),) + tuple(self.sponge_size), dtype=np.float32)
+        counts = {tier: 0 for tier in TIERS}
+        pending: Dict[int, List[int]] = {}
+        now = time.time()
+        with self._lock:
+            for i, key in enumerate(keys):
+                arr = self._ram.get(key)
+                if arr is not None:
+                    self._ram.move_to_end(key)
+                    if key in self._idle:
+                        self._touch_locked(key, now)
+                    out[i] = arr
+                    counts["ram"] += 1
+                    continue
+                loc = self._directory.get(key)
+                if loc is None:
+                    counts["miss"] += 1
+                else:
+                    pending.setdefault(loc, []).append(i)
+        while pending:
+            retry: Dict[int, List[int]] = {}
+            for loc, idx in pending.items():
+                arrs = self._tier(loc).load_many([keys[i] for i in idx])
+                with self._lock:
+                    for i, arr in zip(idx, arrs):
+                        key = keys[i]
+                        current = self._directory.get(key)
+                        if current != loc:
+                            # Moved between tiers while we read; read it again where it is now
+                            if current is None:
+                                counts["miss"] += 1
+                            else:
+                                retry.setdefault(current, []).append(i)
+                            continue
+                        out[i] = arr
+                        counts["cold" if loc == COLD else "disk"] += 1
+                        self._ram_put_locked(key, np.array(arr, dtype=np.float32))
+                        if loc == COLD:
+                            self._promote[key] = None
+                        else:
+                            self._touch_locked(key, now)
+            pending = retry
+        self._report(counts)
+        return out
 
     def distance_to_nearest(self, state_vector) -> float:
-        return max(b.distance_to_nearest(state_vector) for b in self.backends)
\ No newline at end of file
+        return max(b.distance_to_nearest(state_vector) for b in self.backends)
+
+    def distance_to_nearest_batch(self, state_vectors):
+        return np.max(np.stack([b.distance_to_nearest_batch(state_vectors) for b in self.backends], axis=0), axis=0)
+
+    # Tier moves
+    def tier_of(self, key: str) -> Optional[str]:
+        """"ram", "disk", "cold", or None for an unknown key."""
+        with self._lock:
+            if key in self._ram:
+                return "ram"
+            loc = self._directory.get(key)
+        if loc is None:
+            return None
+        return "cold" if loc == COLD else "disk"
+
+    def rebalance(self, batch: int = 256) -> int:
+        """Promote cold keys loaded since the last pass and demote idle disk keys; returns keys moved."""
+        if self.cold is None:
+            return 0
+        with self._move_lock:
+            return self._promote_cold(batch) + self._demote_idle(batch)
+
+    def _promote_cold(self, batch: int) -> int:
+        with self._lock:
+            picked = list(self._promote)[:batch]
+            for key in picked:
+                del self._promote[key]
+            keys = [key for key in picked if self._directory.get(key) == COLD]
+        if not keys:
+            return 0
+        stale = self._write_disk(keys, np.asarray(self.cold.load_many(keys), dtype=np.float32))
+        self._drop(stale)
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                self._touch_locked(key, now)
+        return len(keys)
+
+    def _demote_idle(self, batch: int) -> int:
+        cutoff = time.time() - self.cold_after
+        by_loc: Dict[int, List[str]] = {}
+        picked = 0
+        with self._lock:
+            for key, touched in self._idle.items():
+                if touched >= cutoff or picked >= batch:
+                    break
+                loc = self._directory.get(key)
+                if loc is not None and loc != COLD:
+                    by_loc.setdefault(loc, []).append(key)
+                    picked += 1
+        moved = 0
+        for loc, keys in by_loc.items():
+            self.cold.store_many(keys, self.backends[loc].load_many(keys))
+            with self._lock:
+                keys = [key for key in keys if self._directory.get(key) == loc]
+                self._relocate_locked([(key, COLD) for key in keys])
+                for key in keys:
+                    self._idle.pop(key, None)
+            self._drop({loc: keys})
+            moved += len(keys)
+        return moved
+
+    def _tier_loop(self) -> None:
+        while not self._stop_event.wait(self.demote_interval):
+            try:
+                self.rebalance()
+            except Exception as e:
+                logger.warning(f"AutoMemory tier rebalance failed: {e}")
+
+    # Stats
+    def hit_ratios(self) -> Dict[str, float]:
+        """Fraction of loaded keys served by each tier (plus unknown keys as "miss")."""
+        with self._lock:
+            total = sum(self._hits.values())
+            return {tier: (n / total if total else 0.0) for tier, n in self._hits.items()}
+
+    def _report(self, counts: Dict[str, int]) -> None:
+        with self._lock:
+            for tier, n in counts.items():
+                self._hits[tier] += n
+        if self.metrics is None:
+            return
+        for tier, ratio in self.hit_ratios().items():
+            if counts[tier]:
+                self.metrics.inc(f'auto_{tier}_hits', counts[tier])
+            self.metrics.set(f'auto_{tier}_hit_ratio', ratio)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        for b in list(self.backends) + ([self.cold] if self.cold is not None else []):
+            stop = getattr(b, 'stop', None)
+            if stop is not None:
+                stop()
+        if self._journal is not None:
+            self._journal.close()
+
+
+def create(config: Dict[str, Any], backends: list[Any], metrics: Optional[Any] = None) -> AutoMemory:
+    """AutoMemory over ``backends`` with the ``memory.auto_*`` tier settings."""
+    memcfg = config.get("memory", {})
+    base = config.get("filepaths", {}).get("memory_base", "data/sponge")
+    cold_after = float(memcfg.get("auto_cold_after", 0.0))
+    cold = None
+    if cold_after > 0:
+        from .memory_hffs import HFFSMemory
+        from .tensor_network import LowRankCodec
+        cold = HFFSMemory(os.path.join(base, "cold"), sponge_size=tuple(backends[0].sponge_size), storage="packed", codec=LowRankCodec(rank=int(memcfg.get("auto_cold_rank", 4))))
+    return AutoMemory(
+        backends,
+        cold=cold,
+        ram_keys=int(memcfg.get("auto_ram_keys", 1024)),
+        cold_after=cold_after,
+        demote_interval=float(memcfg.get("auto_demote_interval", 5.0)),
+        directory_path=os.path.join(base, "auto_tiers.json"),
+        metrics=metrics,
+    )
@@ -0,0 +1,114 @@
+import math
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+
+def _gaussian_kernel(distance: float, sigma: float) -> float:
+    return math.exp(- (distance ** 2) / (2 * (sigma ** 2)))
+
+
+class EntanglementKernel:
+    """Whole-sponge entanglement update for a fixed topology.
+
+    The sponge is viewed as a (gx, gy, gz, bx, by, bz) grid of equally sized
+    blocks (edge blocks padded), so the EMA write and the neighbor blend are
+    applied to every block at once. Neighbor offsets are applied in the same
+    raster order as the per-block loop in ``apply_reference``: offsets that
+    precede a block are blended in before its EMA, the others after it, which
+    reproduces the sequential result.
+    """
+
+    def __init__(self, topology: Any, strength: float, radius: int = 1):
+        self.topology = topology
+        self.grid = tuple(topology.grid)
+        self.block_size = tuple(topology.block_size)
+        self.sponge_size = tuple(topology.sponge_size)
+        radius = int(radius)
+        sigma = max(1e-6, radius / 2)
+
+        # Gather indices: padded block position -> sponge position. Positions
+        # past the end of an edge block repeat its last row, which matches how
+        # a smaller block's input broadcasts into a larger neighbor.
+        axes = []
+        masks = []
+        for a, (g, b, s) in enumerate(zip(self.grid, self.block_size, self.sponge_size)):
+            start = np.arange(g)[:, None] * b
+            size = np.minimum(b, s - start)
+            offs = np.arange(b)[None, :]
+            shape = [1] * 6
+            shape[a], shape[a + 3] = g, b
+            axes.append(np.reshape(start + np.minimum(offs, size - 1), shape))
+            masks.append(np.reshape(offs < size, shape))
+        self._gather = tuple(axes)
+        self.mask = (masks[0] & masks[1] & masks[2]).astype(np.float32)
+        self.counts = self.mask.sum(axis=(3, 4, 5))
+
+        # (slices into target blocks, slices into source blocks, strength) per offset
+        self.before: List[Tuple[Tuple[slice, ...], Tuple[slice, ...], float]] = []
+        self.after: List[Tuple[Tuple[slice, ...], Tuple[slice, ...], float]] = []
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                for dz in range(-radius, radius + 1):
+                    if dx == 0 and dy == 0 and dz == 0:
+                        continue
+                    d = (dx, dy, dz)
+                    if any(abs(o) >= g for o, g in zip(d, self.grid)):
+                        continue
+                    tgt = tuple(slice(max(0, -o), g - max(0, o)) for o, g in zip(d, self.grid))
+                    src = tuple(slice(max(0, o), g + min(0, o)) for o, g in zip(d, self.grid))
+                    dist = math.sqrt(dx * dx + dy * dy + dz * dz)
+                    s = float(strength) * _gaussian_kernel(dist, sigma=sigma)
+                    # A source block precedes its target in raster order iff d < 0
+                    (self.before if d < (0, 0, 0) else self.after).append((tgt, src, s))
+
+    def to_blocks(self, sponge: np.ndarray) -> np.ndarray:
+        return np.asarray(sponge, dtype=np.float32)[self._gather]
+
+    def from_blocks(self, blocks: np.ndarray) -> np.ndarray:
+        gx, gy, gz, bx, by, bz = blocks.shape
+        padded = blocks.transpose(0, 3, 1, 4, 2, 5).reshape(gx * bx, gy * by, gz * bz)
+        sx, sy, sz = self.sponge_size
+        return np.ascontiguousarray(padded[:sx, :sy, :sz])
+
+    def block_means(self, blocks: np.ndarray) -> np.ndarray:
+        return (blocks * self.mask).sum(axis=(3, 4, 5)) / self.counts
+
+    def _blend(self, blocks: np.ndarray, local: np.ndarray, offsets) -> None:
+        for tgt, src, s in offsets:
+            view = blocks[tgt]
+            view *= (1.0 - s)
+            view += s * local[src]
+
+    def apply(self, current: np.ndarray, sponge: np.ndarray, hebbian: Optional[Any] = None) -> np.ndarray:
+        """Return the updated sponge after writing ``sponge`` into ``current``."""
+        blocks = self.to_blocks(current)
+        local = self.to_blocks(sponge)
+        self._blend(blocks, local, self.before)
+        if hebbian is not None:
+            delta = hebbian.modulate(self.block_means(local), self.block_means(blocks))
+            blocks += np.asarray(delta, dtype=np.float32).reshape(self.grid + (1, 1, 1))
+        blocks *= 0.9
+        blocks += 0.1 * local
+        self._blend(blocks, local, self.after)
+        return self.from_blocks(blocks)
+
+
+def apply_reference(topology: Any, current: np.ndarray, sponge: np.ndarray, strength: float, radius: int = 1, hebbian: Optional[Any] = None) -> np.ndarray:
+    """Per-block loop the kernel replaces; kept as the benchmark/accuracy baseline."""
+    out = np.array(current, dtype=np.float32)
+    for bidx in topology.iter_blocks():
+        sx, sy, sz = topology.block_bounds(bidx)
+        local = sponge[sx, sy, sz]
+        cur = out[sx, sy, sz].copy()
+        if hebbian is not None:
+            cur = hebbian.update(cur, pre=local, post=cur)
+        updated = 0.9 * cur + 0.1 * local
+        for nidx, dist in topology.neighbors(bidx, radius=radius):
+            nsx, nsy, nsz = topology.block_bounds(nidx)
+            nblock = out[nsx, nsy, nsz]
+            blend = local[:nblock.shape[0], :nblock.shape[1], :nblock.shape[2]]
+            s = strength * _gaussian_kernel(dist, sigma=max(1e-6, radius / 2))
+            out[nsx, nsy, nsz] = (1.0 - s) * nblock + s * blend
+        out[sx, sy, sz] = updated
+    return out
@@ -20,8 +20,33 @@ class GuardedMemory:
         self._backend.store(key, vector)
         return True
 
+    def store_many(self, keys, vectors, context: Optional[dict] = None) -> bool:
+        # One policy decision covers the whole batch
+        ctx = context or {}
+        allowed, _ = self._policy.check('store_memory', ctx)
+        if not allowed:
+            return False
+        self._backend.store_many(keys, vectors)
+        return True
+
     def load(self, key: str):
         return self._backend.load(key)
 
+    def load_many(self, keys):
+        return self._backend.load_many(keys)
+
     def distance_to_nearest(self, state_vector) -> float:
-        return self._backend.distance_to_nearest(state_vector)
\ No newline at end of file
+        return self._backend.distance_to_nearest(state_vector)
+
+    def distance_to_nearest_batch(self, state_vectors):
+        return self._backend.distance_to_nearest_batch(state_vectors)
+
+    def flush(self) -> None:
+        flush = getattr(self._backend, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def stop(self) -> None:
+        stop = getattr(self._backend, 'stop', None)
+        if stop is not None:
+            stop()
\ No newline at end of file
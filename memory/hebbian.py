@@ -17,6 +17,69 @@ class HebbianUpdater:
         post_m = post.mean() if post.ndim > 0 else float(post)
         hebb = pre_m * post_m
         if self.trace is None:
-            self.trace = np.zeros_like(block, dtype=np.float32)
+            # The trace is driven by scalar activity, so keep it scalar; it then
+            # broadcasts onto edge blocks of any shape
+            self.trace = np.zeros((), dtype=np.float32)
         self.trace = self.decay * self.trace + (1.0 - self.decay) * hebb
-        return block + self.lr * self.trace
\ No newline at end of file
+        return block + self.lr * self.trace
+
+    def modulate(self, pre_means: np.ndarray, post_means: np.ndarray) -> np.ndarray:
+        """Additive update per block for a grid of block mean activities (raster-order scan)."""
+        pre_means = np.asarray(pre_means, dtype=np.float32)
+        return (self.lr * self.scan(pre_means.reshape(-1), np.asarray(post_means).reshape(-1))).reshape(pre_means.shape)
+
+    def scan(self, pre_means: np.ndarray, post_means: np.ndarray) -> np.ndarray:
+        """Run ``update`` over a sequence of blocks given their mean activities.
+
+        Returns the trace after each step, in order.
+        """
+        hebb = np.asarray(pre_means, dtype=np.float32) * np.asarray(post_means, dtype=np.float32)
+        t = np.float32(0.0) if self.trace is None else np.float32(self.trace)
+        out = np.empty_like(hebb)
+        for i, h in enumerate(hebb):
+            t = self.decay * t + (1.0 - self.decay) * h
+            out[i] = t
+        self.trace = np.asarray(t, dtype=np.float32)
+        return out
+
+
+def block_means(arr: np.ndarray, block_size: Tuple[int, int, int]) -> np.ndarray:
+    """Mean of every block of a 3-D array, edge blocks included, via one padded reshape."""
+    arr = np.asarray(arr, dtype=np.float32)
+    grid = tuple(-(-s // b) for s, b in zip(arr.shape, block_size))
+    padded = np.zeros(tuple(g * b for g, b in zip(grid, block_size)), dtype=np.float32)
+    padded[: arr.shape[0], : arr.shape[1], : arr.shape[2]] = arr
+    sums = padded.reshape(grid[0], block_size[0], grid[1], block_size[1], grid[2], block_size[2]).sum(axis=(1, 3, 5))
+    counts = [np.minimum(b, s - np.arange(g) * b) for s, b, g in zip(arr.shape, block_size, grid)]
+    return sums / (counts[0][:, None, None] * counts[1][None, :, None] * counts[2][None, None, :])
+
+
+class BlockHebbian:
+    """Hebbian modulation for the whole sponge in one operation.
+
+    Keeps one trace per block of the grid; the drive is the product of a
+    block's pre and post mean activity, so every voxel of a block shares its
+    trace and edge blocks of any shape need no special case. Unlike
+    ``HebbianUpdater.scan``, blocks do not feed each other's trace.
+    """
+
+    def __init__(self, grid: Tuple[int, int, int], lr: float = 0.01, decay: float = 0.99):
+        self.grid = tuple(int(g) for g in grid)
+        self.lr = float(lr)
+        self.decay = float(decay)
+        self.trace = np.zeros(self.grid, dtype=np.float32)
+
+    def modulate(self, pre_means: np.ndarray, post_means: np.ndarray) -> np.ndarray:
+        """Advance every block's trace and return the (gx, gy, gz) additive update."""
+        hebb = np.asarray(pre_means, dtype=np.float32).reshape(self.grid) * np.asarray(post_means, dtype=np.float32).reshape(self.grid)
+        self.trace *= self.decay
+        self.trace += (1.0 - self.decay) * hebb
+        return self.lr * self.trace
+
+    def update(self, sponge: np.ndarray, pre: np.ndarray, block_size: Tuple[int, int, int]) -> np.ndarray:
+        """``sponge`` plus the modulation driven by ``pre`` (input) and ``sponge`` (post) block means."""
+        sponge = np.asarray(sponge, dtype=np.float32)
+        delta = self.modulate(block_means(pre, block_size), block_means(sponge, block_size))
+        for axis, b in enumerate(block_size):
+            delta = np.repeat(delta, b, axis=axis)
+        return sponge + delta[: sponge.shape[0], : sponge.shape[1], : sponge.shape[2]]
@@ -0,0 +1,118 @@
+import os
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class AppendOnlyIndex:
+    """Key -> metadata map persisted as a JSON snapshot plus an append-only log.
+
+    Each ``set`` appends one JSON line to the log instead of rewriting the
+    snapshot, and deletes append tombstones. The log is folded into the snapshot once it holds as many
+    records as there are keys, so compaction cost stays amortized O(1).
+    """
+
+    def __init__(self, snapshot_path: str, log_path: Optional[str] = None, min_compact: int = 1024):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path or snapshot_path + ".log"
+        self.min_compact = int(min_compact)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._log_records = 0
+        self._load()
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        if os.path.isfile(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    self._data = dict(json.load(f))
+            except (OSError, ValueError):
+                self._data = {}
+        if not os.path.isfile(self.log_path):
+            return
+        with open(self.log_path, 'rb') as f:
+            raw = f.read()
+        end = raw.rfind(b"\n") + 1
+        if end < len(raw):
+            # Torn tail from an interrupted append: cut it so the next record starts on its own line
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(end)
+        for line in raw[:end].splitlines():
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # a corrupt line mid-log; later records still apply
+            if rec.get("del"):
+                self._data.pop(rec["k"], None)
+            else:
+                self._data[rec["k"]] = rec["v"]
+            self._log_records += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._data.keys())
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        with self._lock:
+            return iter(list(self._data.items()))
+
+    def set(self, key: str, value: Any) -> None:
+        line = json.dumps({"k": key, "v": value}) + "\n"
+        with self._lock:
+            self._data[key] = value
+            self._log.write(line)
+            self._log.flush()
+            self._log_records += 1
+            if self._log_records >= max(self.min_compact, len(self._data)):
+                self._compact_locked()
+
+    def set_many(self, items: List[Tuple[str, Any]]) -> None:
+        """Set several keys with a single append to the log."""
+        lines = "".join(json.dumps({"k": key, "v": value}) + "\n" for key, value in items)
+        with self._lock:
+            for key, value in items:
+                self._data[key] = value
+            self._log.write(lines)
+            self._log.flush()
+            self._log_records += len(items)
+            if self._log_records >= max(self.min_compact, len(self._data)):
+                self._compact_locked()
+
+    def delete_many(self, keys: List[str]) -> None:
+        """Drop several keys with a single append of tombstone records."""
+        lines = "".join(json.dumps({"k": key, "del": 1}) + "\n" for key in keys)
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+            self._log.write(lines)
+            self._log.flush()
+            self._log_records += len(keys)
+            if self._log_records >= max(self.min_compact, len(self._data)):
+                self._compact_locked()
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f)
+        os.replace(tmp, self.snapshot_path)
+        self._log.close()
+        self._log = open(self.log_path, 'w', encoding='utf-8')
+        self._log_records = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._log.close()
@@ -0,0 +1,199 @@
+"""
+Persistent prioritized replay in one memory-mapped file.
+
+Layout: a 128-byte header (magic, format, capacity, dim, head, size, a write
+counter, alpha, epsilon), the scaled priorities as float64[capacity], then
+the rows as float32[capacity, dim]. Rows are paged in on demand, so reopening
+only rebuilds the sum/min trees from the priorities and a restarted learner
+can sample as soon as the buffer is open.
+
+One process opens the file for writing (held with an exclusive flock where
+the platform has one); any number may open it ``readonly``, e.g. evaluators.
+A reader resyncs its trees on the next draw after the writer's counter
+moves. Readers take no lock, so a draw racing the writer may miss the newest
+rows or read a slot while it is being overwritten.
+"""
+import os
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): a single writer is by convention
+    fcntl = None
+
+from .prioritized_replay import PrioritizedReplayBuffer
+from .ring_buffer import RingStorage
+
+logger = logging.getLogger(__name__)
+
+MAGIC = int.from_bytes(b"RSREPLAY", "little")
+FORMAT = 1
+HEADER_BYTES = 128
+# Header slots: uint64 fields, then alpha/epsilon through a float64 view
+_MAGIC, _FORMAT, _CAPACITY, _DIM, _HEAD, _SIZE, _WRITES, _ALPHA, _EPSILON = range(9)
+
+
+class MemmapRingStorage(RingStorage):
+    """RingStorage over the file's rows; head and size live in its header."""
+
+    def __init__(self, header: np.ndarray, rows: np.ndarray):
+        self._header = header
+        self.capacity, self.dim = (int(x) for x in rows.shape)
+        self.data = rows
+
+    @property
+    def _head(self) -> int:
+        return int(self._header[_HEAD])
+
+    @_head.setter
+    def _head(self, value: int) -> None:
+        self._header[_HEAD] = value
+
+    @property
+    def _size(self) -> int:
+        return int(self._header[_SIZE])
+
+    @_size.setter
+    def _size(self, value: int) -> None:
+        self._header[_SIZE] = value
+
+
+class MemmapReplayBuffer(PrioritizedReplayBuffer):
+    def __init__(self, path: str, capacity: int = 10000, dim: Optional[int] = None, alpha: float = 0.6, epsilon: float = 1e-3, readonly: bool = False):
+        self.path = path
+        self.readonly = bool(readonly)
+        self._writer_lock = None
+        if self.readonly:
+            raw = np.memmap(path, dtype=np.uint8, mode='r')
+            if not self._valid(raw):
+                raise ValueError(f"{path} is not a replay buffer file")
+            header = raw[:HEADER_BYTES].view(np.uint64)
+            capacity, dim = int(header[_CAPACITY]), int(header[_DIM])
+            floats = raw[:HEADER_BYTES].view(np.float64)
+            alpha, epsilon = float(floats[_ALPHA]), float(floats[_EPSILON])
+        else:
+            if dim is None:
+                raise ValueError("dim is required to open a replay buffer for writing")
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._acquire_writer()
+            raw = self._open_writable(int(capacity), int(dim), float(alpha), float(epsilon))
+        super().__init__(capacity, alpha, epsilon)
+        self._raw = raw
+        self._header = raw[:HEADER_BYTES].view(np.uint64)
+        self._priorities = raw[HEADER_BYTES:HEADER_BYTES + 8 * self.capacity].view(np.float64)
+        rows = raw[HEADER_BYTES + 8 * self.capacity:].view(np.float32).reshape(self.capacity, int(dim))
+        self.storage = MemmapRingStorage(self._header, rows)
+        self._seen_writes = int(self._header[_WRITES])
+        n = len(self.storage)
+        self._sum.update(np.arange(n), self._priorities[:n])
+        self._min.update(np.arange(n), self._priorities[:n])
+
+    @staticmethod
+    def _nbytes(capacity: int, dim: int) -> int:
+        return HEADER_BYTES + 8 * capacity + 4 * capacity * dim
+
+    @staticmethod
+    def _valid(raw: np.ndarray) -> bool:
+        if raw.size < HEADER_BYTES:
+            return False
+        header = raw[:HEADER_BYTES].view(np.uint64)
+        if int(header[_MAGIC]) != MAGIC or int(header[_FORMAT]) != FORMAT:
+            return False
+        return raw.size == MemmapReplayBuffer._nbytes(int(header[_CAPACITY]), int(header[_DIM]))
+
+    def _acquire_writer(self) -> None:
+        if fcntl is None:
+            return
+        handle = open(self.path + ".lock", 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            raise RuntimeError(f"{self.path} is already open for writing")
+        self._writer_lock = handle
+
+    def _open_writable(self, capacity: int, dim: int, alpha: float, epsilon: float) -> np.ndarray:
+        """Map an existing file of the same shape, else create an empty one."""
+        if os.path.isfile(self.path) and os.path.getsize(self.path) > 0:
+            raw = np.memmap(self.path, dtype=np.uint8, mode='r+')
+            header = raw[:HEADER_BYTES].view(np.uint64)
+            if self._valid(raw) and int(header[_CAPACITY]) == capacity and int(header[_DIM]) == dim:
+                floats = raw[:HEADER_BYTES].view(np.float64)
+                old_alpha, old_epsilon = float(floats[_ALPHA]), float(floats[_EPSILON])
+                if (old_alpha, old_epsilon) != (alpha, epsilon):
+                    # Rescale stored priorities to the new exponent/offset
+                    n = int(header[_SIZE])
+                    pri = raw[HEADER_BYTES:HEADER_BYTES + 8 * capacity].view(np.float64)
+                    raw_p = np.maximum(pri[:n] ** (1.0 / old_alpha) - old_epsilon, 0.0) if old_alpha > 0 else np.zeros((n,))
+                    pri[:n] = (raw_p + epsilon) ** alpha
+                    floats[_ALPHA], floats[_EPSILON] = alpha, epsilon
+                    header[_WRITES] += 1
+                return raw
+            del raw, header
+            logger.warning("Replay file %s does not match capacity=%d dim=%d; starting empty", self.path, capacity, dim)
+        raw = np.memmap(self.path, dtype=np.uint8, mode='w+', shape=(self._nbytes(capacity, dim),))
+        header = raw[:HEADER_BYTES].view(np.uint64)
+        header[[_MAGIC, _FORMAT, _CAPACITY, _DIM]] = [MAGIC, FORMAT, capacity, dim]
+        floats = raw[:HEADER_BYTES].view(np.float64)
+        floats[_ALPHA], floats[_EPSILON] = alpha, epsilon
+        raw.flush()
+        return raw
+
+    def _check_writable(self) -> None:
+        if self.readonly:
+            raise RuntimeError(f"{self.path} is open read-only")
+
+    def _prioritize_locked(self, slots, scaled) -> None:
+        super()._prioritize_locked(slots, scaled)
+        self._priorities[slots] = scaled
+        self._header[_WRITES] += 1
+
+    def add(self, vector: np.ndarray, priority: float) -> None:
+        self._check_writable()
+        super().add(vector, priority)
+
+    def add_many(self, vectors: np.ndarray, priorities) -> None:
+        self._check_writable()
+        super().add_many(vectors, priorities)
+
+    def update_priorities(self, indices, priorities) -> None:
+        self._check_writable()
+        super().update_priorities(indices, priorities)
+
+    def refresh(self) -> None:
+        """Readers: pick up rows and priorities the writer changed since the last draw."""
+        with self.lock:
+            writes = int(self._header[_WRITES])
+            if writes == self._seen_writes:
+                return
+            self._seen_writes = writes
+            n = len(self.storage)
+            scaled = np.array(self._priorities[:n])
+            changed = np.flatnonzero(self._sum.levels[0][:n] != scaled)
+            self._sum.update(changed, scaled[changed])
+            self._min.update(changed, scaled[changed])
+
+    def sample_batch(self, batch_size: int, beta: float = 0.4, out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.readonly:
+            self.refresh()
+        return super().sample_batch(batch_size, beta=beta, out=out)
+
+    def flush(self) -> None:
+        """Write dirty pages back to the file (the writer's rows survive a crash without it, an OS crash not)."""
+        if not self.readonly:
+            self._raw.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer_lock is not None:
+            self._writer_lock.close()
+            self._writer_lock = None
+
+    def memory_report(self) -> Dict[str, Any]:
+        report = super().memory_report()
+        report["path"] = self.path
+        report["file_bytes"] = int(self._raw.size)
+        return report
@@ -2,21 +2,278 @@
 
 """
 Holographic Fractal File System (HFFS) memory backend.
+
+Two layouts are supported: "files" keeps one .npy per key, "packed" appends
+fixed-stride rows to a single memory-mapped hffs.f32 file with a key->slot
+index, so loads are single-row copies and stores are appends. A new packed
+file imports the legacy per-key files once; ``<packed file>.imported``
+records that it ran.
+
+``precision`` ("float32", "float16" or "int8" with a per-state scale and
+zero point, see memory.quantize) applies to both layouts and to the
+novelty matrix; the packed file becomes hffs.f16 / hffs.i8.
+
+With a ``codec`` (see tensor_network.LowRankCodec) each state is persisted
+as its encoded low-rank row instead: ``<key>.tn.npy`` files, or a packed
+``hffs_tn<rank>.f32`` of codec stride, which shrinks the store on disk by
+about sponge_dim/rank. A load returns the rank-k reconstruction, whose
+error is the SVD truncation error of the state. Novelty search runs on a
+separate in-RAM matrix of full-dimension rows (shrink it with
+``precision``): stores add their exact input, so a state is at distance 0
+from itself, while rows rebuilt at startup are decoded reconstructions.
+Factor rows are kept at float16 at most, since one int8 range cannot cover
+U, S and Vt at once.
+
+With a ``retention`` policy (see memory.retention) every store records a
+timestamp and novelty score in hffs_retention.json, and stores that cross a
+limit evict keys from the files, packed rows, novelty matrix and ANN index.
 """
 import os
+import time
+import threading
 import numpy as np
 import logging
 
+from .ann import check_recall, create_index
+from .key_index import AppendOnlyIndex
+from .quantize import PRECISION_SUFFIXES, check_precision, load_array, save_array
+from .retention import RetentionPolicy
+from .vector_matrix import VectorMatrix
+
 logger = logging.getLogger(__name__)
 
 class HFFSMemory:
-    def __init__(self, base_path, sponge_size=(27,27,27)):
+    def __init__(self, base_path, sponge_size=(27,27,27), storage="files", codec=None, precision="float32", retention=None):
         self.base_path = base_path
         try:
             os.makedirs(self.base_path, exist_ok=True)
         except Exception as e:
             logger.warning(f"Could not create memory directory: {e}")
         self.sponge_size = tuple(sponge_size)
+        self.storage = str(storage).lower()
+        if self.storage not in ("files", "packed"):
+            raise ValueError(f"Unknown HFFS storage layout: {storage}")
+        self.codec = codec
+        self.precision = check_precision(precision)
+        self._payload_precision = "float32" if self.precision == "float32" else "float16"
+        self._lock = threading.Lock()
+        self._ann = None
+        self.retention = retention
+        self._meta = None
+        self._last_sweep = time.time()
+        if retention is not None:
+            self._meta = AppendOnlyIndex(os.path.join(self.base_path, "hffs_retention.json"))
+        dim = int(np.prod(self.sponge_size))
+        self._payload = None
+        if self.storage == "packed" and codec is None:
+            # The packed file doubles as the novelty matrix: no RAM copy
+            self.packed_path = os.path.join(self.base_path, f"hffs.{PRECISION_SUFFIXES[self.precision]}")
+            self._payload = self._vectors = VectorMatrix(dim, path=self.packed_path, precision=self.precision)
+        elif self.storage == "packed":
+            self.packed_path = os.path.join(self.base_path, f"hffs_tn{codec.rank}.{PRECISION_SUFFIXES[self._payload_precision]}")
+            self._payload = VectorMatrix(codec.stride(self.sponge_size), path=self.packed_path, precision=self._payload_precision)
+            self._vectors = VectorMatrix(dim, capacity=max(64, len(self._payload)), precision=self.precision)
+            self._decode_payload()
+        else:
+            # In-RAM copy of every stored state for vectorized novelty queries
+            self._vectors = VectorMatrix(dim, precision=self.precision)
+        if self._payload is None:
+            self._import_files()
+        elif not os.path.exists(self.packed_path + ".imported"):
+            # One-shot: keys later evicted or demoted must not come back from
+            # the legacy files, so the marker is written even if nothing moved
+            if len(self._payload) == 0:
+                if not self._import_packed(os.path.join(self.base_path, "hffs.f32")):
+                    self._import_files()
+                self._payload.flush()
+            try:
+                with open(self.packed_path + ".imported", "w") as f:
+                    f.write(f"{time.time()}\n")
+            except OSError as e:
+                logger.warning(f"Could not record legacy import: {e}")
+
+    def _decode_payload(self, chunk=1024):
+        """Rebuild the novelty matrix from packed codec rows."""
+        keys = self._payload.keys()
+        for start in range(0, len(keys), chunk):
+            block = self.codec.decode_many(self._payload.rows(start, start + chunk), self.sponge_size)
+            self._vectors.extend(keys[start:start + chunk], block.reshape(block.shape[0], -1))
+
+    def _import_packed(self, path, chunk=1024):
+        """One-shot migration from a raw float32 packed file after a layout change."""
+        if path == self._payload.path or not os.path.isfile(path):
+            return False
+        old = VectorMatrix(self._vectors.dim, path=path)
+        keys = old.keys()
+        for start in range(0, len(keys), chunk):
+            rows = old.rows(start, start + chunk)
+            self._import_states(keys[start:start + chunk], rows.reshape((-1,) + self.sponge_size))
+        return len(keys) > 0
+
+    def _import_files(self):
+        """Load all per-key .npy states (startup rebuild, or one-shot packed migration)."""
+        try:
+            names = sorted(os.listdir(self.base_path))
+        except OSError:
+            return
+        dim = self._vectors.dim
+        keys, arrs, seen = [], [], set()
+        for fn in names:
+            if fn.endswith(".q8.npz"):
+                fn = fn[:-7] + ".npy"
+            elif not fn.endswith(".npy"):
+                continue
+            try:
+                if fn.endswith(".tn.npy"):
+                    arr = np.load(os.path.join(self.base_path, fn))
+                else:
+                    arr = load_array(os.path.join(self.base_path, fn), self.precision)
+            except Exception:
+                continue
+            if fn.endswith(".tn.npy"):
+                if self.codec is None or arr.size != self.codec.stride(self.sponge_size):
+                    continue
+                keys.append(fn[:-7])
+                arrs.append(self.codec.decode(arr, self.sponge_size))
+                continue
+            # Other backends may share the directory (e.g. global_latent.npy)
+            if arr.size != dim:
+                continue
+            if fn[:-4] in seen:
+                continue  # both a .npy and a .q8.npz copy; load_array read the preferred one
+            seen.add(fn[:-4])
+            keys.append(fn[:-4])
+            arrs.append(arr.reshape(self.sponge_size))
+        if keys:
+            self._import_states(keys, np.stack(arrs, axis=0))
+
+    def _import_states(self, keys, arrs):
+        # A corrupt state (e.g. all NaN) would fail the codec's SVD and abort startup
+        finite = np.isfinite(arrs.reshape(len(keys), -1)).all(axis=1)
+        for i in np.flatnonzero(~finite):
+            logger.warning(f"Skipping memory '{keys[i]}': non-finite values")
+        if not finite.all():
+            keys, arrs = [k for k, ok in zip(keys, finite) if ok], arrs[finite]
+        if not keys:
+            return
+        encoded = None
+        if self._payload is not None and self._payload is not self._vectors:
+            encoded = self._encode(arrs)
+        self._put_many_locked(keys, arrs, encoded)
+
+    def _encode(self, arrs):
+        """Codec rows for a batch; the exact states, not their reconstructions, get indexed."""
+        encoded = np.stack([self.codec.encode(arr) for arr in arrs], axis=0)
+        if self._payload_precision == "float16":
+            encoded = encoded.astype(np.float16)
+        return encoded
+
+    def _put_many_locked(self, keys, arrs, encoded=None):
+        """Insert rows into the novelty matrix (and the packed codec file, if separate)."""
+        if encoded is not None and self._payload is not None and self._payload is not self._vectors:
+            for key, row in zip(keys, encoded):
+                self._payload.put(key, row)
+        rows = [self._vectors.put(key, arr) for key, arr in zip(keys, arrs)]
+        if self._ann is not None and rows:
+            self._ann.add_many(rows, arrs)
+
+    def _entry_bytes(self):
+        """Stored bytes per key: one packed row or one state file."""
+        if self._payload is not None:
+            return self._payload.row_nbytes
+        if self.codec is not None:
+            return self.codec.stride(self.sponge_size) * (2 if self._payload_precision == "float16" else 4)
+        return self._vectors.row_nbytes
+
+    def _novelty_locked(self, arrs):
+        """Distance of each incoming state to its nearest stored one, if retention ranks by it."""
+        if self.retention is None or not self.retention.scores_novelty:
+            return [None] * len(arrs)
+        _, dists = self._vectors.nearest_euclidean_batch(np.asarray(arrs, dtype=np.float32).reshape(len(arrs), -1))
+        return [float(d) for d in dists]
+
+    def _retain_locked(self, keys, novelty):
+        if self._meta is None or not keys:
+            return
+        now = time.time()
+        self._meta.set_many([(key, [now, score]) for key, score in zip(keys, novelty)])
+        if self.retention.due(len(self._vectors), self._entry_bytes(), self._last_sweep, now):
+            self._compact_locked(now)
+
+    def _compact_locked(self, now):
+        start = time.perf_counter()
+        keys = self._vectors.keys()
+        missing = [(key, [now, None]) for key in keys if key not in self._meta]
+        if missing:
+            # Keys stored before retention was enabled start their TTL now
+            self._meta.set_many(missing)
+        meta = [self._meta.get(key) for key in keys]
+        timestamps = np.array([m[0] for m in meta], dtype=np.float64)
+        novelty = np.array([np.nan if m[1] is None else m[1] for m in meta], dtype=np.float64)
+        victims = self.retention.select(keys, timestamps, novelty, self._entry_bytes(), now)
+        self._last_sweep = now
+        if victims:
+            self._evict_locked(victims)
+        self.retention.report(len(victims), time.perf_counter() - start)
+        return len(victims)
+
+    def _evict_locked(self, keys):
+        """Drop keys from the packed rows, novelty matrix, ANN index, state files and metadata."""
+        if self._payload is not None and self._payload is not self._vectors:
+            self._payload.remove_many(keys)
+        changed = self._vectors.remove_many(keys)
+        if self._ann is not None:
+            self._ann.truncate(len(self._vectors))
+            if len(changed):
+                names = self._vectors.keys()
+                self._ann.add_many(changed, np.stack([self._vectors.get(names[row]) for row in changed], axis=0))
+        if self.storage == "files":
+            for key in keys:
+                for suffix in (".npy", ".q8.npz", ".tn.npy"):
+                    try:
+                        os.remove(os.path.join(self.base_path, key + suffix))
+                    except FileNotFoundError:
+                        pass
+        if self._meta is not None:
+            self._meta.delete_many(keys)
+
+    def compact(self):
+        """Apply the retention policy now; returns the number of evicted keys."""
+        if self.retention is None:
+            return 0
+        with self._lock:
+            return self._compact_locked(time.time())
+
+    def keys(self):
+        """Keys with a stored state."""
+        with self._lock:
+            return self._vectors.keys()
+
+    def delete_many(self, keys):
+        """Forget stored states (e.g. after a tier move); unknown keys are ignored."""
+        with self._lock:
+            present = [key for key in keys if key in self._vectors]
+            if present:
+                self._evict_locked(present)
+
+    def _save_file(self, key, arr, encoded=None):
+        if encoded is None:
+            save_array(os.path.join(self.base_path, f"{key}.npy"), arr, self.precision)
+        else:
+            np.save(os.path.join(self.base_path, f"{key}.tn.npy"), encoded)
+
+    def attach_index(self, index):
+        """Answer novelty queries through an approximate index (see memory.ann)."""
+        with self._lock:
+            index.sync(self._vectors.matrix(), self._vectors.keys())
+            self._ann = index
+
+    def check_index_recall(self, n_queries=100):
+        """Recall@1 of the attached index against exact search."""
+        with self._lock:
+            if self._ann is None:
+                return None
+            return check_recall(self._ann, self._vectors.matrix(), "euclidean", n_queries=n_queries)
 
     def recall_last(self):
         if not self.memory:
@@ -28,36 +285,116 @@ class HFFSMemory:
     def store(self, key, vector):
         """Persist state vector into fractal map"""
         try:
-            path = os.path.join(self.base_path, f"{key}.npy")
-            arr = np.array(vector).reshape(self.sponge_size)
-            np.save(path, arr)
+            arrs = np.array(vector).reshape((1,) + self.sponge_size)
+            encoded = None
+            if self.codec is not None:
+                encoded = self._encode(arrs)
+            if self.storage == "files":
+                self._save_file(key, arrs[0], None if encoded is None else encoded[0])
+            with self._lock:
+                novelty = self._novelty_locked(arrs)
+                self._put_many_locked([key], arrs, encoded)
+                self._retain_locked([key], novelty)
         except Exception as e:
             logger.warning(f"Failed storing memory '{key}': {e}")
 
     def load(self, key):
         """Load stored state"""
+        if self.storage == "packed":
+            with self._lock:
+                row = self._payload.get(key)
+                if row is not None and self.codec is not None:
+                    return self.codec.decode(row, self.sponge_size)
+            if row is None:
+                logger.warning(f"Memory '{key}' not found.")
+                return np.zeros(self.sponge_size)
+            # A copy: the row is a view into the memmap, reused by remove_many and overwrites
+            return row.reshape(self.sponge_size).copy()
+        if self.codec is not None:
+            try:
+                row = np.load(os.path.join(self.base_path, f"{key}.tn.npy"))
+                return self.codec.decode(row, self.sponge_size)
+            except FileNotFoundError:
+                pass  # fall back to a state saved before compression was enabled
         try:
             path = os.path.join(self.base_path, f"{key}.npy")
-            return np.load(path)
+            return load_array(path, self.precision)
         except FileNotFoundError:
             logger.warning(f"Memory '{key}' not found.")
             return np.zeros(self.sponge_size)
 
     def distance_to_nearest(self, state_vector):
         """Compute euclidean distance to nearest stored vector"""
-        min_dist = float('inf')
-        for fn in os.listdir(self.base_path):
-            try:
-                stored = np.load(os.path.join(self.base_path, fn)).flatten()
-                d = np.linalg.norm(np.array(state_vector).flatten() - stored)
-                if d < min_dist:
-                    min_dist = d
-            except Exception:
-                continue
+        q = np.asarray(state_vector, dtype=np.float32).reshape(-1)
+        if q.size != self._vectors.dim:
+            return 0.0
+        with self._lock:
+            rows = self._ann.candidates(q) if self._ann is not None else None
+            _, min_dist = self._vectors.nearest_euclidean(q, rows=rows)
         return min_dist if min_dist != float('inf') else 0.0
 
+    def store_many(self, keys, vectors):
+        """Persist a (B, *sponge_size) batch; the index is updated under one lock."""
+        arrs = np.asarray(vectors).reshape((len(keys),) + self.sponge_size)
+        ok = np.ones((len(keys),), dtype=bool)
+        encoded = None
+        if self.codec is not None:
+            encoded = self._encode(arrs)
+        if self.storage == "files":
+            for i, (key, arr) in enumerate(zip(keys, arrs)):
+                try:
+                    self._save_file(key, arr, None if encoded is None else encoded[i])
+                except Exception as e:
+                    logger.warning(f"Failed storing memory '{key}': {e}")
+                    ok[i] = False
+        stored = [keys[i] for i in np.flatnonzero(ok)]
+        with self._lock:
+            novelty = self._novelty_locked(arrs[ok])
+            self._put_many_locked(stored, arrs[ok], None if encoded is None else encoded[ok])
+            self._retain_locked(stored, novelty)
+
+    def load_many(self, keys):
+        """Return a (B, *sponge_size) batch straight from the novelty matrix."""
+        out = np.zeros((len(keys),) + self.sponge_size, dtype=np.float32)
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._vectors.get(key)
+                if row is not None:
+                    out[i] = row.reshape(self.sponge_size)
+        return out
+
+    def distance_to_nearest_batch(self, state_vectors):
+        """Euclidean distance to nearest stored vector for each row of a batch"""
+        q = np.asarray(state_vectors, dtype=np.float32).reshape(len(state_vectors), -1)
+        if q.shape[1] != self._vectors.dim:
+            return np.zeros((q.shape[0],))
+        with self._lock:
+            if self._ann is None:
+                _, dists = self._vectors.nearest_euclidean_batch(q)
+            else:
+                dists = np.array([self._vectors.nearest_euclidean(v, rows=self._ann.candidates(v))[1] for v in q])
+        return np.where(np.isinf(dists), 0.0, dists)
+
+    def stop(self):
+        with self._lock:
+            if self._payload is not None:
+                self._payload.flush()
+            if self._ann is not None:
+                self._ann.save(self._vectors.keys())
+
 # Factory for plugin system (not loaded via spine)
 def create(config=None):
     path = config.get("filepaths", {}).get("memory_base", "data/sponge") if config else "data/sponge"
     size = tuple(config.get("filepaths", {}).get("sponge_size", [27,27,27])) if config else (27,27,27)
-    return HFFSMemory(path, sponge_size=size)
+    storage = config.get("memory", {}).get("hffs_storage", "files") if config else "files"
+    codec = None
+    if config and bool(config.get("compression", {}).get("enabled", False)):
+        from .tensor_network import LowRankCodec
+        codec = LowRankCodec(rank=int(config.get("compression", {}).get("rank", 8)))
+    precision = config.get("memory", {}).get("precision", "float32") if config else "float32"
+    retention = RetentionPolicy.from_config(config.get("memory", {})) if config else None
+    mem = HFFSMemory(path, sponge_size=size, storage=storage, codec=codec, precision=precision, retention=retention)
+    index = create_index(config.get("memory", {}), int(np.prod(size)), os.path.join(path, "hffs_ann"), metric="euclidean") if config else None
+    if index is not None:
+        mem.attach_index(index)
+    return mem
@@ -1,50 +1,137 @@
-from typing import Any, Dict, List, Tuple
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 
-from .sponge_memory import EntangledSpongeMemory, create as create_entangled
+from .key_index import AppendOnlyIndex
+from .sponge_memory import EntangledSpongeMemory, SpongeTopology, create as create_entangled
+
+logger = logging.getLogger(__name__)
+
+# Shared state that scales kept directly in memory_base before each got its own directory
+_ROOT_STATE_PREFIXES = ("index.json", "index.log", "signatures", "global_latent")
+_ROOT_BLOCK_STATE = ("blocks", "sponge.")
 
 
 class MultiScaleMemory:
-    def __init__(self, configs: List[Dict[str, Any]]):
+    """Several sponges over the same state at different block sizes.
+
+    The first (coarsest) scale is the primary: it alone computes signatures
+    and keeps the index, global latent and novelty matrix. The other scales
+    are blocks-only, and all scales entangle their blocks concurrently on a
+    thread pool, so a store costs about as much as the slowest scale.
+    """
+
+    def __init__(self, configs: List[Dict[str, Any]], workers: Optional[int] = None):
         # Each config describes one scale (e.g., different block_size)
-        self.scales: List[EntangledSpongeMemory] = [create_entangled(cfg) for cfg in configs]
-        self._size = self.scales[0].sponge_size
+        self.scales: List[EntangledSpongeMemory] = [create_entangled(cfg, blocks_only=i > 0) for i, cfg in enumerate(configs)]
+        self.primary = self.scales[0]
+        self._size = self.primary.sponge_size
+        self._pool = ThreadPoolExecutor(max_workers=int(workers or len(self.scales)), thread_name_prefix="multiscale")
 
     @property
     def sponge_size(self) -> Tuple[int, int, int]:
         return self._size
 
+    def _each(self, fn) -> List[Any]:
+        return list(self._pool.map(fn, self.scales))
+
     def store(self, key: str, vector):
-        for mem in self.scales:
-            mem.store(key, vector)
+        self.store_many([key], np.asarray(vector)[None])
 
-    def load(self, key: str):
+    def store_many(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self._each(lambda mem: mem.store_many(keys, vectors))
+
+    def _blend(self, parts: List[np.ndarray]) -> np.ndarray:
         # Blend reconstructions from coarse to fine
-        recon = None
-        for i, mem in enumerate(self.scales):
-            part = mem.load(key)
-            if recon is None:
-                recon = part
-            else:
-                alpha = (i + 1) / len(self.scales)
-                recon = (1.0 - alpha) * recon + alpha * part
-        return recon if recon is not None else np.zeros(self.sponge_size, dtype=np.float32)
+        recon = parts[0]
+        for i, part in enumerate(parts[1:], start=1):
+            alpha = (i + 1) / len(parts)
+            recon = (1.0 - alpha) * recon + alpha * part
+        return recon
+
+    def load(self, key: str):
+        return self.load_many([key])[0]
+
+    def load_many(self, keys):
+        out = np.zeros((len(keys),) + tuple(self.sponge_size), dtype=np.float32)
+        block_sets = self.primary.key_blocks(keys)
+        distinct = list(dict.fromkeys(b for b in block_sets if b is not None))
+        if not distinct:
+            return out
+        # Every store entangles all blocks, so other scales average all of theirs
+        parts = self._each(lambda mem: mem.average_blocks(distinct if mem is self.primary else [None] * len(distinct)))
+        recon = self._blend(parts)
+        # The blend is convex, so the per-scale 0.99/0.01 global correction applies once to the result
+        correction = self.primary.global_correction()
+        if correction is not None:
+            recon = 0.99 * recon + 0.01 * correction
+        slot = {blocks: i for i, blocks in enumerate(distinct)}
+        for i, blocks in enumerate(block_sets):
+            if blocks is not None:
+                out[i] = recon[slot[blocks]]
+        return out
 
     def distance_to_nearest(self, state_vector) -> float:
-        # Take min distance across scales
-        return min(mem.distance_to_nearest(state_vector) for mem in self.scales)
+        # Scales share one signature space, so the primary answers for all
+        return self.primary.distance_to_nearest(state_vector)
+
+    def distance_to_nearest_batch(self, state_vectors):
+        return self.primary.distance_to_nearest_batch(state_vectors)
+
+    def flush(self) -> None:
+        self._each(lambda mem: mem.flush())
+
+    def stop(self) -> None:
+        self._each(lambda mem: mem.stop())
+        self._pool.shutdown(wait=True)
+
+
+def _adopt_root_state(base: str, scale_dir: str, sponge_size, block_size) -> None:
+    """First start after the per-scale split: move the root index and signatures to the primary scale.
+
+    Every old scale wrote its block set to the shared index, so entries are
+    rewritten to the primary's blocks. Root block files mixed all block sizes
+    and cannot be split back into scales; they are left in place, unused.
+    """
+    if os.path.exists(scale_dir) or not os.path.isdir(base):
+        return
+    names = sorted(os.listdir(base))
+    moved = [n for n in names if n.startswith(_ROOT_STATE_PREFIXES)]
+    if moved:
+        os.makedirs(scale_dir)
+        for name in moved:
+            os.replace(os.path.join(base, name), os.path.join(scale_dir, name))
+        index = AppendOnlyIndex(os.path.join(scale_dir, "index.json"), os.path.join(scale_dir, "index.log"))
+        blocks = list(SpongeTopology(sponge_size, block_size).iter_blocks())
+        index.set_many([(key, dict(meta, blocks=blocks)) for key, meta in index.items()])
+        index.compact()
+        index.close()
+        logger.info(f"Moved {len(index)} keys of shared sponge state from {base} to primary scale {scale_dir}")
+    abandoned = [n for n in names if n.startswith(_ROOT_BLOCK_STATE)]
+    if abandoned:
+        logger.warning(f"Sponge blocks in {base} ({', '.join(abandoned)}) mix every scale's block size and are not used; "
+                       f"each scale starts with empty blocks. They can be deleted.")
 
 
 def create_multiscale(base_config: Dict[str, Any]) -> MultiScaleMemory:
     mc = base_config.copy()
     memcfg = mc.get('memory', {}).copy()
-    # Generate 3 scales: coarse, mid, fine
+    base = mc.get('filepaths', {}).get('memory_base', 'data/sponge')
+    # Generate 3 scales: coarse, mid, fine; each keeps its blocks in its own directory
     grids = [(13, 13, 13), (9, 9, 9), (7, 7, 7)]
     configs = []
     for bs in grids:
         cfg = base_config.copy()
-        m = cfg.get('memory', {}).copy()
+        m = memcfg.copy()
         m['block_size'] = list(bs)
         cfg['memory'] = m
+        fp = dict(cfg.get('filepaths', {}))
+        fp['memory_base'] = os.path.join(base, f"scale_{bs[0]}x{bs[1]}x{bs[2]}")
+        cfg['filepaths'] = fp
+        if not configs:
+            _adopt_root_state(base, fp['memory_base'], fp.get('sponge_size', [27, 27, 27]), bs)
         configs.append(cfg)
-    return MultiScaleMemory(configs)
\ No newline at end of file
+    return MultiScaleMemory(configs, workers=int(memcfg.get('multiscale_workers', 0)) or None)
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Memoized novelty distances.
+
+``distance_to_nearest`` is asked about the same vector several times in a
+row (AutoMemory routing, curiosity reward in the explorer and again in the
+learner). NoveltyCache is one bounded LRU shared by any number of
+CachedNoveltyMemory wrappers; each wrapper has its own scope and bumps its
+epoch on every store, so only results computed against the current
+contents are ever served.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+
+class NoveltyCache:
+    def __init__(self, capacity: int = 4096, metrics: Optional[Any] = None):
+        self.capacity = int(capacity)
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[int, bytes], Tuple[int, float]]" = OrderedDict()
+        self._epochs: List[int] = []
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(vector: np.ndarray) -> bytes:
+        arr = np.ascontiguousarray(vector, dtype=np.float32)
+        return hashlib.blake2b(arr.tobytes(), digest_size=16).digest()
+
+    def new_scope(self) -> int:
+        with self._lock:
+            self._epochs.append(0)
+            return len(self._epochs) - 1
+
+    def epoch(self, scope: int) -> int:
+        return self._epochs[scope]
+
+    def invalidate(self, scope: int) -> None:
+        with self._lock:
+            self._epochs[scope] += 1
+
+    def get(self, scope: int, digest: bytes) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get((scope, digest))
+            if entry is not None and entry[0] == self._epochs[scope]:
+                self._entries.move_to_end((scope, digest))
+                self.hits += 1
+                value = entry[1]
+            else:
+                self.misses += 1
+                value = None
+        self._report(value is not None)
+        return value
+
+    def put(self, scope: int, digest: bytes, value: float, epoch: int) -> None:
+        """Remember ``value`` unless a store happened since ``epoch`` was read."""
+        with self._lock:
+            if epoch != self._epochs[scope] or self.capacity <= 0:
+                return
+            self._entries[(scope, digest)] = (epoch, float(value))
+            self._entries.move_to_end((scope, digest))
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _report(self, hit: bool) -> None:
+        if self.metrics is None:
+            return
+        self.metrics.inc('novelty_cache_hits' if hit else 'novelty_cache_misses', 1)
+        self.metrics.set('novelty_cache_hit_rate', self.hit_rate())
+
+
+class CachedNoveltyMemory:
+    """Memory wrapper that answers repeated novelty queries from a shared NoveltyCache."""
+
+    def __init__(self, backend: Any, cache: NoveltyCache):
+        self.backend = backend
+        self.cache = cache
+        self._scope = cache.new_scope()
+
+    @property
+    def sponge_size(self) -> Tuple[int, int, int]:
+        return self.backend.sponge_size
+
+    def store(self, key: str, vector):
+        try:
+            self.backend.store(key, vector)
+        finally:
+            self.cache.invalidate(self._scope)
+
+    def store_many(self, keys, vectors):
+        try:
+            self.backend.store_many(keys, vectors)
+        finally:
+            self.cache.invalidate(self._scope)
+
+    def delete_many(self, keys):
+        try:
+            self.backend.delete_many(keys)
+        finally:
+            self.cache.invalidate(self._scope)
+
+    def keys(self):
+        return self.backend.keys()
+
+    def load(self, key: str):
+        return self.backend.load(key)
+
+    def load_many(self, keys):
+        return self.backend.load_many(keys)
+
+    def distance_to_nearest(self, state_vector) -> float:
+        digest = self.cache.digest(state_vector)
+        value = self.cache.get(self._scope, digest)
+        if value is not None:
+            return value
+        epoch = self.cache.epoch(self._scope)
+        value = float(self.backend.distance_to_nearest(state_vector))
+        self.cache.put(self._scope, digest, value, epoch)
+        return value
+
+    def distance_to_nearest_batch(self, state_vectors):
+        vectors = np.asarray(state_vectors)
+        digests = [self.cache.digest(v) for v in vectors]
+        out = np.zeros((len(digests),), dtype=np.float64)
+        missing = []
+        for i, digest in enumerate(digests):
+            value = self.cache.get(self._scope, digest)
+            if value is None:
+                missing.append(i)
+            else:
+                out[i] = value
+        if missing:
+            epoch = self.cache.epoch(self._scope)
+            values = np.asarray(self.backend.distance_to_nearest_batch(vectors[missing]), dtype=np.float64)
+            out[missing] = values
+            for i, value in zip(missing, values):
+                self.cache.put(self._scope, digests[i], value, epoch)
+        return out
+
+    def stop(self) -> None:
+        stop = getattr(self.backend, 'stop', None)
+        if stop is not None:
+            stop()
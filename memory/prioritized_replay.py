@@ -1,43 +1,100 @@
 import threading
-import random
-from typing import List, Tuple
+from typing import Any, Dict, Optional, Tuple
 import numpy as np
 
+from .ring_buffer import RingStorage
+from .sum_tree import MinTree, SumTree
+
 
 class PrioritizedReplayBuffer:
-    def __init__(self, capacity: int = 10000, alpha: float = 0.6, epsilon: float = 1e-3):
+    """Proportional prioritized replay on a sum tree.
+
+    Slot i is drawn with probability p_i^alpha / sum_j p_j^alpha. The sum
+    tree gives O(log n) draws and priority updates and the min tree the
+    largest importance-sampling weight, so nothing under the lock is
+    O(capacity). Vectors live in a preallocated (capacity, dim) ring, so a
+    batch is one gather rather than a stack of per-sample arrays.
+    """
+
+    def __init__(self, capacity: int = 10000, alpha: float = 0.6, epsilon: float = 1e-3, dim: Optional[int] = None):
         self.capacity = int(capacity)
         self.alpha = float(alpha)
         self.epsilon = float(epsilon)
-        self.storage: List[np.ndarray] = []
-        self.priorities: List[float] = []
+        self.storage = RingStorage(self.capacity, dim)
         self.lock = threading.Lock()
-        self._idx = 0
+        self._sum = SumTree(self.capacity)
+        self._min = MinTree(self.capacity)
+        self._rng = np.random.default_rng()
+
+    def _scaled(self, priorities) -> np.ndarray:
+        return (np.abs(np.asarray(priorities, dtype=np.float64)) + self.epsilon) ** self.alpha
+
+    def _prioritize_locked(self, slots, scaled) -> None:
+        """Point the trees at the scaled priorities of ``slots`` (one slot or an index array)."""
+        if np.ndim(slots) == 0:
+            self._sum.set(slots, scaled)
+            self._min.set(slots, scaled)
+        else:
+            self._sum.update(slots, scaled)
+            self._min.update(slots, scaled)
 
     def add(self, vector: np.ndarray, priority: float) -> None:
-        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
-        p = float(priority) + self.epsilon
+        p = float(self._scaled(priority))
+        with self.lock:
+            self._prioritize_locked(self.storage.append(vector), p)
+
+    def add_many(self, vectors: np.ndarray, priorities) -> None:
+        """Append a (B, dim) batch; rows and trees are each written once for the whole batch."""
+        # Only the last ``capacity`` rows survive the ring
+        p = self._scaled(priorities).reshape(-1)[-self.capacity:]
         with self.lock:
-            if len(self.storage) < self.capacity:
-                self.storage.append(vector)
-                self.priorities.append(p)
-            else:
-                self.storage[self._idx] = vector
-                self.priorities[self._idx] = p
-                self._idx = (self._idx + 1) % self.capacity
+            self._prioritize_locked(self.storage.extend(vectors), p)
 
     def size(self) -> int:
         with self.lock:
             return len(self.storage)
 
-    def sample(self, batch_size: int) -> np.ndarray:
+    def _draw_locked(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Stratified draw of ``batch_size`` filled slots and their scaled priorities."""
+        total = self._sum.total()
+        prefix = (np.arange(batch_size) + self._rng.random(batch_size)) * (total / batch_size)
+        idxs = np.minimum(self._sum.find(np.minimum(prefix, np.nextafter(total, 0))), len(self.storage) - 1)
+        return idxs, self._sum.leaves(idxs)
+
+    def sample_batch(self, batch_size: int, beta: float = 0.4, out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Stratified draw of (batch, slot indices, importance-sampling weights).
+
+        The priority mass is cut into ``batch_size`` equal segments with one
+        draw per segment. Weights are (n * P(i))^-beta scaled so the largest
+        possible weight is 1; pass the indices to ``update_priorities``.
+        With ``out`` the rows are gathered into ``out[:batch]`` without a copy.
+        """
         with self.lock:
             n = len(self.storage)
             if n == 0:
-                return np.empty((0,), dtype=np.float32)
-            batch_size = min(batch_size, n)
-            probs = np.asarray(self.priorities, dtype=np.float64) ** self.alpha
-            probs = probs / probs.sum()
-            idxs = np.random.choice(n, size=batch_size, p=probs, replace=False)
-            batch = [self.storage[i] for i in idxs]
-        return np.stack(batch, axis=0)
\ No newline at end of file
+                return np.empty((0,), dtype=np.float32), np.empty((0,), dtype=np.int64), np.empty((0,), dtype=np.float32)
+            idxs, scaled = self._draw_locked(min(int(batch_size), n))
+            total = self._sum.total()
+            probs = scaled / total
+            max_weight = (n * max(self._min.min(), 1e-12) / total) ** -beta
+            batch = self.storage.gather(idxs, out=out)
+        weights = ((n * np.maximum(probs, 1e-12 / total)) ** -beta / max_weight).astype(np.float32)
+        return batch, idxs, weights
+
+    def sample(self, batch_size: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.sample_batch(batch_size, out=out)[0]
+
+    def update_priorities(self, indices, priorities) -> None:
+        """Reprioritize sampled slots, e.g. with their training loss."""
+        idxs = np.asarray(indices, dtype=np.int64).reshape(-1)
+        p = self._scaled(priorities).reshape(-1)
+        with self.lock:
+            keep = idxs < len(self.storage)
+            self._prioritize_locked(idxs[keep], p[keep])
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Row-block usage plus the bytes held by the two priority trees."""
+        with self.lock:
+            report = self.storage.memory_report()
+        report["tree_bytes"] = sum(level.nbytes for tree in (self._sum, self._min) for level in tree.levels)
+        return report
\ No newline at end of file
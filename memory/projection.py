@@ -0,0 +1,154 @@
+"""
+Holographic projections shared by every memory instance in the process.
+
+A dense projection is fully determined by (seed, shape, dtype), so the
+registry builds each one once, writes it to a read-only ``.npy`` under the
+cache directory and hands the same memory-mapped matrix to every caller.
+Startup cost and RSS then no longer scale with the number of sponges
+(multiscale, auto memory, chain nodes).
+
+``SRHTProjection`` is the structured alternative: a subsampled randomized
+Hadamard transform that stores only signs and row indices and runs in
+O(n log n) with an exact transpose.
+"""
+import os
+import math
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_REGISTRY: Dict[Tuple, object] = {}
+_LOCK = threading.Lock()
+# Rows drawn per chunk while generating, to bound the float64 temporary
+_GEN_ROWS = 64
+
+
+class DenseProjection:
+    """y = M x with M ~ N(0, 1/out_dim); ``adjoint`` applies M^T."""
+
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+        self.out_dim, self.in_dim = matrix.shape
+
+    def forward(self, flat: np.ndarray) -> np.ndarray:
+        return (self.matrix @ flat.astype(np.float32)).astype(np.float32)
+
+    def forward_many(self, flats: np.ndarray) -> np.ndarray:
+        return (flats.astype(np.float32) @ self.matrix.T).astype(np.float32)
+
+    def adjoint(self, latent: np.ndarray) -> np.ndarray:
+        return self.matrix.T @ latent
+
+
+def _fwht(a: np.ndarray) -> np.ndarray:
+    """In-place unnormalized Walsh-Hadamard transform along the last axis (length 2^m)."""
+    batch, n = a.shape
+    h = 1
+    while h < n:
+        pairs = a.reshape(batch, n // (2 * h), 2, h)
+        x = pairs[:, :, 0, :]
+        y = pairs[:, :, 1, :]
+        x += y       # x + y
+        y *= -2.0
+        y += x       # (x + y) - 2y = x - y
+        h *= 2
+    return a
+
+
+class SRHTProjection:
+    """y = sqrt(N/k) * R (H/sqrt(N)) D x, zero-padded to N = 2^ceil(log2 n).
+
+    D flips signs, H is the Walsh-Hadamard transform and R keeps k of the N
+    coefficients. Norms are preserved in expectation like the dense
+    N(0, 1/k) matrix, and ``adjoint`` is the exact transpose.
+    """
+
+    def __init__(self, seed: int, shape: Tuple[int, int]):
+        self.out_dim, self.in_dim = int(shape[0]), int(shape[1])
+        self.padded = 1 << max(0, (self.in_dim - 1).bit_length())
+        if self.out_dim > self.padded:
+            raise ValueError(f"SRHT cannot produce {self.out_dim} outputs from {self.padded} coefficients")
+        rng = np.random.default_rng(seed)
+        self.signs = rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=self.in_dim)
+        self.rows = np.sort(rng.choice(self.padded, size=self.out_dim, replace=False))
+        self.scale = np.float32(1.0 / math.sqrt(self.out_dim))  # sqrt(N/k) / sqrt(N)
+
+    def forward_many(self, flats: np.ndarray) -> np.ndarray:
+        flats = np.asarray(flats, dtype=np.float32).reshape(-1, self.in_dim)
+        buf = np.zeros((flats.shape[0], self.padded), dtype=np.float32)
+        np.multiply(flats, self.signs, out=buf[:, : self.in_dim])
+        return _fwht(buf)[:, self.rows] * self.scale
+
+    def forward(self, flat: np.ndarray) -> np.ndarray:
+        return self.forward_many(flat)[0]
+
+    def adjoint(self, latent: np.ndarray) -> np.ndarray:
+        buf = np.zeros((1, self.padded), dtype=np.float32)
+        buf[0, self.rows] = np.asarray(latent, dtype=np.float32) * self.scale
+        return _fwht(buf)[0, : self.in_dim] * self.signs
+
+
+def _generate(seed: int, shape: Tuple[int, int], dtype: np.dtype, out: np.ndarray) -> np.ndarray:
+    # Row chunks from one generator reproduce a single rng.normal(size=shape) draw exactly
+    rng = np.random.default_rng(seed)
+    scale = 1.0 / math.sqrt(shape[0])
+    for start in range(0, shape[0], _GEN_ROWS):
+        stop = min(shape[0], start + _GEN_ROWS)
+        out[start:stop] = rng.normal(0, scale, size=(stop - start, shape[1])).astype(dtype)
+    return out
+
+
+def _load_or_build(seed: int, shape: Tuple[int, int], dtype: np.dtype, cache_dir: Optional[str]) -> np.ndarray:
+    if cache_dir is None:
+        return _generate(seed, shape, dtype, np.empty(shape, dtype=dtype))
+    path = os.path.join(cache_dir, f"holo_{seed}_{shape[0]}x{shape[1]}_{dtype.name}.npy")
+    if os.path.isfile(path):
+        try:
+            mat = np.load(path, mmap_mode='r')
+            if mat.shape == shape and mat.dtype == dtype:
+                return mat
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable projection cache {path}: {e}")
+    os.makedirs(cache_dir, exist_ok=True)
+    # Unique temp name so concurrent processes never see a half-written file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    out = np.lib.format.open_memmap(tmp, mode='w+', dtype=dtype, shape=shape)
+    _generate(seed, shape, dtype, out)
+    out.flush()
+    del out
+    os.replace(tmp, path)
+    return np.load(path, mmap_mode='r')
+
+
+def dense_projection(seed: int, shape: Tuple[int, int], dtype=np.float32, cache_dir: Optional[str] = None) -> DenseProjection:
+    """Shared projection for (seed, shape, dtype); read-only and memory-mapped when cached on disk."""
+    shape = (int(shape[0]), int(shape[1]))
+    dtype = np.dtype(dtype)
+    key = (int(seed), shape, dtype.str)
+    with _LOCK:
+        proj = _REGISTRY.get(key)
+        if proj is None:
+            matrix = _load_or_build(int(seed), shape, dtype, cache_dir)
+            matrix.flags.writeable = False
+            proj = DenseProjection(matrix)
+            _REGISTRY[key] = proj
+        return proj
+
+
+def create_projection(kind: str, seed: int, shape: Tuple[int, int], cache_dir: Optional[str] = None):
+    """Projection selected by ``memory.projection`` ("dense" or "srht")."""
+    kind = str(kind or "dense").lower()
+    if kind == "dense":
+        return dense_projection(seed, shape, cache_dir=cache_dir)
+    if kind != "srht":
+        raise ValueError(f"Unknown holographic projection: {kind}")
+    key = ("srht", int(seed), (int(shape[0]), int(shape[1])))
+    with _LOCK:
+        proj = _REGISTRY.get(key)
+        if proj is None:
+            proj = _REGISTRY[key] = SRHTProjection(seed, shape)
+        return proj
@@ -0,0 +1,177 @@
+"""
+Reduced-precision storage helpers shared by the memory backends.
+
+"float16" halves storage; "int8" keeps one affine (scale, zero point) pair
+per row or per block, so x ~= (code - zero) * scale with error <= scale/2.
+Everything is dequantized to float32 before it leaves a backend.
+"""
+import os
+from typing import Tuple
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+PRECISION_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+# File suffix used for memory-mapped matrices of each precision
+PRECISION_SUFFIXES = {"float32": "f32", "float16": "f16", "int8": "i8"}
+
+
+def check_precision(precision: str) -> str:
+    precision = str(precision or "float32").lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown storage precision: {precision}")
+    return precision
+
+
+def affine_params(lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Scale and zero point mapping [lo, hi] onto the int8 range."""
+    lo = np.asarray(lo, dtype=np.float32)
+    hi = np.asarray(hi, dtype=np.float32)
+    scale = (hi - lo) / 255.0
+    scale = np.where(scale > 0, scale, 1.0).astype(np.float32)
+    zero = (-128.0 - np.round(lo / scale)).astype(np.float32)
+    return scale, zero
+
+
+def quantize_rows(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """int8 codes plus per-row (scale, zero) for a (n, d) float array."""
+    rows = np.asarray(rows, dtype=np.float32)
+    scale, zero = affine_params(rows.min(axis=1), rows.max(axis=1))
+    codes = np.clip(np.round(rows / scale[:, None]) + zero[:, None], -128, 127).astype(np.int8)
+    return codes, scale, zero
+
+
+def dequantize_rows(codes: np.ndarray, scale: np.ndarray, zero: np.ndarray) -> np.ndarray:
+    return (codes.astype(np.float32) - zero[..., None]) * scale[..., None]
+
+
+def _q8_path(path: str) -> str:
+    return path[:-4] + ".q8.npz" if path.endswith(".npy") else path + ".q8.npz"
+
+
+def save_array(path: str, arr: np.ndarray, precision: str = "float32") -> None:
+    """Save ``arr`` at ``precision``; int8 arrays go to a sibling ``.q8.npz``."""
+    if precision == "int8":
+        arr = np.asarray(arr, dtype=np.float32)
+        codes, scale, zero = quantize_rows(arr.reshape(1, -1))
+        np.savez(_q8_path(path), codes=codes.reshape(arr.shape), scale=scale, zero=zero)
+    else:
+        np.save(path, np.asarray(arr, dtype=PRECISION_DTYPES[precision]))
+
+
+def load_array(path: str, precision: str = "float32") -> np.ndarray:
+    """Load a float32 array saved by ``save_array`` in either format.
+
+    The file matching ``precision`` wins, so switching modes never reads a
+    stale copy while the current one exists. Raises FileNotFoundError.
+    """
+    q8 = _q8_path(path)
+    for candidate in ((q8, path) if precision == "int8" else (path, q8)):
+        if not os.path.isfile(candidate):
+            continue
+        if candidate == q8:
+            with np.load(candidate) as data:
+                codes = data["codes"]
+                return dequantize_rows(codes.reshape(1, -1), data["scale"], data["zero"]).reshape(codes.shape)
+        return np.load(candidate).astype(np.float32, copy=False)
+    raise FileNotFoundError(path)
+
+
+class BlockQuantizedTensor:
+    """int8 memory-mapped 3-D tensor with one (scale, zero) pair per block.
+
+    Reads take any numpy index and come back as dequantized float32. Writes
+    take ``...`` or integers and step-1 slices per axis; every block the
+    write touches is requantized, so untouched cells of those blocks may
+    shift by up to half a quantization step.
+    """
+
+    def __init__(self, path: str, shape: Tuple[int, int, int], block_size: Tuple[int, int, int], mode: str = "r+"):
+        self.shape = tuple(int(s) for s in shape)
+        self.block_size = tuple(int(b) for b in block_size)
+        self.grid = tuple(-(-s // b) for s, b in zip(self.shape, self.block_size))
+        self.codes = np.memmap(path, dtype=np.int8, mode=mode, shape=self.shape)
+        self.params = np.memmap(path + ".q", dtype=np.float32, mode=mode, shape=self.grid + (2,))
+        if mode == "w+":
+            self.params[..., 0] = 1.0
+        self._expand_params()
+
+    @staticmethod
+    def nbytes(shape: Tuple[int, int, int], block_size: Tuple[int, int, int]) -> Tuple[int, int]:
+        grid = tuple(-(-s // b) for s, b in zip(shape, block_size))
+        return int(np.prod(shape)), int(np.prod(grid)) * 2 * 4
+
+    def _expand(self, per_block: np.ndarray) -> np.ndarray:
+        out = per_block
+        for axis, b in enumerate(self.block_size):
+            out = np.repeat(out, b, axis=axis)
+        return out[: self.shape[0], : self.shape[1], : self.shape[2]]
+
+    def _expand_params(self) -> None:
+        self._scale = self._expand(np.asarray(self.params[..., 0]))
+        self._zero = self._expand(np.asarray(self.params[..., 1]))
+
+    def __getitem__(self, idx) -> np.ndarray:
+        return (self.codes[idx].astype(np.float32) - self._zero[idx]) * self._scale[idx]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        out = self[...]
+        return out if dtype is None else out.astype(dtype)
+
+    def _write_region(self, idx) -> Tuple[Tuple[slice, ...], tuple]:
+        """Block-aligned box covering a basic index, plus the index relative to that box."""
+        if not isinstance(idx, tuple):
+            idx = (idx,)
+        ellipses = [i for i, k in enumerate(idx) if k is Ellipsis]
+        if len(ellipses) > 1:
+            raise IndexError("an index can only have a single ellipsis")
+        if ellipses:
+            at = ellipses[0]
+            idx = idx[:at] + (slice(None),) * (3 - len(idx) + 1) + idx[at + 1:]
+        if len(idx) > 3:
+            raise IndexError(f"too many indices for a 3-D tensor: {len(idx)}")
+        idx = idx + (slice(None),) * (3 - len(idx))
+        box, rel = [], []
+        for key, n, b in zip(idx, self.shape, self.block_size):
+            if isinstance(key, (int, np.integer)):
+                i = int(key) + n if key < 0 else int(key)
+                if not 0 <= i < n:
+                    raise IndexError(f"index {key} is out of bounds for axis with size {n}")
+                start, stop = i, i + 1
+            elif isinstance(key, slice):
+                start, stop, step = key.indices(n)
+                if step != 1:
+                    raise TypeError("BlockQuantizedTensor writes take step-1 slices only")
+                stop = max(start, stop)
+            else:
+                raise TypeError(f"BlockQuantizedTensor writes take '...', integers or step-1 slices, not {type(key).__name__}")
+            lo = start // b * b
+            hi = min(-(-stop // b) * b, n)
+            box.append(slice(lo, hi))
+            rel.append(start - lo if isinstance(key, (int, np.integer)) else slice(start - lo, stop - lo))
+        return tuple(box), tuple(rel)
+
+    def __setitem__(self, idx, value: np.ndarray) -> None:
+        """Write float values and requantize the blocks the index touches."""
+        box, rel = self._write_region(idx)
+        if any(s.start == s.stop for s in box):
+            return
+        region = np.asarray(self[box], dtype=np.float32)
+        region[rel] = value
+        shape = region.shape
+        grid = tuple(-(-s // b) for s, b in zip(shape, self.block_size))
+        pad = [(0, g * b - s) for g, b, s in zip(grid, self.block_size, shape)]
+        gx, gy, gz = grid
+        bx, by, bz = self.block_size
+        blocks = np.pad(region, pad, mode='edge').reshape(gx, bx, gy, by, gz, bz)
+        scale, zero = affine_params(blocks.min(axis=(1, 3, 5)), blocks.max(axis=(1, 3, 5)))
+        cells = tuple(slice(s.start // b, s.start // b + g) for s, b, g in zip(box, self.block_size, grid))
+        self.params[cells + (0,)] = scale
+        self.params[cells + (1,)] = zero
+        self._scale[box] = self._expand(scale)[: shape[0], : shape[1], : shape[2]]
+        self._zero[box] = self._expand(zero)[: shape[0], : shape[1], : shape[2]]
+        self.codes[box] = np.clip(np.round(region / self._scale[box]) + self._zero[box], -128, 127)
+
+    def flush(self) -> None:
+        self.codes.flush()
+        self.params.flush()
@@ -1,35 +1,48 @@
 import threading
-import random
-from typing import List, Tuple
+from typing import Any, Dict, Optional
 import numpy as np
 
+from .ring_buffer import RingStorage
+
 
 class ReplayBuffer:
-    def __init__(self, capacity: int = 10000):
+    """Uniform replay over a preallocated (capacity, dim) ring.
+
+    ``dim`` may be left unset; the block is then allocated on the first add.
+    """
+
+    def __init__(self, capacity: int = 10000, dim: Optional[int] = None):
         self.capacity = int(capacity)
-        self.storage: List[np.ndarray] = []
+        self.storage = RingStorage(self.capacity, dim)
         self.lock = threading.Lock()
-        self._idx = 0
+        self._rng = np.random.default_rng()
 
     def add(self, vector: np.ndarray) -> None:
-        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
         with self.lock:
-            if len(self.storage) < self.capacity:
-                self.storage.append(vector)
-            else:
-                self.storage[self._idx] = vector
-                self._idx = (self._idx + 1) % self.capacity
+            self.storage.append(vector)
+
+    def add_many(self, vectors: np.ndarray) -> None:
+        """Append a (B, dim) batch with one row scatter."""
+        with self.lock:
+            self.storage.extend(vectors)
 
     def size(self) -> int:
         with self.lock:
             return len(self.storage)
 
-    def sample(self, batch_size: int) -> np.ndarray:
-        batch_size = min(batch_size, self.size())
+    def sample(self, batch_size: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Uniform draw without replacement as a (batch, dim) array.
+
+        With ``out`` (at least ``batch_size`` rows of float32) the rows are
+        gathered into ``out[:batch]`` and that view is returned.
+        """
         with self.lock:
+            batch_size = min(int(batch_size), len(self.storage))
             if batch_size <= 0:
                 return np.empty((0,), dtype=np.float32)
-            idxs = random.sample(range(len(self.storage)), k=batch_size)
-            batch = [self.storage[i] for i in idxs]
-        # Stack into (batch, dim)
-        return np.stack(batch, axis=0)
\ No newline at end of file
+            idxs = self._rng.choice(len(self.storage), size=batch_size, replace=False)
+            return self.storage.gather(idxs, out=out)
+
+    def memory_report(self) -> Dict[str, Any]:
+        with self.lock:
+            return self.storage.memory_report()
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Retention policies for stored memories.
+
+A backend with a RetentionPolicy records a timestamp and a novelty score for
+each stored key (the key's distance to its nearest neighbour at store time)
+and compacts itself online, inside the store that crossed a limit:
+
+- keys older than ``ttl`` seconds are evicted,
+- then, above ``max_keys`` or ``max_bytes``, keys are evicted lowest novelty
+  first (oldest first among ties) down to ``low_water`` of the limit, so the
+  next compaction is many stores away.
+
+Keys stored before retention was enabled have no score and count as zero
+novelty. Evictions are reported to ``metrics`` as ``retention_evicted``,
+``retention_compactions`` and ``retention_compaction_ms``.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class RetentionPolicy:
+    def __init__(self, max_keys: int = 0, max_bytes: int = 0, ttl: float = 0.0, low_water: float = 0.9, metrics: Optional[Any] = None):
+        if not 0.0 < float(low_water) <= 1.0:
+            raise ValueError("low_water must be in (0, 1]")
+        self.max_keys = max(0, int(max_keys))
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl = max(0.0, float(ttl))
+        self.low_water = float(low_water)
+        self.metrics = metrics
+
+    @classmethod
+    def from_config(cls, memcfg: Dict[str, Any]) -> Optional["RetentionPolicy"]:
+        """Policy from ``memory.retention_*`` settings, or None when nothing is bounded."""
+        policy = cls(
+            max_keys=int(memcfg.get("retention_max_keys", 0)),
+            max_bytes=int(memcfg.get("retention_max_bytes", 0)),
+            ttl=float(memcfg.get("retention_ttl", 0.0)),
+            low_water=float(memcfg.get("retention_low_water", 0.9)),
+        )
+        return policy if policy.enabled else None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_keys or self.max_bytes or self.ttl)
+
+    @property
+    def scores_novelty(self) -> bool:
+        """Only capacity limits rank by novelty; a TTL alone needs timestamps."""
+        return bool(self.max_keys or self.max_bytes)
+
+    @property
+    def sweep_interval(self) -> float:
+        return max(1.0, self.ttl / 10.0)
+
+    def due(self, n_keys: int, entry_bytes: int, last_sweep: float, now: float) -> bool:
+        """Whether a store that left ``n_keys`` entries should compact."""
+        if self.max_keys and n_keys > self.max_keys:
+            return True
+        if self.max_bytes and n_keys * entry_bytes > self.max_bytes:
+            return True
+        return bool(self.ttl) and now - last_sweep >= self.sweep_interval
+
+    def select(self, keys: List[str], timestamps: np.ndarray, novelty: np.ndarray, entry_bytes: int, now: float) -> List[str]:
+        """Keys to evict, expired ones first, then the least novel."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        novelty = np.nan_to_num(np.asarray(novelty, dtype=np.float64), nan=0.0)
+        evict = np.zeros((len(keys),), dtype=bool)
+        if self.ttl:
+            evict |= now - timestamps > self.ttl
+        keep = len(keys) - int(evict.sum())
+        target = keep
+        if self.max_keys and keep > self.max_keys:
+            target = min(target, int(self.max_keys * self.low_water))
+        if self.max_bytes and keep * entry_bytes > self.max_bytes:
+            target = min(target, int(self.max_bytes * self.low_water) // max(1, entry_bytes))
+        if keep > target:
+            live = np.flatnonzero(~evict)
+            order = np.lexsort((timestamps[live], novelty[live]))
+            evict[live[order[: keep - target]]] = True
+        return [keys[i] for i in np.flatnonzero(evict)]
+
+    def report(self, evicted: int, seconds: float) -> None:
+        if self.metrics is None:
+            return
+        self.metrics.inc('retention_compactions', 1)
+        self.metrics.inc('retention_evicted', evicted)
+        self.metrics.set('retention_compaction_ms', 1e3 * seconds)
@@ -0,0 +1,77 @@
+"""
+Contiguous ring storage for replay buffers.
+
+All rows live in one (capacity, dim) float32 array allocated up front (or
+on the first write when ``dim`` is not known yet), so adding a sample is a
+single row write and a batch is one gather, optionally into a caller's
+``out`` buffer.
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class RingStorage:
+    def __init__(self, capacity: int, dim: Optional[int] = None):
+        self.capacity = max(1, int(capacity))
+        self.dim: Optional[int] = None
+        self.data: Optional[np.ndarray] = None
+        self._size = 0
+        self._head = 0
+        if dim is not None:
+            self._allocate(int(dim))
+
+    def _allocate(self, dim: int) -> None:
+        self.dim = dim
+        self.data = np.zeros((self.capacity, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, vector: np.ndarray) -> int:
+        """Write one row at the head (overwriting the oldest once full); returns its slot."""
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.data is None:
+            self._allocate(vector.size)
+        slot = self._head
+        self.data[slot] = vector
+        self._head = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return slot
+
+    def extend(self, vectors: np.ndarray) -> np.ndarray:
+        """Write a (B, dim) batch in ring order with one scatter; returns the slots.
+
+        Only the last ``capacity`` rows of an oversized batch are kept.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        if self.data is None:
+            self._allocate(vectors.shape[1])
+        vectors = vectors[-self.capacity:]
+        slots = (self._head + np.arange(vectors.shape[0])) % self.capacity
+        self.data[slots] = vectors
+        self._head = (self._head + vectors.shape[0]) % self.capacity
+        self._size = min(self._size + vectors.shape[0], self.capacity)
+        return slots
+
+    def gather(self, indices, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows at ``indices`` as a new (B, dim) array, or written into ``out[:B]``."""
+        indices = np.asarray(indices, dtype=np.int64)
+        if out is None:
+            return self.data[indices]
+        return np.take(self.data, indices, axis=0, out=out[: len(indices)], mode='clip')
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self.data is None else int(self.data.nbytes)
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Allocated vs. filled bytes of the row block."""
+        row = 0 if self.dim is None else self.dim * 4
+        return {
+            "capacity": self.capacity,
+            "dim": self.dim,
+            "size": self._size,
+            "allocated_bytes": self.nbytes,
+            "used_bytes": self._size * row,
+        }
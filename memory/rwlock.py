@@ -0,0 +1,79 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class RWLock:
+    """Phase-fair readers-writer lock (not reentrant).
+
+    Any number of readers may hold it together. A waiting writer blocks new
+    readers, and readers that queued behind a writer go next once it
+    releases, so neither side starves under a steady stream of the other.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_readers = 0
+        self._waiting_writers = 0
+        self._reader_turn = False
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            self._waiting_readers += 1
+            while self._writer or (self._waiting_writers and not self._reader_turn):
+                self._cond.wait()
+            self._waiting_readers -= 1
+            if self._waiting_readers == 0:
+                self._reader_turn = False
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers or self._reader_turn:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._reader_turn = self._waiting_readers > 0
+                self._cond.notify_all()
+
+
+class ExclusiveLock:
+    """Same interface as RWLock, but readers exclude each other too."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def read(self) -> threading.Lock:
+        return self._lock
+
+    def write(self) -> threading.Lock:
+        return self._lock
+
+
+CONCURRENCY_MODES = ("lock", "rw")
+
+
+def make_lock(mode: str = "lock"):
+    mode = str(mode or "lock").lower()
+    if mode == "rw":
+        return RWLock()
+    if mode != "lock":
+        raise ValueError(f"Unknown concurrency mode: {mode}")
+    return ExclusiveLock()
@@ -0,0 +1,169 @@
+"""
+Replay sharded across independently locked buffers.
+
+Each shard is a full prioritized buffer with its own lock, ring and trees,
+so producers adding to different shards never wait on each other. Inserts
+go round-robin, or by ``hash`` of a caller key. Without a key, ``hash``
+pins each producer thread to a shard handed out round-robin on its first
+add (thread idents are aligned addresses, so hashing them would put every
+thread on the same shard).
+
+Sampling stays stratified over the combined priority mass: the batch's
+segments are split between shards in proportion to their mass, each shard
+draws its share under its own lock, and importance weights are computed
+against the global total. Returned indices encode ``slot * shards + shard``
+for ``update_priorities``. Shard masses are read without locks, so a batch
+drawn while producers are adding reflects the totals of a moment earlier.
+A draw costs one tree search per shard it touches, so a few shards (about
+the number of producer threads) are enough.
+"""
+import os
+import itertools
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .memmap_replay import MemmapReplayBuffer
+from .prioritized_replay import PrioritizedReplayBuffer
+
+INSERTION_MODES = ("round_robin", "hash")
+
+
+class ShardedReplayBuffer:
+    def __init__(self, shards: List[PrioritizedReplayBuffer], insertion: str = "round_robin"):
+        if not shards:
+            raise ValueError("ShardedReplayBuffer needs at least one shard")
+        insertion = str(insertion).lower()
+        if insertion not in INSERTION_MODES:
+            raise ValueError(f"insertion must be one of {INSERTION_MODES}")
+        self.shards = list(shards)
+        self.insertion = insertion
+        self.capacity = sum(s.capacity for s in self.shards)
+        self._next = itertools.count()
+        self._thread_next = itertools.count()
+        self._local = threading.local()
+        self._rng = np.random.default_rng()
+
+    def _shard_for(self, key: Any = None) -> int:
+        if self.insertion == "hash":
+            if key is not None:
+                return hash(key) % len(self.shards)
+            shard = getattr(self._local, "shard", None)
+            if shard is None:
+                shard = self._local.shard = next(self._thread_next) % len(self.shards)
+            return shard
+        # next() on a count is atomic under the GIL, so no lock is needed here
+        return next(self._next) % len(self.shards)
+
+    def add(self, vector: np.ndarray, priority: float = 1.0, key: Any = None) -> None:
+        """Add to one shard; without priorities the buffer samples uniformly."""
+        self.shards[self._shard_for(key)].add(vector, priority)
+
+    def add_many(self, vectors: np.ndarray, priorities=None, keys: Optional[List[Any]] = None) -> None:
+        """Add a (B, dim) batch with one ``add_many`` per shard it lands on."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        priorities = np.ones((vectors.shape[0],)) if priorities is None else np.asarray(priorities, dtype=np.float64).reshape(-1)
+        n = len(self.shards)
+        if keys is not None:
+            owner = np.array([self._shard_for(k) for k in keys], dtype=np.int64)
+        elif self.insertion == "hash":
+            owner = np.full((vectors.shape[0],), self._shard_for(), dtype=np.int64)
+        else:
+            owner = (np.arange(vectors.shape[0]) + next(self._next)) % n
+        for shard in np.unique(owner).tolist():
+            sel = owner == shard
+            self.shards[shard].add_many(vectors[sel], priorities[sel])
+
+    def size(self) -> int:
+        return sum(s.size() for s in self.shards)
+
+    def sample_batch(self, batch_size: int, beta: float = 0.4, out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Stratified draw across shards: (batch, encoded indices, importance-sampling weights)."""
+        sizes = np.array([len(s.storage) for s in self.shards], dtype=np.int64)
+        masses = np.array([s._sum.total() if n else 0.0 for s, n in zip(self.shards, sizes)])
+        n_total = int(sizes.sum())
+        total = float(masses.sum())
+        if n_total == 0 or total <= 0:
+            return np.empty((0,), dtype=np.float32), np.empty((0,), dtype=np.int64), np.empty((0,), dtype=np.float32)
+        batch_size = min(int(batch_size), n_total)
+        prefix = (np.arange(batch_size) + self._rng.random(batch_size)) * (total / batch_size)
+        owner = np.minimum(np.searchsorted(np.cumsum(masses), prefix, side='right'), len(self.shards) - 1)
+        counts = np.bincount(owner, minlength=len(self.shards))
+        rows, idxs, scaled, mins = [], [], [], []
+        pos = 0
+        for shard_idx, (shard, k) in enumerate(zip(self.shards, counts.tolist())):
+            with shard.lock:
+                if len(shard.storage) == 0:
+                    continue
+                mins.append(shard._min.min())
+                if k == 0:
+                    continue
+                slots, p = shard._draw_locked(k)
+                rows.append(shard.storage.gather(slots, out=None if out is None else out[pos:]))
+            idxs.append(slots * len(self.shards) + shard_idx)
+            scaled.append(p)
+            pos += len(slots)
+        if not idxs:
+            # Every picked shard was emptied meanwhile
+            return np.empty((0,), dtype=np.float32), np.empty((0,), dtype=np.int64), np.empty((0,), dtype=np.float32)
+        idxs = np.concatenate(idxs)
+        probs = np.concatenate(scaled) / total
+        batch = out[:pos] if out is not None else np.concatenate(rows, axis=0)
+        max_weight = (n_total * max(min(mins), 1e-12) / total) ** -beta
+        weights = ((n_total * np.maximum(probs, 1e-12 / total)) ** -beta / max_weight).astype(np.float32)
+        return batch, idxs, weights
+
+    def sample(self, batch_size: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.sample_batch(batch_size, out=out)[0]
+
+    def update_priorities(self, indices, priorities) -> None:
+        """Reprioritize indices returned by ``sample_batch``, one call per shard."""
+        idxs = np.asarray(indices, dtype=np.int64).reshape(-1)
+        p = np.asarray(priorities, dtype=np.float64).reshape(-1)
+        owner = idxs % len(self.shards)
+        for shard in np.unique(owner).tolist():
+            sel = owner == shard
+            self.shards[shard].update_priorities(idxs[sel] // len(self.shards), p[sel])
+
+    def memory_report(self) -> Dict[str, Any]:
+        reports = [s.memory_report() for s in self.shards]
+        return {
+            "shards": len(self.shards),
+            "capacity": self.capacity,
+            "size": sum(r["size"] for r in reports),
+            "allocated_bytes": sum(r["allocated_bytes"] for r in reports),
+            "used_bytes": sum(r["used_bytes"] for r in reports),
+            "tree_bytes": sum(r["tree_bytes"] for r in reports),
+        }
+
+    def close(self) -> None:
+        for s in self.shards:
+            close = getattr(s, 'close', None)
+            if close is not None:
+                close()
+
+
+def create(config: Dict[str, Any]) -> Any:
+    """Replay buffer from ``training.replay_*``: in-memory or memmap, sharded when ``replay_shards`` > 1."""
+    train = config.get('training', {})
+    capacity = int(train.get('replay_capacity', 5000))
+    shards = max(1, int(train.get('replay_shards', 1)))
+    kwargs = dict(
+        capacity=-(-capacity // shards),
+        alpha=float(train.get('replay_alpha', 0.6)),
+        dim=int(np.prod(config['filepaths']['sponge_size'])),
+    )
+    path = train.get('replay_path', '')
+
+    def make(i: int) -> PrioritizedReplayBuffer:
+        if not path:
+            return PrioritizedReplayBuffer(**kwargs)
+        if shards == 1:
+            return MemmapReplayBuffer(path, **kwargs)
+        root, ext = os.path.splitext(path)
+        return MemmapReplayBuffer(f"{root}.{i}{ext}", **kwargs)
+
+    if shards == 1:
+        return make(0)
+    return ShardedReplayBuffer([make(i) for i in range(shards)], insertion=str(train.get('replay_insertion', 'round_robin')))
@@ -1,20 +1,31 @@
 import os
-import json
 import math
-import threading
-from typing import Any, Dict, List, Tuple
+import time
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 
-from .hebbian import HebbianUpdater
+from .ann import check_recall, create_index
+from .entanglement import EntanglementKernel
+from .hebbian import BlockHebbian, HebbianUpdater
+from .key_index import AppendOnlyIndex
+from .projection import create_projection
+from .quantize import PRECISION_DTYPES, PRECISION_SUFFIXES, BlockQuantizedTensor, check_precision, load_array, save_array
+from .retention import RetentionPolicy
+from .rwlock import make_lock
+from .vector_matrix import VectorMatrix
 
+logger = logging.getLogger(__name__)
 
-def _ensure_dir(path: str) -> None:
-    os.makedirs(path, exist_ok=True)
+# Block storage modes: one .npy per block, or the whole sponge as a single
+# tensor (RAM-resident, or an np.memmap) with write-back of dirty blocks.
+STORAGE_MODES = ("files", "ram", "memmap")
+HEBBIAN_MODES = ("scan", "block")
 
 
-def _gaussian_kernel(distance: float, sigma: float) -> float:
-    return math.exp(- (distance ** 2) / (2 * (sigma ** 2)))
+def _ensure_dir(path: str) -> None:
+    os.makedirs(path, exist_ok=True)
 
 
 class SpongeTopology:
@@ -53,159 +64,434 @@ class SpongeTopology:
 
 
 class EntangledSpongeMemory:
-    def __init__(self, base_path: str, sponge_size: Tuple[int, int, int], block_size: Tuple[int, int, int] = (9, 9, 9), entanglement_strength: float = 0.15, neighbor_radius: int = 1, holographic_dim: int = 1024, seed: int = 42, hebbian: bool = True, hebbian_lr: float = 0.001, hebbian_decay: float = 0.995):
+    def __init__(self, base_path: str, sponge_size: Tuple[int, int, int], block_size: Tuple[int, int, int] = (9, 9, 9), entanglement_strength: float = 0.15, neighbor_radius: int = 1, holographic_dim: int = 1024, seed: int = 42, hebbian: bool = True, hebbian_lr: float = 0.001, hebbian_decay: float = 0.995, storage: str = "files", flush_every: int = 0, flush_interval: float = 0.0, precision: str = "float32", projection_cache: Optional[str] = None, projection: str = "dense", blocks_only: bool = False, concurrency: str = "lock", retention: Optional[RetentionPolicy] = None, hebbian_mode: str = "scan"):
         self.base_path = base_path
+        # A blocks-only sponge keeps no index, signatures or global latent;
+        # MultiScaleMemory shares those from its primary scale.
+        self.blocks_only = bool(blocks_only)
         self.sponge_size = tuple(sponge_size)
         self.block_size = tuple(block_size)
         self.entanglement_strength = float(entanglement_strength)
         self.neighbor_radius = int(neighbor_radius)
         self.holo_dim = int(holographic_dim)
         self.topology = SpongeTopology(self.sponge_size, self.block_size)
+        # Storage precision of blocks, signatures and the global latent
+        self.precision = check_precision(precision)
+        suffix = PRECISION_SUFFIXES[self.precision]
+        # Signatures from different projections live in different spaces
+        self.projection = str(projection or "dense").lower()
+        space = "" if self.projection == "dense" else f".{self.projection}"
+        self._kernel = EntanglementKernel(self.topology, self.entanglement_strength, self.neighbor_radius)
 
         # Paths
         self.blocks_path = os.path.join(self.base_path, "blocks")
         self.index_path = os.path.join(self.base_path, "index.json")
+        self.index_log_path = os.path.join(self.base_path, "index.log")
         self.signatures_path = os.path.join(self.base_path, "signatures")
-        self.global_path = os.path.join(self.base_path, "global_latent.npy")
+        self.signature_matrix_path = os.path.join(self.base_path, f"signatures{space}.{suffix}")
+        self.global_path = os.path.join(self.base_path, f"global_latent{space}.npy")
+        self.tensor_path = os.path.join(self.base_path, f"sponge.{suffix}")
 
         # Init
         _ensure_dir(self.base_path)
         _ensure_dir(self.blocks_path)
-        _ensure_dir(self.signatures_path)
-        if not os.path.isfile(self.index_path):
-            with open(self.index_path, 'w') as f:
-                json.dump({}, f)
-        if not os.path.isfile(self.global_path):
-            np.save(self.global_path, np.zeros((self.holo_dim,), dtype=np.float32))
-
-        # Holographic random projection matrix (fixed)
-        rng = np.random.default_rng(seed)
-        self.holo_proj = rng.normal(0, 1.0 / math.sqrt(self.holo_dim), size=(self.holo_dim, int(np.prod(self.sponge_size)))).astype(np.float32)
-        self._lock = threading.Lock()
-
-        # Hebbian updater
-        self._hebbian = HebbianUpdater(lr=hebbian_lr, decay=hebbian_decay) if hebbian else None
+        self._index = None if self.blocks_only else AppendOnlyIndex(self.index_path, self.index_log_path)
+        # Global latent lives in RAM and is persisted by the flush policy;
+        # its load-time correction is cached until the latent changes.
+        self._global: Optional[np.ndarray] = None
+        self._global_dirty = False
+        self._correction: Optional[np.ndarray] = None
+        if not self.blocks_only:
+            try:
+                self._global = load_array(self.global_path, self.precision).astype(np.float32).reshape(-1)
+            except (ValueError, OSError):
+                pass
+            if self._global is None or self._global.size != self.holo_dim:
+                self._global = np.zeros((self.holo_dim,), dtype=np.float32)
+                self._global_dirty = True
+
+        # Holographic random projection (fixed, shared process-wide); SRHT keeps no matrix
+        self._projection = create_projection(self.projection, seed, (self.holo_dim, int(np.prod(self.sponge_size))), cache_dir=projection_cache)
+        self.holo_proj = getattr(self._projection, "matrix", None)
+        # "rw": novelty queries and loads run in parallel, stores are exclusive
+        self.concurrency = str(concurrency or "lock").lower()
+        self._lock = make_lock(self.concurrency)
+
+        # All signatures in one memory-mapped (n_keys, holo_dim) matrix
+        self._signatures = None
+        if not self.blocks_only:
+            self._signatures = VectorMatrix(self.holo_dim, path=self.signature_matrix_path, precision=self.precision)
+            self._import_signature_files()
+        self._ann = None
+        # Retention evicts index entries and signatures; blocks are shared by all keys
+        self.retention = None if self.blocks_only else retention
+        self._last_sweep = time_now()
+
+        # Hebbian modulation: "scan" chains one scalar trace through the blocks
+        # in raster order, "block" keeps a trace per block updated in one step
+        self.hebbian_mode = str(hebbian_mode or "scan").lower()
+        if self.hebbian_mode not in HEBBIAN_MODES:
+            raise ValueError(f"Unknown Hebbian mode: {hebbian_mode}")
+        self._hebbian = None
+        if hebbian and self.hebbian_mode == "block":
+            self._hebbian = BlockHebbian(self.topology.grid, lr=hebbian_lr, decay=hebbian_decay)
+        elif hebbian:
+            self._hebbian = HebbianUpdater(lr=hebbian_lr, decay=hebbian_decay)
+
+        # Block storage; the flush policy covers tensor-mode blocks, signatures and the global latent.
+        # With neither flush_every nor flush_interval set every store is flushed, as before write-back.
+        self.storage = str(storage).lower()
+        if self.storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown sponge storage mode: {storage}")
+        self.flush_every = int(flush_every)
+        self.flush_interval = float(flush_interval)
+        self._dirty: Set[Tuple[int, int, int]] = set()
+        self._stores_since_flush = 0
+        self._last_flush = time_now()
+        self._tensor = self._open_tensor() if self.storage != "files" else None
 
     # Internal IO
     def _block_file(self, idx: Tuple[int, int, int]) -> str:
         return os.path.join(self.blocks_path, f"{idx[0]}_{idx[1]}_{idx[2]}.npy")
 
-    def _read_block(self, idx: Tuple[int, int, int]) -> np.ndarray:
-        path = self._block_file(idx)
-        if os.path.isfile(path):
-            return np.load(path)
+    def _read_block_file(self, idx: Tuple[int, int, int]) -> np.ndarray:
+        try:
+            return load_array(self._block_file(idx), self.precision)
+        except FileNotFoundError:
+            pass
         sx, sy, sz = self.topology.block_bounds(idx)
         shape = (sx.stop - sx.start, sy.stop - sy.start, sz.stop - sz.start)
         return np.zeros(shape, dtype=np.float32)
 
-    def _write_block(self, idx: Tuple[int, int, int], data: np.ndarray) -> None:
-        path = self._block_file(idx)
-        np.save(path, data.astype(np.float32))
-
-    def _load_index(self) -> Dict[str, Any]:
-        with open(self.index_path, 'r') as f:
-            return json.load(f)
-
-    def _save_index(self, idx: Dict[str, Any]) -> None:
-        tmp = self.index_path + ".tmp"
-        with open(tmp, 'w') as f:
-            json.dump(idx, f)
-        os.replace(tmp, self.index_path)
-
-    def _signature_file(self, key: str) -> str:
-        return os.path.join(self.signatures_path, f"{key}.npy")
+    def _read_block(self, idx: Tuple[int, int, int]) -> np.ndarray:
+        if self._tensor is None:
+            return self._read_block_file(idx)
+        sx, sy, sz = self.topology.block_bounds(idx)
+        return np.array(self._tensor[sx, sy, sz], dtype=np.float32)
+
+    def _read_sponge(self) -> np.ndarray:
+        if self._tensor is not None:
+            return np.array(self._tensor, dtype=np.float32)
+        sponge = np.zeros(self.sponge_size, dtype=np.float32)
+        for bidx in self.topology.iter_blocks():
+            sx, sy, sz = self.topology.block_bounds(bidx)
+            sponge[sx, sy, sz] = self._read_block_file(bidx)
+        return sponge
+
+    def _write_sponge(self, sponge: np.ndarray) -> None:
+        if self._tensor is not None:
+            self._tensor[...] = sponge
+            self._dirty.update(self.topology.iter_blocks())
+            return
+        for bidx in self.topology.iter_blocks():
+            sx, sy, sz = self.topology.block_bounds(bidx)
+            save_array(self._block_file(bidx), np.ascontiguousarray(sponge[sx, sy, sz]), self.precision)
+
+    def _map_tensor(self, mode: str):
+        if self.precision == "int8":
+            return BlockQuantizedTensor(self.tensor_path, self.sponge_size, self.block_size, mode=mode)
+        return np.memmap(self.tensor_path, dtype=PRECISION_DTYPES[self.precision], mode=mode, shape=self.sponge_size)
+
+    def _open_tensor(self):
+        """Open the whole-sponge tensor, seeding it from a float32 tensor or block files if new."""
+        if self.storage == "memmap":
+            n = int(np.prod(self.sponge_size))
+            if self.precision == "int8":
+                expected, _ = BlockQuantizedTensor.nbytes(self.sponge_size, self.block_size)
+            else:
+                expected = n * np.dtype(PRECISION_DTYPES[self.precision]).itemsize
+            if os.path.isfile(self.tensor_path) and os.path.getsize(self.tensor_path) == expected:
+                return self._map_tensor('r+')
+            if os.path.isfile(self.tensor_path):
+                logger.warning("Sponge tensor %s has unexpected size; rebuilding from blocks", self.tensor_path)
+            tensor = self._map_tensor('w+')
+            legacy = os.path.join(self.base_path, "sponge.f32")
+            if legacy != self.tensor_path and os.path.isfile(legacy) and os.path.getsize(legacy) == n * 4:
+                # Switching precision: carry the float32 sponge over
+                tensor[...] = np.fromfile(legacy, dtype=np.float32).reshape(self.sponge_size)
+                tensor.flush()
+                return tensor
+        else:
+            tensor = np.zeros(self.sponge_size, dtype=np.float32)
+        sponge = np.zeros(self.sponge_size, dtype=np.float32)
+        for bidx in self.topology.iter_blocks():
+            sx, sy, sz = self.topology.block_bounds(bidx)
+            sponge[sx, sy, sz] = self._read_block_file(bidx)
+        tensor[...] = sponge
+        if self.storage == "memmap":
+            tensor.flush()
+        return tensor
+
+    def _flush_locked(self) -> None:
+        if self._signatures is not None:
+            self._signatures.flush()
+        if self._global_dirty:
+            save_array(self.global_path, self._global, self.precision)
+            self._global_dirty = False
+        if self._tensor is not None and self._dirty:
+            if self.storage == "memmap":
+                self._tensor.flush()
+            else:
+                for bidx in self._dirty:
+                    sx, sy, sz = self.topology.block_bounds(bidx)
+                    save_array(self._block_file(bidx), self._tensor[sx, sy, sz], self.precision)
+            self._dirty.clear()
+        self._stores_since_flush = 0
+        self._last_flush = time_now()
+
+    def _maybe_flush_locked(self, stores: int = 1) -> None:
+        self._stores_since_flush += stores
+        if self.flush_every <= 0 and self.flush_interval <= 0:
+            self._flush_locked()
+        elif self.flush_every > 0 and self._stores_since_flush >= self.flush_every:
+            self._flush_locked()
+        elif self.flush_interval > 0 and time_now() - self._last_flush >= self.flush_interval:
+            self._flush_locked()
+
+    def _import_signature_files(self) -> None:
+        """One-shot import of the legacy per-key signatures/ directory (or float32 matrix)."""
+        if len(self._signatures) or self.projection != "dense":
+            return
+        legacy = os.path.join(self.base_path, "signatures.f32")
+        if legacy != self.signature_matrix_path and os.path.isfile(legacy):
+            old = VectorMatrix(self.holo_dim, path=legacy)
+            if len(old):
+                self._signatures.extend(old.keys(), old.matrix())
+                self._signatures.flush()
+                return
+        if not os.path.isdir(self.signatures_path):
+            return
+        for fname in sorted(os.listdir(self.signatures_path)):
+            if not fname.endswith('.npy'):
+                continue
+            try:
+                sig = np.load(os.path.join(self.signatures_path, fname))
+            except Exception:
+                continue
+            if sig.size == self.holo_dim:
+                self._signatures.put(fname[:-4], sig)
+        self._signatures.flush()
 
     def _compute_signature(self, flat_vector: np.ndarray) -> np.ndarray:
         # Holographic random projection as a global signature
-        return (self.holo_proj @ flat_vector.astype(np.float32)).astype(np.float32)
+        return self._projection.forward(flat_vector)
+
+    def _compute_signatures(self, flat_vectors: np.ndarray) -> np.ndarray:
+        # Row-wise signatures for a (B, n) batch in one matrix product
+        return self._projection.forward_many(flat_vectors)
+
+    def _require_shared(self) -> None:
+        if self.blocks_only:
+            raise RuntimeError("blocks-only sponge keeps no index or signatures")
+
+    def _average_blocks_locked(self, blocks) -> np.ndarray:
+        sponge = np.zeros(self.sponge_size, dtype=np.float32)
+        weight = np.zeros(self.sponge_size, dtype=np.float32)
+        for bidx in blocks:
+            bidx = tuple(bidx)
+            sx, sy, sz = self.topology.block_bounds(bidx)
+            local = self._read_block(bidx)
+            sponge[sx, sy, sz] += local
+            weight[sx, sy, sz] += 1.0
+        return np.divide(sponge, np.maximum(weight, 1.0))
+
+    def _global_correction_locked(self) -> Optional[np.ndarray]:
+        # Global latent projected back through the transpose of the projection
+        if self._global is None:
+            return None
+        if self._correction is None:
+            self._correction = np.asarray(self._projection.adjoint(self._global), dtype=np.float32).reshape(self.sponge_size)
+        return self._correction
+
+    def _reconstruct_locked(self, blocks) -> np.ndarray:
+        sponge = self._average_blocks_locked(blocks)
+        correction = self._global_correction_locked()
+        if correction is not None:
+            sponge = 0.99 * sponge + 0.01 * correction
+        return sponge
 
     # Public API
     def store(self, key: str, vector: np.ndarray) -> None:
-        with self._lock:
-            sponge = np.asarray(vector, dtype=np.float32).reshape(self.sponge_size)
-            flat = sponge.reshape(-1)
-            # Update global latent
-            global_latent = np.load(self.global_path)
-            global_latent = 0.99 * global_latent + 0.01 * self._compute_signature(flat)
-            np.save(self.global_path, global_latent)
-
-            # Write blocks and entangle neighbors
-            index = self._load_index()
-            touched_blocks: List[Tuple[int, int, int]] = []
-            for bidx in self.topology.iter_blocks():
-                sx, sy, sz = self.topology.block_bounds(bidx)
-                local = sponge[sx, sy, sz]
-                current = self._read_block(bidx)
-                # Optional Hebbian modulation
-                if self._hebbian is not None:
-                    current = self._hebbian.update(current, pre=local, post=current)
-                # Direct write as EMA
-                updated = 0.9 * current + 0.1 * local
-                # Spread to neighbors
-                for nidx, dist in self.topology.neighbors(bidx, radius=self.neighbor_radius):
-                    nsx, nsy, nsz = self.topology.block_bounds(nidx)
-                    nblock = self._read_block(nidx)
-                    # Determine overlap slice size to blend; use min shapes
-                    blend = local[:nblock.shape[0], :nblock.shape[1], :nblock.shape[2]]
-                    strength = self.entanglement_strength * _gaussian_kernel(dist, sigma=max(1e-6, self.neighbor_radius / 2))
-                    nblock = (1.0 - strength) * nblock + strength * blend
-                    self._write_block(nidx, nblock)
-                self._write_block(bidx, updated)
-                touched_blocks.append(bidx)
-
-            # Update index and signature
-            index[key] = {
-                "blocks": touched_blocks,
-                "timestamp": float(time_now()),
-            }
-            self._save_index(index)
-            sig = self._compute_signature(flat)
-            np.save(self._signature_file(key), sig)
+        self.store_many([key], np.asarray(vector)[None])
+
+    def store_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Store a (B, *sponge_size) batch under one lock.
+
+        Equivalent to B calls to ``store`` in order, but signatures are one
+        matrix product and blocks, global latent and index are touched once.
+        """
+        if len(keys) == 0:
+            return
+        sponges = np.asarray(vectors, dtype=np.float32).reshape((len(keys),) + self.sponge_size)
+        with self._lock.write():
+            if not self.blocks_only:
+                self._store_shared_locked(keys, sponges)
+            # Write blocks and entangle neighbors across the whole sponge
+            current = self._read_sponge()
+            for sponge in sponges:
+                current = self._kernel.apply(current, sponge, self._hebbian)
+            self._write_sponge(current)
+            self._maybe_flush_locked(len(keys))
+
+    def _store_shared_locked(self, keys: List[str], sponges: np.ndarray) -> None:
+        sigs = self._compute_signatures(sponges.reshape(len(keys), -1))
+        # Update global latent (closed form of one 0.99/0.01 EMA step per vector)
+        decay = 0.99 ** np.arange(len(keys) - 1, -1, -1, dtype=np.float32)
+        self._global = ((0.99 ** len(keys)) * self._global + 0.01 * (decay @ sigs)).astype(np.float32)
+        self._global_dirty = True
+        self._correction = None
+
+        # Update index and signatures; a store entangles every block
+        touched_blocks = list(self.topology.iter_blocks())
+        now = float(time_now())
+        meta = {"blocks": touched_blocks, "timestamp": now}
+        if self.retention is not None and self.retention.scores_novelty:
+            _, novelty = self._signatures.nearest_cosine_batch(sigs)
+            entries = [(key, dict(meta, novelty=float(score))) for key, score in zip(keys, novelty)]
+        else:
+            entries = [(key, meta) for key in keys]
+        self._index.set_many(entries)
+        rows = [self._signatures.put(key, sig) for key, sig in zip(keys, sigs)]
+        if self._ann is not None:
+            self._ann.add_many(rows, sigs)
+        if self.retention is not None and self.retention.due(len(self._signatures), self._signatures.row_nbytes, self._last_sweep, now):
+            self._compact_locked(now)
+
+    def _compact_locked(self, now: float) -> int:
+        start = time.perf_counter()
+        keys = self._signatures.keys()
+        meta = [self._index.get(key) or {} for key in keys]
+        timestamps = np.array([m.get("timestamp", now) for m in meta], dtype=np.float64)
+        novelty = np.array([m.get("novelty", np.nan) for m in meta], dtype=np.float64)
+        victims = self.retention.select(keys, timestamps, novelty, self._signatures.row_nbytes, now)
+        self._last_sweep = now
+        if victims:
+            self._delete_locked(victims)
+        self.retention.report(len(victims), time.perf_counter() - start)
+        return len(victims)
+
+    def _delete_locked(self, keys: List[str]) -> None:
+        changed = self._signatures.remove_many(keys)
+        if self._ann is not None:
+            self._ann.truncate(len(self._signatures))
+            if len(changed):
+                names = self._signatures.keys()
+                self._ann.add_many(changed, np.stack([self._signatures.get(names[row]) for row in changed], axis=0))
+        self._index.delete_many(keys)
+
+    def compact(self) -> int:
+        """Apply the retention policy now; returns the number of evicted keys."""
+        if self.retention is None:
+            return 0
+        with self._lock.write():
+            return self._compact_locked(time_now())
+
+    def keys(self) -> List[str]:
+        """Keys with a stored signature."""
+        self._require_shared()
+        with self._lock.read():
+            return self._signatures.keys()
+
+    def delete_many(self, keys: List[str]) -> None:
+        """Forget keys (index entry and signature); the shared blocks are untouched."""
+        self._require_shared()
+        with self._lock.write():
+            present = [key for key in keys if key in self._index]
+            if present:
+                self._delete_locked(present)
 
     def load(self, key: str) -> np.ndarray:
-        with self._lock:
-            index = self._load_index()
-            meta = index.get(key)
+        self._require_shared()
+        with self._lock.read():
+            meta = self._index.get(key)
             if meta is None:
                 return np.zeros(self.sponge_size, dtype=np.float32)
-            sponge = np.zeros(self.sponge_size, dtype=np.float32)
-            weight = np.zeros(self.sponge_size, dtype=np.float32)
-            for bidx in meta.get("blocks", []):
-                bidx = tuple(bidx)
-                sx, sy, sz = self.topology.block_bounds(bidx)
-                local = self._read_block(bidx)
-                sponge[sx, sy, sz] += local
-                weight[sx, sy, sz] += 1.0
-            sponge = np.divide(sponge, np.maximum(weight, 1.0))
-            # Refine with global latent by projecting back via pseudo-inverse
-            try:
-                flat = sponge.reshape(-1)
-                global_latent = np.load(self.global_path)
-                correction = self.holo_proj.T @ global_latent
-                flat = 0.99 * flat + 0.01 * correction
-                sponge = flat.reshape(self.sponge_size)
-            except Exception:
-                pass
-            return sponge
+            return self._reconstruct_locked(meta.get("blocks", []))
+
+    def load_many(self, keys: List[str]) -> np.ndarray:
+        """Load a batch; keys that share block sets are reconstructed once."""
+        self._require_shared()
+        out = np.zeros((len(keys),) + self.sponge_size, dtype=np.float32)
+        with self._lock.read():
+            recon: Dict[Tuple, np.ndarray] = {}
+            for i, blocks in enumerate(self.key_blocks(keys)):
+                if blocks is None:
+                    continue
+                if blocks not in recon:
+                    recon[blocks] = self._reconstruct_locked(blocks)
+                out[i] = recon[blocks]
+        return out
+
+    def key_blocks(self, keys: List[str]) -> List[Optional[Tuple]]:
+        """Block set recorded for each key (None if unknown)."""
+        self._require_shared()
+        out: List[Optional[Tuple]] = []
+        for key in keys:
+            meta = self._index.get(key)
+            out.append(None if meta is None else tuple(tuple(b) for b in meta.get("blocks", [])))
+        return out
+
+    def average_blocks(self, block_sets: List[Optional[Tuple]]) -> np.ndarray:
+        """(m, *sponge_size) block averages without the global correction; None means every block."""
+        out = np.zeros((len(block_sets),) + self.sponge_size, dtype=np.float32)
+        with self._lock.read():
+            for i, blocks in enumerate(block_sets):
+                out[i] = self._average_blocks_locked(self.topology.iter_blocks() if blocks is None else blocks)
+        return out
+
+    def global_correction(self) -> Optional[np.ndarray]:
+        """Load-time correction term (adjoint of the global latent), or None."""
+        self._require_shared()
+        with self._lock.read():
+            return self._global_correction_locked()
 
     def distance_to_nearest(self, state_vector: np.ndarray) -> float:
-        with self._lock:
+        self._require_shared()
+        with self._lock.read():
             flat = np.asarray(state_vector, dtype=np.float32).reshape(-1)
             sig = self._compute_signature(flat)
-            best = float('inf')
-            # Compare to signatures for speed
-            for fname in os.listdir(self.signatures_path):
-                if not fname.endswith('.npy'):
-                    continue
-                other = np.load(os.path.join(self.signatures_path, fname))
-                # Cosine distance
-                denom = float(np.linalg.norm(sig) * np.linalg.norm(other) + 1e-9)
-                cos = float(np.dot(sig, other) / denom)
-                dist = 1.0 - cos
-                if dist < best:
-                    best = dist
+            # Cosine distance against every stored signature (or the ANN candidates) in one matvec
+            rows = self._ann.candidates(sig) if self._ann is not None else None
+            _, best = self._signatures.nearest_cosine(sig, rows=rows)
             return best if best != float('inf') else 0.0
 
+    def distance_to_nearest_batch(self, state_vectors: np.ndarray) -> np.ndarray:
+        """Cosine distance to the nearest signature for each row of a batch."""
+        self._require_shared()
+        flats = np.asarray(state_vectors, dtype=np.float32).reshape(len(state_vectors), -1)
+        with self._lock.read():
+            sigs = self._compute_signatures(flats)
+            if self._ann is None:
+                _, best = self._signatures.nearest_cosine_batch(sigs)
+            else:
+                best = np.array([self._signatures.nearest_cosine(sig, rows=self._ann.candidates(sig))[1] for sig in sigs])
+        return np.where(np.isinf(best), 0.0, best)
+
+    def flush(self) -> None:
+        """Write dirty blocks of the in-memory sponge and the global latent back to storage."""
+        with self._lock.write():
+            self._flush_locked()
+
+    def attach_index(self, index: Any) -> None:
+        """Answer novelty queries through an approximate index over the signatures."""
+        self._require_shared()
+        with self._lock.write():
+            index.sync(self._signatures.matrix(), self._signatures.keys())
+            self._ann = index
+
+    def check_index_recall(self, n_queries: int = 100) -> Dict[str, float] | None:
+        """Recall@1 of the attached index against exact signature search."""
+        with self._lock.read():
+            if self._ann is None:
+                return None
+            return check_recall(self._ann, self._signatures.matrix(), "cosine", n_queries=n_queries)
+
+    def stop(self) -> None:
+        with self._lock.write():
+            self._flush_locked()
+            if self._ann is not None:
+                self._ann.save(self._signatures.keys())
+
     @property
     def sponge_size(self) -> Tuple[int, int, int]:
         return self._sponge_size
@@ -216,11 +502,10 @@ class EntangledSpongeMemory:
 
 
 def time_now() -> float:
-    import time
     return time.time()
 
 
-def create(config: Dict[str, Any] | None = None) -> EntangledSpongeMemory:
+def create(config: Dict[str, Any] | None = None, blocks_only: bool = False) -> EntangledSpongeMemory:
     if config is None:
         base = "data/sponge"
         sponge_size = (27, 27, 27)
@@ -231,6 +516,15 @@ def create(config: Dict[str, Any] | None = None) -> EntangledSpongeMemory:
         hebbian = True
         hebbian_lr = 0.001
         hebbian_decay = 0.995
+        hebbian_mode = "scan"
+        storage = "files"
+        flush_every = 0
+        flush_interval = 0.0
+        precision = "float32"
+        projection_cache = None
+        projection = "dense"
+        concurrency = "lock"
+        retention = None
     else:
         fp = config.get("filepaths", {})
         base = fp.get("memory_base", "data/sponge")
@@ -243,7 +537,16 @@ def create(config: Dict[str, Any] | None = None) -> EntangledSpongeMemory:
         hebbian = bool(memcfg.get("hebbian", True))
         hebbian_lr = float(memcfg.get("hebbian_lr", 0.001))
         hebbian_decay = float(memcfg.get("hebbian_decay", 0.995))
-    return EntangledSpongeMemory(
+        hebbian_mode = str(memcfg.get("hebbian_mode", "scan"))
+        storage = str(memcfg.get("storage", "files"))
+        flush_every = int(memcfg.get("flush_every", 0))
+        flush_interval = float(memcfg.get("flush_interval", 0.0))
+        precision = str(memcfg.get("precision", "float32"))
+        projection_cache = memcfg.get("projection_cache", "data/projections") or None
+        projection = str(memcfg.get("projection", "dense"))
+        concurrency = str(memcfg.get("concurrency", "lock"))
+        retention = RetentionPolicy.from_config(memcfg)
+    mem = EntangledSpongeMemory(
         base_path=base,
         sponge_size=sponge_size,
         block_size=block_size,
@@ -253,4 +556,18 @@ def create(config: Dict[str, Any] | None = None) -> EntangledSpongeMemory:
         hebbian=hebbian,
         hebbian_lr=hebbian_lr,
         hebbian_decay=hebbian_decay,
-    )
\ No newline at end of file
+        storage=storage,
+        flush_every=flush_every,
+        flush_interval=flush_interval,
+        precision=precision,
+        projection_cache=projection_cache,
+        projection=projection,
+        blocks_only=blocks_only,
+        concurrency=concurrency,
+        retention=retention,
+        hebbian_mode=hebbian_mode,
+    )
+    index = create_index(config.get("memory", {}), holo_dim, os.path.join(base, "signatures_ann"), metric="cosine") if config and not blocks_only else None
+    if index is not None:
+        mem.attach_index(index)
+    return mem
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Array-backed segment trees for prioritized sampling.
+
+The tree is stored level by level in preallocated arrays: ``levels[0]``
+holds the leaves (capacity rounded up to a power of ``fanout``) and each
+entry of ``levels[d]`` reduces ``fanout`` consecutive entries of
+``levels[d - 1]``. A wide fanout keeps the tree shallow (four levels of 32
+cover 1M leaves), so updates and prefix-sum searches are a few NumPy calls
+per level and take whole index arrays: a batch costs O(B * fanout * depth).
+"""
+from typing import List
+
+import numpy as np
+
+
+class SegmentTree:
+    def __init__(self, capacity: int, reduce: np.ufunc, neutral: float, fanout: int = 32):
+        self.capacity = max(1, int(capacity))
+        self.fanout = max(2, int(fanout))
+        self.depth = 1
+        while self.fanout ** self.depth < self.capacity:
+            self.depth += 1
+        self.reduce = reduce
+        self.neutral = float(neutral)
+        self.levels: List[np.ndarray] = [
+            np.full((self.fanout ** (self.depth - d),), self.neutral, dtype=np.float64) for d in range(self.depth + 1)
+        ]
+
+    def update(self, indices, values) -> None:
+        """Set leaves ``indices`` to ``values`` and refresh their ancestors."""
+        idx = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if idx.size == 0:
+            return
+        self.levels[0][idx] = np.asarray(values, dtype=np.float64).reshape(-1)
+        for d in range(1, self.depth + 1):
+            idx = idx // self.fanout
+            self.levels[d][idx] = self.reduce.reduce(self.levels[d - 1].reshape(-1, self.fanout)[idx], axis=1)
+
+    def set(self, index: int, value: float) -> None:
+        """Single-leaf ``update`` without index-array overhead."""
+        i = int(index)
+        self.levels[0][i] = value
+        for d in range(1, self.depth + 1):
+            i //= self.fanout
+            start = i * self.fanout
+            self.levels[d][i] = self.reduce.reduce(self.levels[d - 1][start:start + self.fanout])
+
+    def root(self) -> float:
+        return float(self.levels[-1][0])
+
+    def leaves(self, indices) -> np.ndarray:
+        return self.levels[0][np.asarray(indices, dtype=np.int64)]
+
+
+class SumTree(SegmentTree):
+    def __init__(self, capacity: int, fanout: int = 32):
+        super().__init__(capacity, np.add, 0.0, fanout)
+
+    def total(self) -> float:
+        return self.root()
+
+    def find(self, prefix) -> np.ndarray:
+        """Leaf index holding each prefix sum: smallest i with sum(leaves[:i + 1]) > prefix.
+
+        Prefixes must lie in [0, total); callers clamp the result to the
+        filled leaves, since round-off can land on an empty trailing leaf.
+        """
+        u = np.array(prefix, dtype=np.float64).reshape(-1)
+        idx = np.zeros(u.shape, dtype=np.int64)
+        rows = np.arange(u.size)
+        k = self.fanout
+        for d in range(self.depth - 1, -1, -1):
+            child = self.levels[d].reshape(-1, k)[idx]
+            cum = np.cumsum(child, axis=1)
+            # Round-off can carry u past the last child; stay inside the node
+            j = np.minimum((cum <= u[:, None]).sum(axis=1), k - 1)
+            u = u - np.where(j > 0, cum[rows, j - 1], 0.0)
+            idx = idx * k + j
+        return idx
+
+
+class MinTree(SegmentTree):
+    def __init__(self, capacity: int, fanout: int = 32):
+        super().__init__(capacity, np.minimum, np.inf, fanout)
+
+    def min(self) -> float:
+        return self.root()
@@ -1,33 +1,182 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Iterator, Optional, Tuple
+
 import numpy as np
-from typing import Any, Tuple
+
+
+class LowRankCodec:
+    """Truncated-SVD codec for sponge tensors.
+
+    A (X, Y, Z) tensor is unfolded to (X, Y*Z) and kept as rank-k factors
+    U, S, Vt packed into one flat float32 row of fixed stride, so encoded
+    states fit the per-file and packed HFFS layouts alike.
+    """
+
+    def __init__(self, rank: int = 8, metrics: Optional[Any] = None):
+        self.rank = int(rank)
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._encoded = 0
+        self._err_sum = 0.0
+
+    def _dims(self, shape: Tuple[int, ...]) -> Tuple[int, int, int]:
+        rows = int(shape[0])
+        cols = int(np.prod(shape[1:]))
+        return rows, cols, min(self.rank, rows, cols)
+
+    def stride(self, shape: Tuple[int, ...]) -> int:
+        rows, cols, k = self._dims(shape)
+        return rows * k + k + k * cols
+
+    def ratio(self, shape: Tuple[int, ...]) -> float:
+        return float(np.prod(shape)) / self.stride(shape)
+
+    def encode(self, arr: np.ndarray) -> np.ndarray:
+        arr = np.asarray(arr, dtype=np.float32)
+        rows, cols, k = self._dims(arr.shape)
+        mat = arr.reshape(rows, cols)
+        U, S, Vt = np.linalg.svd(mat, full_matrices=False)
+        U, S, Vt = U[:, :k], S[:k], Vt[:k, :]
+        recon = (U * S) @ Vt
+        err = float(np.linalg.norm(mat - recon) / (np.linalg.norm(mat) + 1e-12))
+        self._record(arr.shape, err)
+        return np.concatenate([U.reshape(-1), S, Vt.reshape(-1)]).astype(np.float32)
+
+    def decode(self, row: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+        return self.decode_many(np.asarray(row)[None], shape)[0]
+
+    def decode_many(self, rows: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+        """Reconstruct a (n, stride) block of encoded rows into (n, *shape)."""
+        n_rows, n_cols, k = self._dims(shape)
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, self.stride(shape))
+        n = rows.shape[0]
+        U = rows[:, : n_rows * k].reshape(n, n_rows, k)
+        S = rows[:, n_rows * k: n_rows * k + k]
+        Vt = rows[:, n_rows * k + k:].reshape(n, k, n_cols)
+        return ((U * S[:, None, :]) @ Vt).reshape((n,) + tuple(shape))
+
+    def _record(self, shape: Tuple[int, ...], err: float) -> None:
+        with self._lock:
+            self._encoded += 1
+            self._err_sum += err
+            mean_err = self._err_sum / self._encoded
+        if self.metrics is not None:
+            self.metrics.set('compression_ratio', self.ratio(shape))
+            self.metrics.set('compression_error', mean_err)
+
+
+def _iter_members(obj: Any) -> Iterator[Any]:
+    yield obj
+    for attr in ('backends', 'scales'):
+        for child in getattr(obj, attr, None) or ():
+            yield from _iter_members(child)
+    for attr in ('_backend', 'backend'):
+        child = getattr(obj, attr, None)
+        if child is not None:
+            yield from _iter_members(child)
 
 
 class TensorNetworkCompressor:
-    def __init__(self, backend: Any, rank: int = 8):
+    """Low-rank compression layer over a memory backend.
+
+    Backends that persist per-key states (HFFS) carry a LowRankCodec built
+    from ``[compression]`` so they store rank-k factors; this wrapper serves
+    loads through a bounded LRU of reconstructed tensors and reports
+    compression ratio, reconstruction error and cache hits to ``metrics``.
+    Like NoveltyCache, a store bumps an epoch after the backend write, and a
+    load only caches what it read if no store happened meanwhile.
+    """
+
+    def __init__(self, backend: Any, rank: int = 8, cache_size: int = 64, metrics: Optional[Any] = None):
         self.backend = backend
         self.rank = int(rank)
+        self.cache_size = int(cache_size)
+        self.metrics = metrics
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._epoch = 0
+        self._lock = threading.Lock()
+        for member in _iter_members(backend):
+            codec = getattr(member, 'codec', None)
+            if codec is not None and metrics is not None:
+                codec.metrics = metrics
 
     @property
     def sponge_size(self) -> Tuple[int, int, int]:
         return self.backend.sponge_size
 
-    def _compress(self, block: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        # Flatten 3D to 2D for SVD proxy
-        mat = block.reshape(block.shape[0], -1)
-        U, S, Vt = np.linalg.svd(mat, full_matrices=False)
-        k = min(self.rank, S.shape[0])
-        return U[:, :k], S[:k], Vt[:k, :]
+    def _count(self, key: str, n: int = 1) -> None:
+        if self.metrics is not None and n:
+            self.metrics.inc(key, n)
 
-    def _decompress(self, U, S, Vt, shape) -> np.ndarray:
-        mat = (U * S) @ Vt
-        return mat.reshape(shape)
+    def _cache_put(self, key: str, value: np.ndarray, epoch: int) -> None:
+        """Remember ``value`` unless a store happened since ``epoch`` was read."""
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            return value
+
+    def _invalidate(self, keys) -> None:
+        # After the backend write: a load that read the old value before it won't cache it
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                self._cache.pop(key, None)
 
     def store(self, key: str, vector):
-        # Delegate to backend (could compress blocks internally if backend exposes hooks)
         self.backend.store(key, vector)
+        self._invalidate([key])
+
+    def store_many(self, keys, vectors):
+        self.backend.store_many(keys, vectors)
+        self._invalidate(keys)
 
     def load(self, key: str):
-        return self.backend.load(key)
+        """Reconstructed state; a copy, so callers may modify it."""
+        value = self._cache_get(key)
+        if value is not None:
+            self._count('compression_cache_hits')
+            return value.copy()
+        self._count('compression_cache_misses')
+        with self._lock:
+            epoch = self._epoch
+        value = np.array(self.backend.load(key))
+        self._cache_put(key, value, epoch)
+        return value.copy()
+
+    def load_many(self, keys):
+        cached = [self._cache_get(key) for key in keys]
+        missing = [i for i, value in enumerate(cached) if value is None]
+        self._count('compression_cache_hits', len(keys) - len(missing))
+        self._count('compression_cache_misses', len(missing))
+        if missing:
+            with self._lock:
+                epoch = self._epoch
+            loaded = self.backend.load_many([keys[i] for i in missing])
+            for i, value in zip(missing, loaded):
+                cached[i] = np.array(value)
+                self._cache_put(keys[i], cached[i], epoch)
+        return np.stack(cached, axis=0) if cached else np.zeros((0,) + tuple(self.sponge_size), dtype=np.float32)
 
     def distance_to_nearest(self, state_vector):
-        return self.backend.distance_to_nearest(state_vector)
\ No newline at end of file
+        return self.backend.distance_to_nearest(state_vector)
+
+    def distance_to_nearest_batch(self, state_vectors):
+        return self.backend.distance_to_nearest_batch(state_vectors)
+
+    def stop(self) -> None:
+        stop = getattr(self.backend, 'stop', None)
+        if stop is not None:
+            stop()
\ No newline at end of file
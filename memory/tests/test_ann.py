@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from memory import memory_hffs
+from memory.ann import IVFIndex, LSHIndex
+
+SIZE = (4, 4, 4)
+
+
+def _config(path, ann):
+    return {
+        "filepaths": {"memory_base": str(path), "sponge_size": list(SIZE)},
+        "memory": {"hffs_storage": "files", "ann": ann, "ann_lists": 4, "ann_probe": 1, "ann_bits": 8, "ann_tables": 4},
+    }
+
+
+@pytest.mark.parametrize("ann", ["lsh", "ivf"])
+def test_index_matches_rows_after_restart(tmp_path, ann):
+    rng = np.random.default_rng(0)
+    # Insertion order differs from the sorted order the files are reloaded in
+    keys = [f"k{i:02d}" for i in rng.permutation(40)]
+    states = {key: rng.standard_normal(SIZE).astype(np.float32) for key in keys}
+
+    mem = memory_hffs.create(_config(tmp_path, ann))
+    for key in keys:
+        mem.store(key, states[key])
+    mem.stop()
+
+    mem = memory_hffs.create(_config(tmp_path, ann))
+    assert mem.keys() == sorted(keys)
+    for key in keys:
+        assert mem.distance_to_nearest(states[key]) == pytest.approx(0.0, abs=1e-5)
+    assert mem.check_index_recall(n_queries=20)["recall"] > 0.5
+    mem.stop()
+
+
+@pytest.mark.parametrize("make", [
+    lambda path: LSHIndex(8, n_bits=8, n_tables=4, path=path),
+    lambda path: IVFIndex(8, n_lists=2, train_size=4, path=path),
+])
+def test_sync_rebuilds_on_key_mismatch(tmp_path, make):
+    rng = np.random.default_rng(1)
+    matrix = rng.standard_normal((10, 8)).astype(np.float32)
+    keys = [str(i) for i in range(10)]
+    path = str(tmp_path / "index.npz")
+
+    index = make(path)
+    index.sync(matrix, keys)
+    index.save(keys)
+
+    reopened = make(path)
+    assert reopened.fingerprint is not None
+    reopened.sync(matrix, keys)
+    assert len(reopened) == 10
+
+    # Rows dropped while the index was detached: shrink, then reorder
+    reopened = make(path)
+    reopened.sync(matrix[:6], keys[:6])
+    assert len(reopened) == 6
+    reopened = make(path)
+    order = keys[::-1]
+    reopened.sync(matrix[::-1], order)
+    for row, vec in enumerate(matrix[::-1]):
+        cand = reopened.candidates(vec)
+        assert cand is None or row in cand.tolist()
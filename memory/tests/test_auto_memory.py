@@ -0,0 +1,94 @@
+import threading
+import time
+
+import numpy as np
+
+from memory.auto_memory import AutoMemory
+from memory.memory_hffs import HFFSMemory
+from memory.tensor_network import LowRankCodec
+
+SIZE = (4, 4, 4)
+
+
+def _auto(tmp_path, **kwargs):
+    backends = [HFFSMemory(str(tmp_path / f"disk{i}"), sponge_size=SIZE) for i in range(2)]
+    cold = HFFSMemory(str(tmp_path / "cold"), sponge_size=SIZE, storage="packed", codec=LowRankCodec(rank=4))
+    # demote_interval is long: the tests drive rebalance() themselves
+    kwargs.setdefault("cold_after", 0.05)
+    return AutoMemory(backends, cold=cold, demote_interval=3600.0, directory_path=str(tmp_path / "tiers.json"), **kwargs)
+
+
+def test_idle_keys_move_to_cold_and_back_on_load(tmp_path):
+    rng = np.random.default_rng(0)
+    states = rng.standard_normal((3,) + SIZE).astype(np.float32)
+    mem = _auto(tmp_path, ram_keys=0)
+    mem.store_many(["a", "b", "c"], states)
+    assert {mem.tier_of(k) for k in "abc"} == {"disk"}
+
+    time.sleep(0.1)
+    mem.load("b")  # touched again, so not idle
+    assert mem.rebalance() == 2
+    assert [mem.tier_of(k) for k in "abc"] == ["cold", "disk", "cold"]
+    assert all("a" not in b.keys() for b in mem.backends)
+
+    # Rank 4 of a 4x16 unfolding is lossless
+    np.testing.assert_allclose(mem.load("a"), states[0], atol=1e-4)
+    assert mem.rebalance() == 1
+    assert mem.tier_of("a") == "disk"
+    assert "a" not in mem.cold.keys()
+    mem.stop()
+
+
+def test_directory_survives_a_restart(tmp_path):
+    rng = np.random.default_rng(1)
+    mem = _auto(tmp_path, ram_keys=0)
+    mem.store_many(["a", "b"], rng.standard_normal((2,) + SIZE))
+    time.sleep(0.1)
+    mem.rebalance()
+    mem.stop()
+
+    mem = _auto(tmp_path, ram_keys=0)
+    assert mem.tier_of("a") == mem.tier_of("b") == "cold"
+    assert mem.load("a").shape == SIZE
+    mem.stop()
+
+
+def test_hit_ratios_count_each_tier(tmp_path):
+    mem = _auto(tmp_path, ram_keys=1, cold_after=0.0)
+    rng = np.random.default_rng(2)
+    mem.store_many(["a", "b"], rng.standard_normal((2,) + SIZE))
+    mem.load_many(["b", "a", "missing"])  # ram, disk, miss
+    mem.load("a")  # cached in RAM by the previous load
+    ratios = mem.hit_ratios()
+    assert ratios["ram"] == 0.5 and ratios["disk"] == 0.25 and ratios["miss"] == 0.25
+    mem.stop()
+
+
+def test_concurrent_stores_of_one_key_keep_a_copy(tmp_path):
+    mem = _auto(tmp_path, ram_keys=0, cold_after=0.0)
+    rng = np.random.default_rng(3)
+    # Route the three stores of "k" to disk0, disk1, disk0
+    route = iter([0, 1, 0])
+    mem._choose_many = lambda vectors: np.array([next(route)])
+    third_done = threading.Event()
+    delete = mem.backends[0].delete_many
+
+    def slow_delete(keys):
+        # The second store drops the first copy; give the third store a chance to run meanwhile
+        third_done.wait(0.5)
+        delete(keys)
+
+    mem.backends[0].delete_many = slow_delete
+    mem.store("k", rng.standard_normal(SIZE))
+    second = threading.Thread(target=lambda: mem.store("k", rng.standard_normal(SIZE)))
+    second.start()
+    time.sleep(0.1)
+    third = threading.Thread(target=lambda: (mem.store("k", rng.standard_normal(SIZE)), third_done.set()))
+    third.start()
+    second.join(10)
+    third.join(10)
+
+    holders = [i for i, b in enumerate(mem.backends) if "k" in b.keys()]
+    assert holders == [0]
+    assert mem.tier_of("k") == "disk"
+    mem.stop()
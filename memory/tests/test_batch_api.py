@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from memory.auto_memory import AutoMemory
+from memory.guarded import GuardedMemory
+from memory.memory_hffs import HFFSMemory
+from memory.multiscale import create_multiscale
+from memory.novelty_cache import CachedNoveltyMemory, NoveltyCache
+from memory.sponge_memory import EntangledSpongeMemory
+from memory.tensor_network import TensorNetworkCompressor
+from memory.write_behind import WriteBehindMemory
+from tools.policy import PolicyEnforcer
+
+SIZE = (6, 6, 6)
+
+
+def _hffs(path, storage="files"):
+    return HFFSMemory(str(path / "hffs"), sponge_size=SIZE, storage=storage)
+
+
+def _sponge(path):
+    return EntangledSpongeMemory(str(path / "sponge"), SIZE, block_size=(3, 3, 3), holographic_dim=64)
+
+
+def _multiscale(path):
+    return create_multiscale({
+        "filepaths": {"memory_base": str(path / "multi"), "sponge_size": list(SIZE)},
+        "memory": {"holographic_dim": 64, "projection_cache": ""},
+    })
+
+
+MAKERS = {
+    "hffs_files": _hffs,
+    "hffs_packed": lambda path: _hffs(path, "packed"),
+    "sponge": _sponge,
+    "multiscale": _multiscale,
+    "compressor": lambda path: TensorNetworkCompressor(_hffs(path), cache_size=4),
+    "novelty_cache": lambda path: CachedNoveltyMemory(_hffs(path), NoveltyCache(64)),
+    "write_behind": lambda path: WriteBehindMemory(_hffs(path), max_pending=4, batch_size=3),
+    "guarded": lambda path: GuardedMemory(_hffs(path), PolicyEnforcer({})),
+    "auto": lambda path: AutoMemory([_hffs(path), _sponge(path)], ram_keys=2),
+}
+
+
+def _settle(mem):
+    flush = getattr(mem, "flush", None)
+    if flush is not None:
+        flush()
+
+
+@pytest.mark.parametrize("name", sorted(MAKERS))
+def test_batch_calls_match_per_item_calls(tmp_path, name):
+    rng = np.random.default_rng(0)
+    keys = [f"k{i}" for i in range(5)]
+    states = rng.standard_normal((5,) + SIZE).astype(np.float32)
+    queries = np.concatenate([states[:2], rng.standard_normal((3,) + SIZE).astype(np.float32)])
+    (tmp_path / "batch").mkdir()
+    (tmp_path / "single").mkdir()
+    batch, single = MAKERS[name](tmp_path / "batch"), MAKERS[name](tmp_path / "single")
+
+    batch.store_many(keys, states)
+    for key, state in zip(keys, states):
+        single.store(key, state)
+    _settle(batch)
+    _settle(single)
+
+    loaded = batch.load_many(keys)
+    np.testing.assert_allclose(loaded, np.stack([batch.load(k) for k in keys]), rtol=1e-5, atol=1e-6)
+    dists = batch.distance_to_nearest_batch(queries)
+    np.testing.assert_allclose(dists, [batch.distance_to_nearest(q) for q in queries], rtol=1e-5, atol=1e-5)
+    if name != "auto":
+        # AutoMemory routes a batch on novelty before any of it is stored, so only its reads are compared
+        np.testing.assert_allclose(loaded, single.load_many(keys), rtol=1e-4, atol=1e-5)
+        np.testing.assert_allclose(dists, single.distance_to_nearest_batch(queries), rtol=1e-4, atol=1e-5)
+    batch.stop()
+    single.stop()
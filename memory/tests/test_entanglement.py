@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from memory.entanglement import EntanglementKernel, apply_reference
+from memory.hebbian import HebbianUpdater
+from memory.sponge_memory import SpongeTopology
+
+
+# The reference loop can only blend an edge block into a full neighbor when
+# the edge is one voxel thick (it relies on broadcasting), so the ragged
+# shapes below leave a remainder of 1 on the axes that don't divide.
+@pytest.mark.parametrize("sponge_size, block_size", [
+    ((12, 12, 12), (4, 4, 4)),
+    ((20, 9, 7), (19, 4, 3)),
+    ((13, 9, 7), (3, 4, 3)),
+    ((20, 9, 7), (4, 4, 3)),
+])
+@pytest.mark.parametrize("radius", [1, 2])
+@pytest.mark.parametrize("hebbian", [False, True])
+def test_kernel_matches_reference_loop(sponge_size, block_size, radius, hebbian):
+    topology = SpongeTopology(sponge_size, block_size)
+    kernel = EntanglementKernel(topology, 0.15, radius)
+    ref_hebb = HebbianUpdater(lr=0.05, decay=0.9) if hebbian else None
+    kernel_hebb = HebbianUpdater(lr=0.05, decay=0.9) if hebbian else None
+    rng = np.random.default_rng(0)
+    expected = rng.standard_normal(sponge_size).astype(np.float32)
+    actual = expected.copy()
+    # Several writes in a row, so the Hebbian trace carries across calls too
+    for _ in range(3):
+        sponge = rng.standard_normal(sponge_size).astype(np.float32)
+        expected = apply_reference(topology, expected, sponge, 0.15, radius, ref_hebb)
+        actual = kernel.apply(actual, sponge, kernel_hebb)
+        assert actual.shape == sponge_size
+        np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
@@ -0,0 +1,34 @@
+from memory.key_index import AppendOnlyIndex
+
+
+def test_torn_tail_is_dropped_and_later_sets_survive(tmp_path):
+    path = str(tmp_path / "index.json")
+    index = AppendOnlyIndex(path)
+    index.set("a", 1)
+    index.set_many([("b", 2), ("c", 3)])
+    index.delete_many(["b"])
+    index.close()
+    # Crash in the middle of an append
+    with open(path + ".log", "a", encoding="utf-8") as f:
+        f.write('{"k": "d", "v"')
+
+    index = AppendOnlyIndex(path)
+    assert dict(index.items()) == {"a": 1, "c": 3}
+    index.set("e", 5)
+    index.close()
+
+    index = AppendOnlyIndex(path)
+    assert dict(index.items()) == {"a": 1, "c": 3, "e": 5}
+    index.close()
+
+
+def test_compaction_folds_log_into_snapshot(tmp_path):
+    path = str(tmp_path / "index.json")
+    index = AppendOnlyIndex(path, min_compact=4)
+    for i in range(10):
+        index.set(str(i), i)
+    index.close()
+
+    index = AppendOnlyIndex(path)
+    assert dict(index.items()) == {str(i): i for i in range(10)}
+    index.close()
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from memory.memory_hffs import HFFSMemory
+from memory.tensor_network import LowRankCodec
+
+SIZE = (4, 4, 4)
+
+
+@pytest.mark.parametrize("storage", ["files", "packed"])
+def test_import_skips_non_finite_states(tmp_path, storage):
+    rng = np.random.default_rng(0)
+    good = rng.random(SIZE).astype(np.float32)
+    np.save(tmp_path / "good.npy", good)
+    np.save(tmp_path / "bad.npy", np.full(SIZE, np.nan, dtype=np.float32))
+
+    mem = HFFSMemory(str(tmp_path), sponge_size=SIZE, storage=storage, codec=LowRankCodec(rank=2))
+
+    assert mem.keys() == ["good"]
+    assert np.isfinite(mem.load("good")).all()
+    mem.stop()
+
+
+def test_packed_load_returns_a_copy(tmp_path):
+    rng = np.random.default_rng(1)
+    first, second = rng.random(SIZE), rng.random(SIZE)
+    mem = HFFSMemory(str(tmp_path), sponge_size=SIZE, storage="packed")
+    mem.store("a", first)
+    loaded = mem.load("a")
+    mem.store("a", second)
+
+    np.testing.assert_allclose(loaded, first, rtol=1e-6)
+    loaded += 1.0
+    np.testing.assert_allclose(mem.load("a"), second, rtol=1e-6)
+    mem.stop()
+
+
+def test_legacy_files_are_imported_once(tmp_path):
+    rng = np.random.default_rng(2)
+    np.save(tmp_path / "old.npy", rng.random(SIZE).astype(np.float32))
+
+    mem = HFFSMemory(str(tmp_path), sponge_size=SIZE, storage="packed")
+    assert mem.keys() == ["old"]
+    mem.delete_many(["old"])
+    mem.stop()
+
+    mem = HFFSMemory(str(tmp_path), sponge_size=SIZE, storage="packed")
+    assert mem.keys() == []
+    mem.stop()
+
+
+@pytest.mark.parametrize("storage", ["files", "packed"])
+def test_compressed_store_reloads_within_truncation_error(tmp_path, storage):
+    rng = np.random.default_rng(3)
+    state = rng.standard_normal(SIZE).astype(np.float32)
+    # Eckart-Young: the best rank-2 approximation misses exactly the tail singular values
+    s = np.linalg.svd(state.reshape(SIZE[0], -1), compute_uv=False)
+    bound = float(np.sqrt((s[2:] ** 2).sum()))
+    mem = HFFSMemory(str(tmp_path), sponge_size=SIZE, storage=storage, codec=LowRankCodec(rank=2))
+    mem.store("k", state)
+
+    err = float(np.linalg.norm(mem.load("k") - state))
+    assert err == pytest.approx(bound, rel=1e-3)
+    # Novelty is scored on the exact input, not the reconstruction
+    assert mem.distance_to_nearest(state) == pytest.approx(0.0, abs=1e-5)
+    mem.stop()
+
+    mem = HFFSMemory(str(tmp_path), sponge_size=SIZE, storage=storage, codec=LowRankCodec(rank=2))
+    assert float(np.linalg.norm(mem.load("k") - state)) == pytest.approx(bound, rel=1e-3)
+    mem.stop()
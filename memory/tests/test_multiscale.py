@@ -0,0 +1,43 @@
+import logging
+import os
+
+import numpy as np
+
+from memory.multiscale import create_multiscale
+from memory.sponge_memory import EntangledSpongeMemory
+
+SIZE = (20, 20, 20)
+
+
+def test_first_start_adopts_root_index_and_signatures(tmp_path, caplog):
+    base = str(tmp_path)
+    rng = np.random.default_rng(0)
+    states = rng.standard_normal((3,) + SIZE).astype(np.float32)
+    # Layout before scales got their own directories: everything in memory_base
+    old = EntangledSpongeMemory(base, SIZE, block_size=(7, 7, 7), holographic_dim=64)
+    old.store_many(["a", "b", "c"], states)
+    old.stop()
+
+    config = {
+        "filepaths": {"memory_base": base, "sponge_size": list(SIZE)},
+        "memory": {"holographic_dim": 64, "projection_cache": ""},
+    }
+    with caplog.at_level(logging.INFO, logger="memory.multiscale"):
+        mem = create_multiscale(config)
+
+    assert sorted(mem.primary.keys()) == ["a", "b", "c"]
+    assert abs(mem.distance_to_nearest(states[1])) < 1e-5
+    grid = mem.primary.topology.grid
+    for blocks in mem.primary.key_blocks(["a", "b", "c"]):
+        assert all(all(0 <= i < g for i, g in zip(b, grid)) for b in blocks)
+    assert mem.load("a").shape == SIZE
+    assert not os.path.exists(os.path.join(base, "index.json"))
+    assert "not used" in caplog.text
+    mem.stop()
+
+    # Later starts leave the scale directories alone
+    caplog.clear()
+    mem = create_multiscale(config)
+    assert sorted(mem.primary.keys()) == ["a", "b", "c"]
+    assert "not used" not in caplog.text
+    mem.stop()
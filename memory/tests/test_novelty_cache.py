@@ -0,0 +1,91 @@
+import threading
+
+import numpy as np
+import pytest
+
+from memory.memory_hffs import HFFSMemory
+from memory.novelty_cache import CachedNoveltyMemory, NoveltyCache
+
+SIZE = (4, 4, 4)
+
+
+def _cached(path, cache, name="hffs"):
+    backend = HFFSMemory(str(path / name), sponge_size=SIZE)
+    calls = []
+    single, batch = backend.distance_to_nearest, backend.distance_to_nearest_batch
+    backend.distance_to_nearest = lambda v: calls.append(1) or single(v)
+    backend.distance_to_nearest_batch = lambda vs: calls.append(len(vs)) or batch(vs)
+    return CachedNoveltyMemory(backend, cache), calls
+
+
+def test_repeated_queries_are_served_from_the_cache(tmp_path):
+    cache = NoveltyCache(capacity=8)
+    mem, calls = _cached(tmp_path, cache)
+    rng = np.random.default_rng(0)
+    mem.store("a", rng.standard_normal(SIZE).astype(np.float32))
+    queries = rng.standard_normal((3,) + SIZE).astype(np.float32)
+
+    first = mem.distance_to_nearest(queries[0])
+    assert mem.distance_to_nearest(queries[0].copy()) == first
+    assert calls == [1]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # A batch only sends its uncached rows to the backend
+    out = mem.distance_to_nearest_batch(queries)
+    assert calls == [1, 2]
+    assert out[0] == first
+    np.testing.assert_allclose(out, mem.backend.distance_to_nearest_batch(queries), rtol=1e-6)
+    assert cache.hit_rate() == pytest.approx(2 / 5)
+    mem.stop()
+
+
+def test_store_invalidates_only_its_own_scope(tmp_path):
+    cache = NoveltyCache(capacity=8)
+    mem, calls = _cached(tmp_path, cache, "one")
+    other, other_calls = _cached(tmp_path, cache, "two")
+    rng = np.random.default_rng(1)
+    seed = rng.standard_normal(SIZE).astype(np.float32)
+    query = rng.standard_normal(SIZE).astype(np.float32)
+    mem.store("a", seed)
+    other.store("a", seed)
+
+    stale = mem.distance_to_nearest(query)
+    other_value = other.distance_to_nearest(query)
+    assert stale > 0.1
+    mem.store("q", query)
+    # The cached distance predates the store and must not be served
+    assert mem.distance_to_nearest(query) == pytest.approx(0.0, abs=1e-5)
+    assert mem.distance_to_nearest_batch(query[None])[0] == pytest.approx(0.0, abs=1e-5)
+    assert len(calls) == 2
+    # The other wrapper's entry survives a store it did not see
+    assert other.distance_to_nearest(query) == other_value
+    assert other_calls == [1]
+    mem.stop()
+    other.stop()
+
+
+def test_result_computed_across_a_store_is_not_cached(tmp_path):
+    cache = NoveltyCache(capacity=8)
+    mem, calls = _cached(tmp_path, cache)
+    rng = np.random.default_rng(2)
+    mem.store("a", rng.standard_normal(SIZE).astype(np.float32))
+    query = rng.standard_normal(SIZE).astype(np.float32)
+    entered, release = threading.Event(), threading.Event()
+    slow = mem.backend.distance_to_nearest
+
+    def gated(v):
+        entered.set()
+        release.wait(10)
+        return slow(v)
+
+    mem.backend.distance_to_nearest = gated
+    reader = threading.Thread(target=mem.distance_to_nearest, args=(query,))
+    reader.start()
+    entered.wait(10)
+    mem.store("q", query)  # lands while the old answer is being computed
+    release.set()
+    reader.join(10)
+    assert not cache._entries
+    mem.backend.distance_to_nearest = slow
+    assert mem.distance_to_nearest(query) == pytest.approx(0.0, abs=1e-5)
+    mem.stop()
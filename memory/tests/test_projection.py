@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+import pytest
+
+from memory import projection
+from memory.projection import SRHTProjection, dense_projection
+
+
+def _single_draw(seed, shape, dtype=np.float32):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 1.0 / math.sqrt(shape[0]), size=shape).astype(dtype)
+
+
+@pytest.mark.parametrize("shape", [(1, 5), (64, 20), (150, 37)])
+def test_chunked_generation_equals_a_single_draw(shape):
+    out = projection._generate(7, shape, np.dtype(np.float32), np.empty(shape, dtype=np.float32))
+    np.testing.assert_array_equal(out, _single_draw(7, shape))
+
+
+def test_cached_memmap_equals_a_fresh_draw(tmp_path, monkeypatch):
+    shape = (130, 48)
+    monkeypatch.setattr(projection, "_REGISTRY", {})
+    built = dense_projection(11, shape, cache_dir=str(tmp_path))
+    # A second process: empty registry, so the matrix comes back from the cache file
+    monkeypatch.setattr(projection, "_REGISTRY", {})
+    cached = dense_projection(11, shape, cache_dir=str(tmp_path))
+    assert cached is not built
+    assert isinstance(cached.matrix, np.memmap)
+    assert not cached.matrix.flags.writeable
+    expected = _single_draw(11, shape)
+    np.testing.assert_array_equal(built.matrix, expected)
+    np.testing.assert_array_equal(cached.matrix, expected)
+    assert [p.name for p in tmp_path.iterdir()] == [f"holo_11_{shape[0]}x{shape[1]}_float32.npy"]
+
+
+@pytest.mark.parametrize("shape", [(16, 100), (32, 64), (8, 9)])
+def test_srht_adjoint_is_the_transpose(shape):
+    proj = SRHTProjection(3, shape)
+    rng = np.random.default_rng(0)
+    xs = rng.standard_normal((5, shape[1])).astype(np.float32)
+    ys = rng.standard_normal((5, shape[0])).astype(np.float32)
+    forward = proj.forward_many(xs)
+    for x, y, fx in zip(xs, ys, forward):
+        np.testing.assert_allclose(proj.forward(x), fx, rtol=1e-5, atol=1e-5)
+        # <P x, y> == <x, P^T y>
+        assert float(fx @ y) == pytest.approx(float(x @ proj.adjoint(y)), rel=1e-4, abs=1e-4)
+    # Materialized, the adjoint is exactly the transpose of the forward map
+    matrix = proj.forward_many(np.eye(shape[1], dtype=np.float32)).T
+    adjoint = np.stack([proj.adjoint(e) for e in np.eye(shape[0], dtype=np.float32)], axis=1)
+    np.testing.assert_allclose(adjoint, matrix.T, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from memory.quantize import BlockQuantizedTensor
+
+SHAPE = (7, 6, 5)
+BLOCK = (3, 3, 3)
+
+
+def _tensor(tmp_path):
+    rng = np.random.default_rng(0)
+    tensor = BlockQuantizedTensor(str(tmp_path / "t.i8"), SHAPE, BLOCK, mode="w+")
+    tensor[...] = rng.standard_normal(SHAPE)
+    return tensor, rng
+
+
+def test_sliced_write_requantizes_touched_blocks_only(tmp_path):
+    tensor, rng = _tensor(tmp_path)
+    before = tensor[...]
+    patch = 10.0 * rng.standard_normal((2, 4, 5))
+    tensor[4:6, 1:5] = patch
+
+    after = tensor[...]
+    step = tensor.params[..., 0].max()
+    np.testing.assert_allclose(after[4:6, 1:5], patch, atol=step / 2 + 1e-6)
+    # Blocks along x 0..2 are not touched by rows 4:6
+    np.testing.assert_array_equal(after[:3], before[:3])
+
+    # Reopening reads the same values back from the file
+    tensor.flush()
+    reopened = BlockQuantizedTensor(str(tmp_path / "t.i8"), SHAPE, BLOCK, mode="r")
+    np.testing.assert_array_equal(reopened[...], after)
+
+
+def test_integer_and_negative_index_writes(tmp_path):
+    tensor, _ = _tensor(tmp_path)
+    tensor[-1, 0, 2] = 3.0
+    tensor[0, ..., 1] = np.full((6,), -2.0)
+    assert tensor[6, 0, 2] == pytest.approx(3.0, abs=tensor.params[2, 0, 0, 0] / 2 + 1e-6)
+    np.testing.assert_allclose(tensor[0, :, 1], -2.0, atol=tensor.params[0, ..., 0].max() / 2 + 1e-6)
+
+
+@pytest.mark.parametrize("idx", [(slice(0, 6, 2),), (np.array([0, 1]),), ([True] * 7,)])
+def test_unsupported_write_indices_raise_type_error(tmp_path, idx):
+    tensor, _ = _tensor(tmp_path)
+    with pytest.raises(TypeError):
+        tensor[idx] = 0.0
@@ -0,0 +1,123 @@
+import threading
+
+import numpy as np
+import pytest
+
+from memory.memmap_replay import MemmapReplayBuffer
+from memory.prioritized_replay import PrioritizedReplayBuffer
+from memory.sharded_replay import ShardedReplayBuffer
+from memory.sum_tree import MinTree, SumTree
+
+
+def test_sum_tree_find_matches_cumulative_sum():
+    rng = np.random.default_rng(0)
+    values = rng.random(1000)
+    tree = SumTree(1000, fanout=8)
+    tree.update(np.arange(1000), values)
+    tree.set(17, 5.0)
+    values[17] = 5.0
+
+    assert tree.total() == pytest.approx(values.sum())
+    prefix = rng.random(200) * values.sum()
+    expected = np.searchsorted(np.cumsum(values), prefix, side="right")
+    np.testing.assert_array_equal(tree.find(prefix), expected)
+
+
+def test_min_tree_tracks_updates():
+    tree = MinTree(100, fanout=4)
+    tree.update(np.arange(100), np.arange(100, 200, dtype=np.float64))
+    assert tree.min() == 100.0
+    tree.set(42, 3.0)
+    assert tree.min() == 3.0
+    tree.update([42], [500.0])
+    assert tree.min() == 100.0
+
+
+def test_prioritized_sampling_follows_priorities():
+    buf = PrioritizedReplayBuffer(capacity=4, alpha=1.0, epsilon=0.0, dim=2)
+    buf.add_many(np.arange(8, dtype=np.float32).reshape(4, 2), [1.0, 1.0, 1.0, 97.0])
+    counts = np.zeros(4)
+    for _ in range(200):
+        _, idxs, weights = buf.sample_batch(4, beta=1.0)
+        counts += np.bincount(idxs, minlength=4)
+        assert weights.max() <= 1.0 + 1e-6
+    assert counts[3] / counts.sum() > 0.7
+
+    buf.update_priorities([3], [1.0])
+    _, idxs, weights = buf.sample_batch(4, beta=1.0)
+    assert sorted(idxs.tolist()) == [0, 1, 2, 3]
+    np.testing.assert_allclose(weights, 1.0)
+
+
+def test_ring_overwrites_oldest_rows():
+    buf = PrioritizedReplayBuffer(capacity=3, dim=1)
+    buf.add_many(np.arange(5, dtype=np.float32).reshape(5, 1), np.ones(5))
+    assert buf.size() == 3
+    batch, _, _ = buf.sample_batch(3)
+    assert sorted(batch.reshape(-1).tolist()) == [2.0, 3.0, 4.0]
+
+
+def test_memmap_replay_reopens_rows_and_priorities(tmp_path):
+    path = str(tmp_path / "replay.mmap")
+    buf = MemmapReplayBuffer(path, capacity=8, dim=3, alpha=1.0, epsilon=0.0)
+    buf.add_many(np.arange(15, dtype=np.float32).reshape(5, 3), [1.0, 2.0, 3.0, 4.0, 5.0])
+    buf.update_priorities([0], [10.0])
+    with pytest.raises(RuntimeError):
+        MemmapReplayBuffer(path, capacity=8, dim=3)
+
+    reader = MemmapReplayBuffer(path, readonly=True)
+    buf.add(np.full(3, 99.0), 6.0)
+    batch, idxs, _ = reader.sample_batch(6)
+    assert 5 in idxs.tolist() and 99.0 in batch
+    with pytest.raises(RuntimeError):
+        reader.add(np.zeros(3), 1.0)
+    buf.close()
+
+    buf = MemmapReplayBuffer(path, capacity=8, dim=3, alpha=1.0, epsilon=0.0)
+    assert buf.size() == 6
+    np.testing.assert_allclose(buf._sum.leaves(np.arange(6)), [10.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    np.testing.assert_array_equal(buf.storage.gather([1]), [[3.0, 4.0, 5.0]])
+    buf.close()
+
+    # A different shape starts empty
+    buf = MemmapReplayBuffer(path, capacity=4, dim=3)
+    assert buf.size() == 0
+    buf.close()
+
+
+def test_sharded_priorities_route_to_their_shard():
+    shards = [PrioritizedReplayBuffer(capacity=4, alpha=1.0, epsilon=0.0, dim=1) for _ in range(2)]
+    buf = ShardedReplayBuffer(shards)
+    buf.add_many(np.arange(6, dtype=np.float32).reshape(6, 1), np.ones(6))
+    assert [s.size() for s in shards] == [3, 3]
+
+    _, idxs, _ = buf.sample_batch(6)
+    buf.update_priorities(idxs, np.full(len(idxs), 2.0))
+    for idx in set(idxs.tolist()):
+        assert shards[idx % 2]._sum.leaves([idx // 2])[0] == 2.0
+    assert sum(s._sum.total() for s in shards) == pytest.approx(6 + len(set(idxs.tolist())))
+
+
+@pytest.mark.parametrize("n_shards", [3, 4])
+def test_hash_insertion_spreads_producer_threads_over_shards(n_shards):
+    shards = [PrioritizedReplayBuffer(capacity=64, dim=1) for _ in range(n_shards)]
+    buf = ShardedReplayBuffer(shards, insertion="hash")
+    start = threading.Barrier(9, timeout=10)
+
+    def produce(i):
+        start.wait()  # all alive at once, so idents are distinct
+        for _ in range(4):
+            buf.add(np.full(1, i, dtype=np.float32))
+
+    threads = [threading.Thread(target=produce, args=(i,)) for i in range(9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    sizes = [s.size() for s in shards]
+    assert sum(sizes) == 36
+    assert all(size > 0 for size in sizes), sizes
+    # Each thread stays on one shard
+    for i in range(9):
+        assert sum(int((s.storage.data[:s.size(), 0] == i).any()) for s in shards) == 1
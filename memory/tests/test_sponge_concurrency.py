@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from memory.rwlock import RWLock
+from memory.sponge_memory import EntangledSpongeMemory
+
+SIZE = (6, 6, 6)
+
+
+def test_rwlock_readers_share_and_waiting_writer_goes_next():
+    lock = RWLock()
+    inside = threading.Barrier(2, timeout=10)
+    order = []
+
+    def reader(tag):
+        with lock.read():
+            inside.wait()  # both readers hold the lock at once
+            order.append(tag)
+
+    readers = [threading.Thread(target=reader, args=(f"r{i}",)) for i in range(2)]
+    for t in readers:
+        t.start()
+    for t in readers:
+        t.join(timeout=10)
+    assert sorted(order) == ["r0", "r1"]
+
+    held = threading.Event()
+    release = threading.Event()
+
+    def long_reader():
+        with lock.read():
+            held.set()
+            release.wait(10)
+
+    def writer():
+        with lock.write():
+            order.append("w")
+
+    def late_reader():
+        with lock.read():
+            order.append("late")
+
+    first = threading.Thread(target=long_reader)
+    first.start()
+    held.wait(10)
+    w = threading.Thread(target=writer)
+    w.start()
+    while not lock._waiting_writers:
+        time.sleep(0.001)
+    # A reader arriving behind a waiting writer queues instead of starving it
+    late = threading.Thread(target=late_reader)
+    late.start()
+    while not lock._waiting_readers:
+        time.sleep(0.001)
+    release.set()
+    for t in (first, w, late):
+        t.join(timeout=10)
+    assert order[2:] == ["w", "late"]
+
+
+@pytest.mark.parametrize("concurrency", ["rw", "lock"])
+def test_readers_and_writer_make_progress(tmp_path, concurrency):
+    mem = EntangledSpongeMemory(str(tmp_path), SIZE, block_size=(3, 3, 3), holographic_dim=64, concurrency=concurrency)
+    rng = np.random.default_rng(0)
+    known = rng.standard_normal((4,) + SIZE).astype(np.float32)
+    mem.store_many([f"known{i}" for i in range(4)], known)
+    incoming = rng.standard_normal((30,) + SIZE).astype(np.float32)
+
+    writer_done = threading.Event()
+    reads = [0] * 4
+    errors = []
+
+    def reader(i):
+        try:
+            # Keep reading until the writer finishes, so a starved writer shows up as a timeout
+            while not writer_done.is_set():
+                dist = mem.distance_to_nearest(known[i])
+                assert abs(dist) < 1e-5, dist
+                reads[i] += 1
+        except Exception as e:
+            errors.append(e)
+
+    def writer():
+        try:
+            for j, state in enumerate(incoming):
+                mem.store(f"new{j}", state)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            writer_done.set()
+
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(4)]
+    threads.append(threading.Thread(target=writer, daemon=True))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=60)
+
+    assert not any(t.is_alive() for t in threads), "deadlock or starved writer"
+    assert not errors, errors
+    assert writer_done.is_set()
+    assert all(n > 0 for n in reads), reads
+    assert sorted(mem.keys()) == sorted([f"known{i}" for i in range(4)] + [f"new{j}" for j in range(30)])
+    for j in (0, 29):
+        assert abs(mem.distance_to_nearest(incoming[j])) < 1e-5
+    mem.stop()
+
+
+@pytest.mark.parametrize("concurrency, overlap", [("rw", True), ("lock", False)])
+def test_readers_run_inside_the_lock_together(tmp_path, concurrency, overlap):
+    mem = EntangledSpongeMemory(str(tmp_path), SIZE, block_size=(3, 3, 3), holographic_dim=64, concurrency=concurrency)
+    rng = np.random.default_rng(0)
+    states = rng.standard_normal((4,) + SIZE).astype(np.float32)
+    mem.store_many([f"k{i}" for i in range(4)], states)
+    # Every reader waits for the others inside the scoring call: it only
+    # completes if all of them hold the read side at once
+    meet = threading.Barrier(4, timeout=2)
+    scan = mem._signatures.nearest_cosine_batch
+
+    def meeting_scan(sigs):
+        meet.wait()
+        return scan(sigs)
+
+    mem._signatures.nearest_cosine_batch = meeting_scan
+    results = []
+
+    def reader(i):
+        try:
+            results.append(mem.distance_to_nearest_batch(states[i:i + 1])[0])
+        except threading.BrokenBarrierError:
+            results.append(None)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+    assert not any(t.is_alive() for t in threads)
+    if overlap:
+        assert all(r is not None and abs(r) < 1e-5 for r in results), results
+    else:
+        assert None in results
+    mem.stop()
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 4, reason="needs 4 CPUs")
+def test_read_throughput_scales_with_readers(tmp_path):
+    mem = EntangledSpongeMemory(str(tmp_path), (16, 16, 16), block_size=(8, 8, 8), holographic_dim=256, storage="ram", concurrency="rw")
+    rng = np.random.default_rng(0)
+    mem.store_many([f"k{i}" for i in range(2000)], rng.standard_normal((2000, 16, 16, 16)).astype(np.float32))
+    queries = rng.standard_normal((64, 16, 16, 16)).astype(np.float32)
+    rounds = 16
+
+    def run(n_threads):
+        def reader():
+            for _ in range(rounds // n_threads):
+                mem.distance_to_nearest_batch(queries)
+        threads = [threading.Thread(target=reader) for _ in range(n_threads)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - start
+
+    run(1)  # warm up
+    single = min(run(1) for _ in range(3))
+    parallel = min(run(4) for _ in range(3))
+    # The same work split over 4 readers; numpy releases the GIL in the scan
+    assert single / parallel > 1.3, (single, parallel)
+    mem.stop()
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from memory.hebbian import BlockHebbian, HebbianUpdater
+from memory import sponge_memory
+from memory.sponge_memory import EntangledSpongeMemory, SpongeTopology
+
+SIZE = (6, 6, 6)
+
+
+def _sponge(path, **kwargs):
+    return EntangledSpongeMemory(str(path), SIZE, block_size=(3, 3, 3), holographic_dim=64, **kwargs)
+
+
+@pytest.mark.parametrize("storage", ["files", "ram", "memmap"])
+def test_stores_survive_without_stop_by_default(tmp_path, storage):
+    rng = np.random.default_rng(0)
+    states = rng.standard_normal((3,) + SIZE).astype(np.float32)
+    mem = _sponge(tmp_path, storage=storage)
+    mem.store_many(["a", "b"], states[:2])
+    mem.store("c", states[2])
+    expected = mem.load("b")
+    correction = mem.global_correction()
+    # No stop(): simulate a crash by opening the directory again
+    reopened = _sponge(tmp_path, storage=storage)
+
+    assert sorted(reopened.keys()) == ["a", "b", "c"]
+    for state in states:
+        assert abs(reopened.distance_to_nearest(state)) < 1e-5
+    np.testing.assert_allclose(reopened.global_correction(), correction, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(reopened.load("b"), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_block_hebbian_matches_scan_on_one_block(tmp_path):
+    # With a single block there is no neighbor to feed the scan's shared trace,
+    # so both modes must leave the same sponge after every write
+    rng = np.random.default_rng(0)
+    states = rng.standard_normal((5,) + SIZE).astype(np.float32)
+    mems = [
+        EntangledSpongeMemory(str(tmp_path / mode), SIZE, block_size=SIZE, holographic_dim=64, storage="ram", hebbian_lr=0.05, hebbian_decay=0.9, hebbian_mode=mode)
+        for mode in ("scan", "block")
+    ]
+    for i, state in enumerate(states):
+        for mem in mems:
+            mem.store(f"k{i}", state)
+        np.testing.assert_allclose(mems[1].load(f"k{i}"), mems[0].load(f"k{i}"), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(mems[1]._hebbian.trace.reshape(()), mems[0]._hebbian.trace, rtol=1e-5, atol=1e-7)
+    for mem in mems:
+        mem.stop()
+
+
+def test_block_hebbian_matches_one_scan_updater_per_block():
+    block_size = (3, 3, 2)
+    shape = (7, 6, 5)  # ragged edge blocks on two axes
+    topology = SpongeTopology(shape, block_size)
+    block = BlockHebbian(topology.grid, lr=0.05, decay=0.9)
+    updaters = {idx: HebbianUpdater(lr=0.05, decay=0.9) for idx in topology.iter_blocks()}
+    rng = np.random.default_rng(1)
+    sponge = rng.standard_normal(shape).astype(np.float32)
+    expected = sponge.copy()
+    for _ in range(3):
+        pre = rng.standard_normal(shape).astype(np.float32)
+        sponge = block.update(sponge, pre, block_size)
+        for idx, updater in updaters.items():
+            bounds = topology.block_bounds(idx)
+            expected[bounds] = updater.update(expected[bounds], pre=pre[bounds], post=expected[bounds])
+        np.testing.assert_allclose(sponge, expected, rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("ann", ["none", "lsh"])
+def test_retention_drops_expired_keys_and_keeps_the_rest(tmp_path, monkeypatch, ann):
+    clock = [1000.0]
+    monkeypatch.setattr(sponge_memory, "time_now", lambda: clock[0])
+    config = {
+        "filepaths": {"memory_base": str(tmp_path), "sponge_size": list(SIZE)},
+        "memory": {"block_size": [3, 3, 3], "holographic_dim": 64, "projection_cache": "", "retention_ttl": 100.0, "ann": ann, "ann_bits": 4, "ann_tables": 2},
+    }
+    rng = np.random.default_rng(0)
+    states = {f"k{i}": rng.standard_normal(SIZE).astype(np.float32) for i in range(8)}
+    old, fresh = ["k0", "k2", "k4", "k6"], ["k1", "k3", "k5", "k7"]
+    mem = sponge_memory.create(config)
+    for key in old:
+        mem.store(key, states[key])
+    clock[0] += 60.0
+    for key in fresh:
+        mem.store(key, states[key])
+    expected = mem.load_many(fresh)
+
+    clock[0] += 60.0  # the first half is now past the TTL
+    assert mem.compact() == len(old)
+    assert sorted(mem.keys()) == fresh
+    # Interleaved victims force the survivors' signature rows to move
+    for key in old:
+        assert abs(mem.distance_to_nearest(states[key])) > 1e-3
+        np.testing.assert_array_equal(mem.load(key), np.zeros(SIZE, dtype=np.float32))
+    np.testing.assert_allclose(mem.distance_to_nearest_batch(np.stack([states[k] for k in fresh])), 0.0, atol=1e-5)
+    np.testing.assert_allclose(mem.load_many(fresh), expected, rtol=1e-6)
+    mem.stop()
+
+    reopened = sponge_memory.create(config)
+    assert sorted(reopened.keys()) == fresh
+    for key in fresh:
+        assert abs(reopened.distance_to_nearest(states[key])) < 1e-5
+    reopened.stop()
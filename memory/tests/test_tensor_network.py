@@ -0,0 +1,59 @@
+import threading
+
+import numpy as np
+
+from memory.tensor_network import TensorNetworkCompressor
+
+SIZE = (2, 2, 2)
+
+
+class SlowBackend:
+    """Dict backend whose load can be paused after reading the old value."""
+
+    sponge_size = SIZE
+
+    def __init__(self):
+        self.data = {}
+        self.read = threading.Event()
+        self.resume = threading.Event()
+        self.resume.set()
+
+    def store(self, key, vector):
+        self.data[key] = np.asarray(vector, dtype=np.float32).reshape(SIZE)
+
+    def store_many(self, keys, vectors):
+        for key, vector in zip(keys, vectors):
+            self.store(key, vector)
+
+    def load(self, key):
+        value = self.data[key].copy()
+        self.read.set()
+        self.resume.wait(10)
+        return value
+
+    def load_many(self, keys):
+        return np.stack([self.load(key) for key in keys], axis=0)
+
+
+def test_load_racing_a_store_does_not_cache_the_old_value():
+    backend = SlowBackend()
+    comp = TensorNetworkCompressor(backend, cache_size=8)
+    comp.store("k", np.zeros(SIZE))
+
+    backend.resume.clear()
+    reader = threading.Thread(target=comp.load, args=("k",))
+    reader.start()
+    backend.read.wait(10)
+    comp.store("k", np.ones(SIZE))
+    backend.resume.set()
+    reader.join(10)
+
+    np.testing.assert_array_equal(comp.load("k"), np.ones(SIZE))
+
+
+def test_load_returns_a_copy_of_the_cached_state():
+    comp = TensorNetworkCompressor(SlowBackend(), cache_size=8)
+    comp.store("k", np.ones(SIZE))
+    comp.load("k")[...] = 5.0
+    comp.load_many(["k"])[0][...] = 5.0
+    np.testing.assert_array_equal(comp.load("k"), np.ones(SIZE))
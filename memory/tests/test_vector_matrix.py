@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from memory.ann import LSHIndex
+from memory.memory_hffs import HFFSMemory
+from memory.vector_matrix import VectorMatrix
+
+
+@pytest.mark.parametrize("precision", ["float32", "int8"])
+def test_remove_many_keeps_rows_contiguous_and_persisted(tmp_path, precision):
+    rng = np.random.default_rng(0)
+    vecs = {f"k{i}": rng.standard_normal(8).astype(np.float32) for i in range(6)}
+    path = str(tmp_path / "m.f32")
+    vm = VectorMatrix(8, path=path, precision=precision)
+    vm.extend(list(vecs), np.stack(list(vecs.values())))
+
+    changed = vm.remove_many(["k1", "k5", "missing", "k0"])
+
+    assert len(vm) == 3
+    assert sorted(vm.keys()) == ["k2", "k3", "k4"]
+    assert all(row < 3 for row in changed.tolist())
+    for key in vm.keys():
+        np.testing.assert_allclose(vm.get(key), vecs[key], atol=0.05)
+        row, dist = vm.nearest_euclidean(vecs[key])
+        assert vm.keys()[row] == key and dist < 0.1
+    vm.flush()
+
+    reopened = VectorMatrix(8, path=path, precision=precision)
+    assert reopened.keys() == vm.keys()
+    np.testing.assert_array_equal(reopened.matrix(), vm.matrix())
+
+
+def test_index_follows_removed_and_moved_rows():
+    rng = np.random.default_rng(1)
+    keys = [f"k{i}" for i in range(12)]
+    vm = VectorMatrix(8)
+    vm.extend(keys, rng.standard_normal((12, 8)).astype(np.float32))
+    index = LSHIndex(8, n_bits=6, n_tables=4)
+    index.sync(vm.matrix(), vm.keys())
+
+    changed = vm.remove_many(keys[:4])
+    index.truncate(len(vm))
+    index.add_many(changed, vm.matrix()[changed])
+
+    assert len(index) == len(vm) == 8
+    for row, vec in enumerate(vm.matrix()):
+        assert row in index.candidates(vec).tolist()
+
+
+def test_hffs_delete_keeps_ann_results_exact(tmp_path):
+    rng = np.random.default_rng(2)
+    size = (4, 4, 4)
+    states = rng.standard_normal((10,) + size).astype(np.float32)
+    mem = HFFSMemory(str(tmp_path), sponge_size=size, storage="packed")
+    mem.attach_index(LSHIndex(64, n_bits=6, n_tables=4))
+    mem.store_many([f"k{i}" for i in range(10)], states)
+
+    mem.delete_many(["k0", "k3", "k7"])
+
+    for i in (1, 2, 4, 5, 6, 8, 9):
+        assert mem.distance_to_nearest(states[i]) == pytest.approx(0.0, abs=1e-5)
+    mem.stop()
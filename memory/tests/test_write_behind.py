@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+import pytest
+
+from memory.write_behind import WriteBehindMemory
+
+SIZE = (2, 2, 2)
+
+
+class RecordingBackend:
+    sponge_size = SIZE
+
+    def __init__(self):
+        self.data = {}
+        self.log = []
+        self.flushes = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def store_many(self, keys, vectors):
+        self.gate.wait(10)
+        for key, vec in zip(keys, vectors):
+            self.data[key] = np.array(vec)
+            self.log.append(key)
+
+    def load(self, key):
+        return self.data[key].copy()
+
+    def load_many(self, keys):
+        return np.stack([self.data[key] for key in keys], axis=0)
+
+    def flush(self):
+        self.flushes += 1
+
+
+def test_flush_waits_for_queued_stores_in_order():
+    backend = RecordingBackend()
+    mem = WriteBehindMemory(backend, max_pending=16, batch_size=3)
+    backend.gate.clear()
+    for i in range(8):
+        mem.store(f"k{i}", np.full(SIZE, i))
+    # Read-your-writes while the backend is stalled
+    np.testing.assert_array_equal(mem.load("k5"), np.full(SIZE, 5))
+    backend.gate.set()
+    mem.flush()
+
+    assert backend.log == [f"k{i}" for i in range(8)]
+    assert backend.flushes == 1
+    assert mem.pending() == 0
+    mem.close()
+
+
+def test_repeated_stores_coalesce_to_the_latest_value():
+    backend = RecordingBackend()
+    mem = WriteBehindMemory(backend, max_pending=16)
+    backend.gate.clear()
+    mem.store("busy", np.zeros(SIZE))  # keeps the writer blocked in store_many
+    for value in range(5):
+        mem.store("k", np.full(SIZE, value))
+    backend.gate.set()
+    mem.flush()
+
+    assert backend.log.count("k") == 1
+    np.testing.assert_array_equal(backend.data["k"], np.full(SIZE, 4))
+    mem.close()
+
+
+def test_close_drains_the_queue_then_rejects_stores():
+    backend = RecordingBackend()
+    mem = WriteBehindMemory(backend, max_pending=2, batch_size=1)
+    backend.gate.clear()
+    producer = threading.Thread(target=lambda: [mem.store(f"k{i}", np.full(SIZE, i)) for i in range(6)])
+    producer.start()
+    backend.gate.set()
+    producer.join(10)
+    mem.close()
+
+    assert sorted(backend.log) == [f"k{i}" for i in range(6)]
+    with pytest.raises(RuntimeError):
+        mem.store("late", np.zeros(SIZE))
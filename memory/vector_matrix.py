@@ -0,0 +1,285 @@
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .key_index import AppendOnlyIndex
+from .quantize import PRECISION_DTYPES, check_precision, dequantize_rows, quantize_rows
+
+# Rows converted to float32 at a time when scanning a reduced-precision matrix
+_SCAN_CHUNK = 8192
+
+
+class VectorMatrix:
+    """Growable, contiguous (n, dim) float32 matrix with a key->row table.
+
+    Row norms are cached so nearest-neighbor queries reduce to one
+    matrix-vector product over the stored rows. With ``path`` set the rows
+    live in an np.memmap file (grown by doubling) and the key->row table is
+    persisted next to it as an AppendOnlyIndex.
+
+    ``precision`` stores rows as float16, or int8 with a per-row (scale,
+    zero point) pair (in ``<path>.q`` when memory-mapped). Searches run on
+    the stored codes chunk by chunk; ``get`` and ``matrix`` dequantize.
+    """
+
+    def __init__(self, dim: int, capacity: int = 64, path: Optional[str] = None, precision: str = "float32"):
+        self.dim = int(dim)
+        self.path = path
+        self.precision = check_precision(precision)
+        self._dtype = np.dtype(PRECISION_DTYPES[self.precision])
+        capacity = max(1, int(capacity))
+        self._rows: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._table: Optional[AppendOnlyIndex] = None
+        self._qparams: Optional[np.ndarray] = None
+        if path is None:
+            self._data = np.zeros((capacity, self.dim), dtype=self._dtype)
+            if self.precision == "int8":
+                self._qparams = np.zeros((capacity, 2), dtype=np.float32)
+        else:
+            self._table = AppendOnlyIndex(path + ".keys.json", path + ".keys.log")
+            for key, row in sorted(self._table.items(), key=lambda kv: kv[1]):
+                self._rows[key] = int(row)
+                self._keys.append(key)
+            row_bytes = self.dim * self._dtype.itemsize
+            on_disk = os.path.getsize(path) // row_bytes if os.path.isfile(path) else 0
+            capacity = max(capacity, on_disk, len(self._keys))
+            self._data = self._map(self.path, self._dtype, capacity, self.dim)
+            if self.precision == "int8":
+                self._qparams = self._map(self.path + ".q", np.dtype(np.float32), capacity, 2)
+        self._sq_norms = np.zeros((self._data.shape[0],), dtype=np.float32)
+        self._norms = np.zeros_like(self._sq_norms)
+        n = len(self._keys)
+        for start in range(0, n, _SCAN_CHUNK):
+            stop = min(n, start + _SCAN_CHUNK)
+            rows = self._decode(slice(start, stop))
+            sq = np.einsum('ij,ij->i', rows, rows)
+            self._sq_norms[start:stop] = sq
+            self._norms[start:stop] = np.sqrt(sq)
+
+    @staticmethod
+    def _map(path: str, dtype: np.dtype, capacity: int, width: int) -> np.ndarray:
+        nbytes = capacity * width * dtype.itemsize
+        with open(path, 'ab') as f:
+            if f.tell() < nbytes:
+                f.truncate(nbytes)
+        return np.memmap(path, dtype=dtype, mode='r+', shape=(capacity, width))
+
+    def _decode(self, idx) -> np.ndarray:
+        """float32 rows for an index, slice or row array (a view at float32)."""
+        codes = self._data[idx]
+        if self.precision == "float32":
+            return codes
+        if self.precision == "float16":
+            return codes.astype(np.float32)
+        params = self._qparams[idx]
+        return dequantize_rows(codes, params[..., 0], params[..., 1])
+
+    def _dots(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """(B, m) inner products of queries with stored rows, without dequantizing the matrix.
+
+        For int8, x.q = scale * (code.q - zero * sum(q)), so only the codes
+        enter the matrix product and the affine part is a rank-1 correction.
+        """
+        m = len(self) if rows is None else len(rows)
+        if self.precision == "float32":
+            data = self._data[:m] if rows is None else self._data[rows]
+            return queries @ data.T
+        out = np.empty((queries.shape[0], m), dtype=np.float32)
+        q_sum = queries.sum(axis=1)[:, None]
+        for start in range(0, m, _SCAN_CHUNK):
+            stop = min(m, start + _SCAN_CHUNK)
+            sel = slice(start, stop) if rows is None else rows[start:stop]
+            dots = queries @ self._data[sel].astype(np.float32).T
+            if self.precision == "int8":
+                params = self._qparams[sel]
+                dots = (dots - params[None, :, 1] * q_sum) * params[None, :, 0]
+            out[:, start:stop] = dots
+        return out
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    @property
+    def row_nbytes(self) -> int:
+        """Storage of one row: codes plus the int8 (scale, zero point)."""
+        return self.dim * self._dtype.itemsize + (8 if self.precision == "int8" else 0)
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._data.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        n = len(self)
+        params = self._qparams
+        if self.path is None:
+            data = np.zeros((capacity, self.dim), dtype=self._dtype)
+            data[:n] = self._data[:n]
+            if params is not None:
+                params = np.zeros((capacity, 2), dtype=np.float32)
+                params[:n] = self._qparams[:n]
+        else:
+            self.flush()
+            del self._data
+            data = self._map(self.path, self._dtype, capacity, self.dim)
+            if params is not None:
+                del params, self._qparams
+                params = self._map(self.path + ".q", np.dtype(np.float32), capacity, 2)
+        sq = np.zeros((capacity,), dtype=np.float32)
+        sq[:n] = self._sq_norms[:n]
+        norms = np.zeros((capacity,), dtype=np.float32)
+        norms[:n] = self._norms[:n]
+        self._data, self._qparams, self._sq_norms, self._norms = data, params, sq, norms
+
+    def put(self, key: str, vector: np.ndarray) -> int:
+        """Insert or overwrite the row for key; returns the row index."""
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            self._grow(row + 1)
+            self._rows[key] = row
+            self._keys.append(key)
+            if self._table is not None:
+                self._table.set(key, row)
+        flat = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.precision == "int8":
+            codes, scale, zero = quantize_rows(flat[None])
+            self._data[row] = codes[0]
+            self._qparams[row] = (scale[0], zero[0])
+        else:
+            self._data[row] = flat
+        if self.precision != "float32":
+            # Norms must describe the stored (rounded) row
+            flat = self._decode(row)
+        sq = float(np.dot(flat, flat))
+        self._sq_norms[row] = sq
+        self._norms[row] = np.sqrt(sq)
+        return row
+
+    def extend(self, keys: Iterable[str], vectors: np.ndarray) -> None:
+        for key, vec in zip(keys, vectors):
+            self.put(key, vec)
+
+    def remove_many(self, keys: Iterable[str]) -> np.ndarray:
+        """Delete rows, filling each hole with the current last row.
+
+        Rows stay contiguous, so scans never skip tombstones. Returns the
+        sorted row ids whose contents changed; an index over row ids should
+        drop rows past the new end and re-add these.
+        """
+        old_n = len(self)
+        removed: List[str] = []
+        moved: Dict[str, int] = {}
+        for key in keys:
+            row = self._rows.pop(key, None)
+            if row is None:
+                continue
+            removed.append(key)
+            moved.pop(key, None)
+            last = len(self._keys) - 1
+            last_key = self._keys.pop()
+            if row == last:
+                continue
+            self._data[row] = self._data[last]
+            if self._qparams is not None:
+                self._qparams[row] = self._qparams[last]
+            self._sq_norms[row] = self._sq_norms[last]
+            self._norms[row] = self._norms[last]
+            self._keys[row] = last_key
+            self._rows[last_key] = row
+            moved[last_key] = row
+        if not removed:
+            return np.zeros((0,), dtype=np.int64)
+        # Vacated rows are zeroed; file-backed capacity is kept for reuse
+        n = len(self)
+        self._data[n:old_n] = 0
+        if self._qparams is not None:
+            self._qparams[n:old_n] = 0
+        self._sq_norms[n:old_n] = 0.0
+        self._norms[n:old_n] = 0.0
+        if self._table is not None:
+            self.flush()
+            self._table.delete_many(removed)
+            if moved:
+                self._table.set_many(list(moved.items()))
+        return np.array(sorted(moved.values()), dtype=np.int64)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """The stored row: a view at float32, a dequantized copy otherwise."""
+        row = self._rows.get(key)
+        return None if row is None else self._decode(row)
+
+    def matrix(self) -> np.ndarray:
+        return self._decode(slice(0, len(self)))
+
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """float32 rows [start, stop), for chunked scans of large reduced-precision matrices."""
+        return self._decode(slice(start, min(stop, len(self))))
+
+    def flush(self) -> None:
+        if isinstance(self._data, np.memmap):
+            self._data.flush()
+        if isinstance(self._qparams, np.memmap):
+            self._qparams.flush()
+
+    def _candidates(self, rows: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        return None if rows is None else np.asarray(rows, dtype=np.int64)
+
+    def nearest_euclidean(self, vector: np.ndarray, rows: Optional[np.ndarray] = None) -> Tuple[int, float]:
+        """Return (row, distance) of the closest stored row, or (-1, inf) when empty.
+
+        ``rows`` restricts the search to candidate rows (e.g. from an ANN index).
+        """
+        n = len(self)
+        if n == 0:
+            return -1, float('inf')
+        q = np.asarray(vector, dtype=np.float32).reshape(-1)
+        rows = self._candidates(rows)
+        sq_norms = self._sq_norms[:n] if rows is None else self._sq_norms[rows]
+        # ||q - x||^2 = ||q||^2 + ||x||^2 - 2 q.x ; the constant ||q||^2 does not affect argmin
+        scores = sq_norms - 2.0 * self._dots(q[None], rows)[0]
+        best = int(np.argmin(scores))
+        row = best if rows is None else int(rows[best])
+        # Recompute the winner exactly to avoid float32 cancellation near zero
+        return row, float(np.linalg.norm(q - self._decode(row)))
+
+    def nearest_cosine(self, vector: np.ndarray, rows: Optional[np.ndarray] = None) -> Tuple[int, float]:
+        """Return (row, 1 - cosine similarity) of the most similar row, or (-1, inf) when empty."""
+        n = len(self)
+        if n == 0:
+            return -1, float('inf')
+        q = np.asarray(vector, dtype=np.float32).reshape(-1)
+        rows = self._candidates(rows)
+        norms = self._norms[:n] if rows is None else self._norms[rows]
+        sims = self._dots(q[None], rows)[0] / (norms * float(np.linalg.norm(q)) + 1e-9)
+        best = int(np.argmax(sims))
+        return (best if rows is None else int(rows[best])), 1.0 - float(sims[best])
+
+    def nearest_euclidean_batch(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Batched ``nearest_euclidean`` for a (B, dim) array: one matrix product."""
+        q = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        n = len(self)
+        if n == 0:
+            return np.full((q.shape[0],), -1, dtype=np.int64), np.full((q.shape[0],), np.inf)
+        scores = self._sq_norms[None, :n] - 2.0 * self._dots(q)
+        rows = np.argmin(scores, axis=1)
+        return rows, np.linalg.norm(q - self._decode(rows), axis=1).astype(np.float64)
+
+    def nearest_cosine_batch(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Batched ``nearest_cosine`` for a (B, dim) array: one matrix product."""
+        q = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        n = len(self)
+        if n == 0:
+            return np.full((q.shape[0],), -1, dtype=np.int64), np.full((q.shape[0],), np.inf)
+        qn = np.linalg.norm(q, axis=1)
+        sims = self._dots(q) / (qn[:, None] * self._norms[None, :n] + 1e-9)
+        rows = np.argmax(sims, axis=1)
+        return rows, 1.0 - sims[np.arange(q.shape[0]), rows].astype(np.float64)
@@ -0,0 +1,184 @@
+"""
+Write-behind queue for memory stores.
+
+``WriteBehindMemory`` sits between GuardedMemory and a backend: ``store``
+copies the vector into a pending map and returns, and one background writer
+drains the map in ``store_many`` batches. Repeated stores to a key that has
+not been written yet coalesce into one write, and the map is bounded, so a
+producer that outruns the disk blocks instead of growing the queue.
+
+Loads read pending and in-flight values first (read-your-writes). Novelty
+queries go to the backend and see a store once the writer has applied it.
+``flush`` waits until everything queued so far is in the backend; ``close``
+flushes and stops the writer.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindMemory:
+    def __init__(self, backend: Any, max_pending: int = 256, batch_size: int = 64, metrics: Optional[Any] = None):
+        if int(max_pending) <= 0:
+            raise ValueError("max_pending must be positive")
+        self.backend = backend
+        self.max_pending = int(max_pending)
+        self.batch_size = max(1, int(batch_size))
+        self.metrics = metrics
+        self._size = tuple(backend.sponge_size)
+        self._cond = threading.Condition(threading.Lock())
+        self._pending: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._inflight: Dict[str, np.ndarray] = {}
+        # Stores are numbered; the writer drains in order, so everything up to
+        # _applied is in the backend
+        self._seq = 0
+        self._applied = 0
+        self._seqs: Dict[str, int] = {}
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer_loop, name="WriteBehind", daemon=True)
+        self._thread.start()
+
+    @property
+    def sponge_size(self) -> Tuple[int, int, int]:
+        return self._size
+
+    def _count(self, key: str, n: int = 1) -> None:
+        if self.metrics is not None and n:
+            self.metrics.inc(key, n)
+
+    def _report_pending_locked(self) -> None:
+        if self.metrics is not None:
+            self.metrics.set('write_behind_pending', len(self._pending) + len(self._inflight))
+
+    # Producer side
+    def store(self, key: str, vector):
+        self.store_many([key], np.asarray(vector)[None])
+
+    def store_many(self, keys, vectors):
+        arrs = np.array(vectors, dtype=np.float32).reshape((len(keys),) + self._size)
+        with self._cond:
+            for key, arr in zip(keys, arrs):
+                if self._closed:
+                    raise RuntimeError("WriteBehindMemory is closed")
+                self._seq += 1
+                if key in self._pending:
+                    self._pending[key] = arr
+                    self._pending.move_to_end(key)
+                    self._seqs[key] = self._seq
+                    self._count('write_behind_coalesced')
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    self._count('write_behind_blocked')
+                    while len(self._pending) >= self.max_pending and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        raise RuntimeError("WriteBehindMemory is closed")
+                self._pending[key] = arr
+                self._seqs[key] = self._seq
+                self._cond.notify_all()
+            self._report_pending_locked()
+
+    # Writer side
+    def _writer_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                keys = []
+                last = self._applied
+                while self._pending and len(keys) < self.batch_size:
+                    key, arr = self._pending.popitem(last=False)
+                    self._inflight[key] = arr
+                    last = self._seqs.pop(key)
+                    keys.append(key)
+                batch = np.stack([self._inflight[key] for key in keys], axis=0)
+                # Room in the pending map for blocked producers
+                self._cond.notify_all()
+            try:
+                self.backend.store_many(keys, batch)
+                self._count('write_behind_written', len(keys))
+            except Exception as e:
+                logger.warning(f"Write-behind batch of {len(keys)} stores failed: {e}")
+                with self._cond:
+                    self._error = e
+            with self._cond:
+                for key in keys:
+                    self._inflight.pop(key, None)
+                self._applied = last
+                self._report_pending_locked()
+                self._cond.notify_all()
+
+    def _lookup_locked(self, key: str) -> Optional[np.ndarray]:
+        arr = self._pending.get(key)
+        if arr is None:
+            arr = self._inflight.get(key)
+        return arr
+
+    # Reads
+    def load(self, key: str):
+        with self._cond:
+            arr = self._lookup_locked(key)
+        if arr is not None:
+            return arr.copy()
+        return self.backend.load(key)
+
+    def load_many(self, keys):
+        with self._cond:
+            queued = [self._lookup_locked(key) for key in keys]
+        missing = [i for i, arr in enumerate(queued) if arr is None]
+        out = np.zeros((len(keys),) + self._size, dtype=np.float32)
+        for i, arr in enumerate(queued):
+            if arr is not None:
+                out[i] = arr
+        if missing:
+            out[missing] = self.backend.load_many([keys[i] for i in missing])
+        return out
+
+    def distance_to_nearest(self, state_vector) -> float:
+        return self.backend.distance_to_nearest(state_vector)
+
+    def distance_to_nearest_batch(self, state_vectors):
+        return self.backend.distance_to_nearest_batch(state_vectors)
+
+    # Durability
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending) + len(self._inflight)
+
+    def flush(self) -> None:
+        """Block until every store queued before the call is in the backend, then flush it."""
+        with self._cond:
+            target = self._seq
+            while self._applied < target and self._thread.is_alive():
+                self._cond.wait()
+            error, self._error = self._error, None
+        if error is not None:
+            raise RuntimeError("write-behind store failed") from error
+        flush = getattr(self.backend, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def close(self) -> None:
+        """Write out the queue and stop the writer thread; further stores raise."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        with self._cond:
+            error, self._error = self._error, None
+        if error is not None:
+            logger.warning(f"Write-behind closed after a failed store: {error}")
+
+    def stop(self) -> None:
+        self.close()
+        stop = getattr(self.backend, 'stop', None)
+        if stop is not None:
+            stop()
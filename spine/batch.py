@@ -0,0 +1,19 @@
+"""
+Helpers shared by the batched (``process_batch``/``train_step_batch``) module paths.
+"""
+import numpy as np
+
+
+def as_rows(x, dim: int) -> np.ndarray:
+    """(B, dim) float32 view of a batch, each row zero-padded or truncated to ``dim``."""
+    x = np.asarray(x, dtype=np.float32)
+    x = x.reshape(x.shape[0], -1) if x.ndim > 1 else x.reshape(1, -1)
+    if x.shape[1] < dim:
+        return np.pad(x, ((0, 0), (0, dim - x.shape[1])))
+    return x[:, :dim]
+
+
+def clip_rows(g: np.ndarray, clip_norm: float) -> np.ndarray:
+    """Scale each row of ``g`` down to at most ``clip_norm`` in L2 norm."""
+    norms = np.linalg.norm(g, axis=1, keepdims=True) + 1e-9
+    return g * np.minimum(1.0, clip_norm / norms).astype(g.dtype)
@@ -2,6 +2,8 @@ import math
 import numpy as np
 from typing import Any, Dict
 
+from spine.batch import as_rows, clip_rows
+
 
 class DenseModule:
     def __init__(self, input_dim: int, output_dim: int | None = None, lr: float = 0.01, seed: int = 42, momentum: float = 0.9, clip_norm: float = 1.0):
@@ -31,6 +33,10 @@ class DenseModule:
         x = self._match_dim(x, self.output_dim)
         return (self.W * x + self.b).astype(np.float32)
 
+    def process_batch(self, x: np.ndarray) -> np.ndarray:
+        """``process`` for a (B, D) batch in one broadcast."""
+        return (self.W * as_rows(x, self.output_dim) + self.b).astype(np.float32)
+
     def _clip(self, g: np.ndarray) -> np.ndarray:
         n = float(np.linalg.norm(g) + 1e-12)
         if n > self.clip_norm:
@@ -60,6 +66,21 @@ class DenseModule:
         self.b -= self.lr * self.vb
         return loss
 
+    def train_step_batch(self, inputs: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """One momentum step on the batch-mean gradient, rows clipped as in ``train_step``; returns per-row losses."""
+        x = as_rows(inputs, self.output_dim)
+        y = as_rows(targets, self.output_dim)
+        diff = self.W * x + self.b - y
+        losses = np.mean(diff ** 2, axis=1)
+        grad_z = 2.0 * diff / diff.shape[1]
+        grad_W = clip_rows(grad_z * x, self.clip_norm).mean(axis=0)
+        grad_b = clip_rows(grad_z, self.clip_norm).mean(axis=0)
+        self.vW = self.momentum * self.vW + (1.0 - self.momentum) * grad_W
+        self.vb = self.momentum * self.vb + (1.0 - self.momentum) * grad_b
+        self.W -= self.lr * self.vW
+        self.b -= self.lr * self.vb
+        return losses
+
 
 def create(config: Dict[str, Any] | None = None) -> DenseModule:
     if config is None:
@@ -1,6 +1,8 @@
 import numpy as np
 from typing import Any, Dict
 
+from spine.batch import as_rows
+
 
 class HopfieldModule:
     def __init__(self, dim: int, slots: int = 64, beta: float = 5.0, seed: int = 42):
@@ -33,6 +35,24 @@ class HopfieldModule:
         self._renorm_memory()
         return y.astype(np.float32)
 
+    def process_batch(self, x) -> np.ndarray:
+        """``process`` for a (B, dim) batch: one (B, slots) attention matmul.
+
+        Every row attends to the memory as it was at the start of the batch;
+        the B write-backs are folded into one decay and one rank-B update.
+        """
+        v = as_rows(x, self.dim)
+        v_norm = np.linalg.norm(v, axis=1, keepdims=True) + 1e-6
+        scores = (v @ self.memory.T) / v_norm
+        scores = scores - scores.max(axis=1, keepdims=True)
+        attn = np.exp(np.clip(self.beta * scores, -50.0, 50.0))
+        attn = attn / (attn.sum(axis=1, keepdims=True) + 1e-9)
+        attn[~np.isfinite(attn).all(axis=1)] = 1.0 / self.slots
+        y = attn @ self.memory
+        self.memory = (0.999 ** v.shape[0]) * self.memory + 0.001 * (attn.T @ (v / v_norm))
+        self._renorm_memory()
+        return y.astype(np.float32)
+
     def train_step(self, inputs, targets) -> float:
         out = self.process(inputs)
         y = np.asarray(targets, dtype=np.float32).reshape(-1)
@@ -40,6 +60,10 @@ class HopfieldModule:
         diff = out - y
         return float(np.mean(diff ** 2))
 
+    def train_step_batch(self, inputs, targets) -> np.ndarray:
+        out = self.process_batch(inputs)
+        return np.mean((out - as_rows(targets, self.dim)) ** 2, axis=1)
+
 
 def create(config: Dict[str, Any] | None = None) -> HopfieldModule:
     if config is None:
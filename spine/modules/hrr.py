@@ -1,6 +1,11 @@
 import numpy as np
 from typing import Any, Dict
 
+from spine.batch import as_rows
+
+# Rows per closed-form EMA chunk; 0.99^-256 is about 13
+_SCAN_ROWS = 256
+
 
 class HRRModule:
     def __init__(self, dim: int, num_keys: int = 16, seed: int = 42):
@@ -42,6 +47,31 @@ class HRRModule:
         recon = self._unbind(self.memory, key)
         return recon.astype(np.float32)
 
+    def process_batch(self, x) -> np.ndarray:
+        """``process`` for a (B, dim) batch with batched FFTs.
+
+        The memory EMA is unrolled in closed form, so row b is unbound from
+        the memory exactly as it stands after rows 0..b, as in a per-row loop.
+        """
+        v = as_rows(x, self.dim)
+        v = v / (np.linalg.norm(v, axis=1, keepdims=True) + 1e-9)
+        keys = np.stack(self.keys)[np.abs(v.sum(axis=1)).astype(np.int64) % len(self.keys)]
+        rk = np.fft.rfft(keys, n=self.dim, axis=1)
+        bound = np.fft.irfft(np.fft.rfft(v, n=self.dim, axis=1) * rk, n=self.dim, axis=1)
+        # m_b = 0.99^(b+1) * m_0 + 0.01 * sum_{j<=b} 0.99^(b-j) * bound_j, a
+        # chunk of rows at a time: 0.99^-b stays small and finite within one
+        memory = np.empty_like(bound)
+        m = self.memory.astype(np.float64)
+        for start in range(0, v.shape[0], _SCAN_ROWS):
+            stop = min(v.shape[0], start + _SCAN_ROWS)
+            decay = (0.99 ** np.arange(1, stop - start + 1))[:, None]
+            memory[start:stop] = decay * (m[None, :] + 0.01 * np.cumsum(bound[start:stop] / decay, axis=0))
+            m = memory[stop - 1]
+        self.memory = m.astype(np.float32)
+        denom = rk.copy()
+        denom[np.abs(denom) < 1e-12] = 1e-12
+        return np.fft.irfft(np.fft.rfft(memory, n=self.dim, axis=1) / denom, n=self.dim, axis=1).astype(np.float32)
+
     def train_step(self, inputs, targets) -> float:
         out = self.process(inputs)
         y = np.asarray(targets, dtype=np.float32).reshape(-1)
@@ -52,6 +82,10 @@ class HRRModule:
         diff = out - y
         return float(np.mean(diff ** 2))
 
+    def train_step_batch(self, inputs, targets) -> np.ndarray:
+        out = self.process_batch(inputs)
+        return np.mean((out - as_rows(targets, self.dim)) ** 2, axis=1)
+
 
 def create(config: Dict[str, Any] | None = None) -> HRRModule:
     if config is None:
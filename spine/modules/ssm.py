@@ -1,6 +1,8 @@
 import numpy as np
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
+
+from spine.batch import as_rows, clip_rows
 
 
 class SSMModule:
@@ -46,6 +48,46 @@ class SSMModule:
             np.clip(self.h, -self.state_clip_value, self.state_clip_value, out=self.h)
         return y_hat.astype(np.float32)
 
+    def _scan_batch(self, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Run ``process``'s predict/correct recurrence over the rows of ``y``.
+
+        The dim-sized products are hoisted out of the loop: C^T y for every
+        row is one matmul, C^T C is formed once, and the residual norm is
+        expanded through them, so a step costs O(hidden^2) rather than
+        O(dim * hidden). Returns the hidden states each prediction used and
+        the corrected states after each row.
+        """
+        cty = (y @ self.C).astype(np.float64)
+        ctc = (self.C.T @ self.C).astype(np.float64)
+        yy = np.einsum('ij,ij->i', y, y, dtype=np.float64)
+        h_pred = np.empty((y.shape[0], self.hidden), dtype=np.float32)
+        h_post = np.empty((y.shape[0], self.hidden), dtype=np.float32)
+        h = self.h
+        for b in range(y.shape[0]):
+            h = (self.A @ h).astype(np.float32)
+            if self.state_clip_value > 0:
+                np.clip(h, -self.state_clip_value, self.state_clip_value, out=h)
+            h_pred[b] = h
+            g = ctc @ h
+            # |y - C h| and C^T (y - C h) without forming the dim-sized residual
+            resid_norm = float(np.sqrt(max(yy[b] - 2.0 * cty[b] @ h + h @ g, 0.0))) + 1e-9
+            dh = cty[b] - g
+            if resid_norm > self.clip_norm:
+                dh *= self.clip_norm / resid_norm
+            dh_norm = float(np.linalg.norm(dh)) + 1e-9
+            if dh_norm > self.clip_norm:
+                dh *= self.clip_norm / dh_norm
+            h = (h + 0.01 * dh).astype(np.float32)
+            if self.state_clip_value > 0:
+                np.clip(h, -self.state_clip_value, self.state_clip_value, out=h)
+            h_post[b] = h
+        self.h = h
+        return h_pred, h_post
+
+    def process_batch(self, x) -> np.ndarray:
+        h_pred, _ = self._scan_batch(as_rows(x, self.dim))
+        return (h_pred @ self.C.T).astype(np.float32)
+
     def train_step(self, inputs, targets) -> float:
         y = np.asarray(targets, dtype=np.float32).reshape(-1)
         y = y[: self.dim] if y.shape[0] >= self.dim else np.pad(y, (0, self.dim - y.shape[0]))
@@ -64,6 +106,18 @@ class SSMModule:
         self.C -= self.lr * grad_C
         return float(np.mean(diff ** 2))
 
+    def train_step_batch(self, inputs, targets) -> np.ndarray:
+        """One step on C from the batch-mean of the per-row ``train_step`` gradients; returns per-row losses."""
+        y = as_rows(targets, self.dim)
+        h_pred, h_post = self._scan_batch(as_rows(inputs, self.dim))
+        diff = clip_rows(h_pred @ self.C.T - y, self.clip_norm)
+        grad_C = (diff.T @ h_post / diff.shape[0]).astype(np.float32)
+        gnorm = float(np.linalg.norm(grad_C)) + 1e-9
+        if gnorm > self.clip_norm:
+            grad_C *= (self.clip_norm / gnorm)
+        self.C -= self.lr * grad_C
+        return np.mean(diff ** 2, axis=1)
+
 
 def create(config: Dict[str, Any] | None = None) -> SSMModule:
     if config is None:
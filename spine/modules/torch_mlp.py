@@ -1,6 +1,8 @@
 from typing import Any, Dict
 import numpy as np
 
+from spine.batch import as_rows
+
 try:
     import torch
     import torch.nn as nn
@@ -57,6 +59,23 @@ class TorchMLP(nn.Module if torch else object):  # type: ignore
         self.optimizer.step()
         return float(loss.detach().cpu().item())
 
+    def process_batch(self, x):
+        if torch is None:
+            return x
+        with torch.no_grad():
+            y = self.net(torch.tensor(as_rows(x, self.input_dim)))
+        return y.detach().cpu().numpy()
+
+    def train_step_batch(self, inputs, targets) -> np.ndarray:
+        """One Adam step on the batch-mean MSE; returns per-row losses."""
+        x = torch.tensor(as_rows(inputs, self.input_dim))
+        y = torch.tensor(as_rows(targets, self.input_dim))
+        self.optimizer.zero_grad()
+        row_losses = ((self.net(x) - y) ** 2).mean(dim=1)
+        row_losses.mean().backward()
+        self.optimizer.step()
+        return row_losses.detach().cpu().numpy().astype(np.float64)
+
 
 def create(config: Dict[str, Any] | None = None) -> TorchMLP:
     if config is None:
@@ -5,6 +5,8 @@ import importlib
 import logging
 from typing import Any, Dict
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 class NeuralSpine:
@@ -40,6 +42,19 @@ class NeuralSpine:
                 logger.debug(f"Module '{name}' has no 'process', skipping in forward().")
         return x
 
+    def forward_batch(self, x):
+        """``forward`` for a (B, D) batch: modules with 'process_batch' take it whole, others row by row."""
+        x = np.asarray(x, dtype=np.float32)
+        x = x.reshape(x.shape[0], -1)
+        for name, module in self.modules.items():
+            if hasattr(module, "process_batch"):
+                x = np.asarray(module.process_batch(x), dtype=np.float32)
+            elif hasattr(module, "process"):
+                x = np.stack([np.asarray(module.process(row), dtype=np.float32).reshape(-1) for row in x])
+            else:
+                logger.debug(f"Module '{name}' has no 'process', skipping in forward_batch().")
+        return x
+
     def add_module(self, name, module_obj) -> None:
         """Dynamically add a new module"""
         self.modules[name] = module_obj
@@ -68,3 +83,24 @@ class NeuralSpine:
                 except Exception as e:
                     logger.warning(f"Module '{name}' train_step failed: {e}")
         return float(sum(losses) / len(losses)) if losses else 0.0
+
+    def train_step_batch(self, inputs, targets) -> np.ndarray:
+        """Batched ``train_step`` over (B, D) inputs/targets.
+
+        Modules with 'train_step_batch' take one step for the whole batch;
+        those with only 'train_step' run once per row. Returns each row's
+        loss averaged across participating modules.
+        """
+        x = np.asarray(inputs, dtype=np.float32)
+        x = x.reshape(x.shape[0], -1)
+        y = np.asarray(targets, dtype=np.float32).reshape(x.shape[0], -1)
+        losses = []
+        for name, module in self.modules.items():
+            try:
+                if hasattr(module, "train_step_batch"):
+                    losses.append(np.asarray(module.train_step_batch(x, y), dtype=np.float64).reshape(-1))
+                elif hasattr(module, "train_step"):
+                    losses.append(np.array([float(module.train_step(xi, yi)) for xi, yi in zip(x, y)]))
+            except Exception as e:
+                logger.warning(f"Module '{name}' train_step_batch failed: {e}")
+        return np.mean(losses, axis=0) if losses else np.zeros((x.shape[0],))
@@ -0,0 +1,119 @@
+import copy
+
+import numpy as np
+import pytest
+
+from spine.modules.dense import DenseModule
+from spine.modules.hopfield import HopfieldModule
+from spine.modules.hrr import HRRModule
+from spine.modules.ssm import SSMModule
+from spine.neural_spine import NeuralSpine
+
+DIM = 48
+
+MAKERS = {
+    "dense": lambda: DenseModule(DIM, DIM, lr=0.1, momentum=0.5, clip_norm=0.05),
+    "hopfield": lambda: HopfieldModule(DIM, slots=8),
+    "hrr": lambda: HRRModule(DIM, num_keys=4),
+    "ssm": lambda: SSMModule(DIM, hidden=16, lr=0.1, clip_norm=0.5),
+}
+
+
+def _rows(n, seed=0, dim=DIM):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def _state(module):
+    return {name: np.array(value) for name, value in vars(module).items() if isinstance(value, np.ndarray)}
+
+
+def _assert_same_state(a, b):
+    sa, sb = _state(a), _state(b)
+    assert sa.keys() == sb.keys()
+    for name in sa:
+        np.testing.assert_allclose(sa[name], sb[name], rtol=1e-4, atol=1e-5, err_msg=name)
+
+
+@pytest.mark.parametrize("name", ["dense", "hrr", "ssm"])
+@pytest.mark.parametrize("width", [DIM, DIM - 5, DIM + 7])
+def test_process_batch_matches_per_row_loop(name, width):
+    batched, looped = MAKERS[name](), MAKERS[name]()
+    x = _rows(12, dim=width)
+    expected = np.stack([looped.process(row) for row in x])
+    np.testing.assert_allclose(batched.process_batch(x), expected, rtol=1e-4, atol=1e-5)
+    _assert_same_state(batched, looped)
+
+
+def test_hopfield_batch_rows_attend_to_the_memory_at_batch_start():
+    module = HopfieldModule(DIM, slots=8)
+    x = _rows(6)
+    expected = np.stack([copy.deepcopy(module).process(row) for row in x])
+    np.testing.assert_allclose(module.process_batch(x), expected, rtol=1e-5, atol=1e-6)
+    # A batch of one is exactly one process() call, write-back included
+    single, looped = HopfieldModule(DIM, slots=8), HopfieldModule(DIM, slots=8)
+    np.testing.assert_allclose(single.process_batch(x[:1])[0], looped.process(x[0]), rtol=1e-5, atol=1e-6)
+    _assert_same_state(single, looped)
+
+
+@pytest.mark.parametrize("name", sorted(MAKERS))
+def test_train_step_batch_of_one_matches_train_step(name):
+    batched, looped = MAKERS[name](), MAKERS[name]()
+    x, y = _rows(3, seed=1), _rows(3, seed=2)
+    for xi, yi in zip(x, y):
+        loss = batched.train_step_batch(xi[None], yi[None])
+        assert loss.shape == (1,)
+        assert loss[0] == pytest.approx(looped.train_step(xi, yi), rel=1e-4, abs=1e-6)
+    _assert_same_state(batched, looped)
+
+
+def test_dense_train_step_batch_uses_the_mean_per_row_gradient():
+    module = DenseModule(DIM, DIM, lr=0.1, momentum=0.5, clip_norm=0.05)
+    module.train_step(_rows(1, seed=3)[0], _rows(1, seed=4)[0])  # non-zero velocity
+    x, y = _rows(5, seed=1), _rows(5, seed=2)
+
+    # With momentum 0 and lr 1, train_step moves W and b by exactly the clipped gradient
+    grads_W, grads_b, losses = [], [], []
+    for xi, yi in zip(x, y):
+        probe = copy.deepcopy(module)
+        probe.momentum, probe.lr = 0.0, 1.0
+        losses.append(probe.train_step(xi, yi))
+        grads_W.append(module.W - probe.W)
+        grads_b.append(module.b - probe.b)
+    vW = module.momentum * module.vW + (1.0 - module.momentum) * np.mean(grads_W, axis=0)
+    vb = module.momentum * module.vb + (1.0 - module.momentum) * np.mean(grads_b, axis=0)
+    W, b = module.W - module.lr * vW, module.b - module.lr * vb
+
+    np.testing.assert_allclose(module.train_step_batch(x, y), losses, rtol=1e-5)
+    np.testing.assert_allclose(module.W, W, rtol=1e-5, atol=1e-7)
+    np.testing.assert_allclose(module.b, b, rtol=1e-5, atol=1e-7)
+
+
+def test_spine_batch_paths_match_per_row_paths():
+    config = {"modules": {"dense": "spine.modules.dense"}, "filepaths": {"sponge_size": [4, 4, 3]}}
+    batched, looped = NeuralSpine(config), NeuralSpine(config)
+    looped.add_module("hrr", HRRModule(DIM, num_keys=4))
+    batched.add_module("hrr", HRRModule(DIM, num_keys=4))
+    x, y = _rows(7), _rows(7, seed=1)
+    expected = np.stack([looped.forward(row) for row in x])
+    np.testing.assert_allclose(batched.forward_batch(x), expected, rtol=1e-4, atol=1e-5)
+    for xi, yi in zip(x, y):
+        assert batched.train_step_batch(xi[None], yi[None])[0] == pytest.approx(looped.train_step(xi, yi), rel=1e-4, abs=1e-6)
+    for name in ("dense", "hrr"):
+        _assert_same_state(batched.modules[name], looped.modules[name])
+
+
+def test_hrr_batch_stays_exact_across_many_rows():
+    # Several EMA chunks, against the per-row loop
+    batched, looped = HRRModule(8, num_keys=4), HRRModule(8, num_keys=4)
+    x = _rows(2000, dim=8)
+    expected = np.stack([looped.process(row) for row in x])
+    np.testing.assert_allclose(batched.process_batch(x), expected, rtol=1e-4, atol=1e-5)
+    _assert_same_state(batched, looped)
+
+    # Past ~70k rows 0.99^-B overflows float64 if the EMA is unrolled in one go
+    x = _rows(75000, seed=1, dim=8)
+    out = batched.process_batch(x)
+    assert np.isfinite(out).all()
+    expected = np.concatenate([looped.process_batch(x[i:i + 100]) for i in range(0, len(x), 100)])
+    np.testing.assert_allclose(out, expected, rtol=1e-4, atol=1e-5)
+    _assert_same_state(batched, looped)
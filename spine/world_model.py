@@ -1,6 +1,8 @@
 import numpy as np
 from typing import Any, Dict
 
+from spine.batch import as_rows
+
 
 class WorldModel:
     def __init__(self, dim: int, lr: float = 1e-3):
@@ -25,6 +27,23 @@ class WorldModel:
         self.W -= self.lr * np.outer(diff, self.prev)
         return float(np.mean(diff ** 2))
 
+    def _shift(self, v: np.ndarray) -> np.ndarray:
+        """Row b's predecessor: the stored ``prev`` for the first row, then the batch itself."""
+        prev = np.vstack([self.prev[None, :], v[:-1]])
+        self.prev = v[-1].copy()
+        return prev
+
+    def process_batch(self, x) -> np.ndarray:
+        """``process`` over a batch as one (B, dim) x (dim, dim) matmul."""
+        return self._shift(as_rows(x, self.dim)) @ self.W.T
+
+    def train_step_batch(self, inputs, targets) -> np.ndarray:
+        """One step on W from the batch-mean of the per-row outer-product updates; returns per-row losses."""
+        v = as_rows(inputs, self.dim)
+        diff = self._shift(v) @ self.W.T - as_rows(targets, self.dim)
+        self.W -= self.lr * (diff.T @ v) / v.shape[0]
+        return np.mean(diff ** 2, axis=1)
+
 
 def create(config: Dict[str, Any] | None = None) -> WorldModel:
     if config is None:
@@ -20,6 +20,7 @@ from spine.curiosity_engine import CuriosityEngine
 from spine.introspection import Introspection
 from tools.reflection_logbook import ReflectionLogbook
 from memory.memory_hffs import HFFSMemory
+from memory.write_behind import WriteBehindMemory
 from tools.why import WhyEngine
 from tools.policy import PolicyEnforcer
 from tools.logging_setup import setup_logging
@@ -49,6 +50,10 @@ def main():
         sponge_size=tuple(config['filepaths']['sponge_size'])
     )
     logger.info("Initialized HFFSMemory at %s", config['filepaths']['memory_base'])
+    write_behind = int(config.get('memory', {}).get('write_behind', 0))
+    if write_behind > 0:
+        memory = WriteBehindMemory(memory, max_pending=write_behind,
+                                   batch_size=int(config.get('memory', {}).get('write_behind_batch', 64)))
     spine = NeuralSpine(config)
     logger.info("Loaded spine modules: %s", list(spine.modules.keys()))
     curiosity = CuriosityEngine(
@@ -91,7 +96,9 @@ def main():
     report = introspect.assess(flat, flat)
     print(f"[*] Introspection report: {report}")
 
-    # 4) Compute novelty reward
+    # 4) Compute novelty reward (after queued stores have reached the backend)
+    if isinstance(memory, WriteBehindMemory):
+        memory.flush()
     reward = curiosity.reward(output)
     print(f"[!] Novelty reward: {reward:.4f}")
 
@@ -104,6 +111,7 @@ def main():
     )
     logbook.record(entry)
     print("[✓] Run logged to reflections.md")
+    memory.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,314 @@
+"""
+Micro-benchmarks for memory and training hot paths.
+
+Run with ``python -m tools.cli bench <name>``; each benchmark prints a dict
+of timings so results can be pasted into reviews.
+"""
+import time
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+
+def _best_of(fn: Callable[[], Any], repeats: int) -> float:
+    best = float('inf')
+    for _ in range(max(1, int(repeats))):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_entanglement(sponge_size=(27, 27, 27), block_size=(9, 9, 9), radius: int = 1, repeats: int = 5) -> Dict[str, Any]:
+    """Per-block reference loop vs. the vectorized EntanglementKernel (in RAM)."""
+    from memory.sponge_memory import SpongeTopology
+    from memory.entanglement import EntanglementKernel, apply_reference
+    from memory.hebbian import HebbianUpdater
+
+    rng = np.random.default_rng(0)
+    topo = SpongeTopology(sponge_size, block_size)
+    kernel = EntanglementKernel(topo, strength=0.15, radius=radius)
+    current = rng.random(sponge_size).astype(np.float32)
+    sponge = rng.random(sponge_size).astype(np.float32)
+    ref_out = apply_reference(topo, current, sponge, 0.15, radius, HebbianUpdater(0.001, 0.995))
+    vec_out = kernel.apply(current, sponge, HebbianUpdater(0.001, 0.995))
+    t_ref = _best_of(lambda: apply_reference(topo, current, sponge, 0.15, radius, HebbianUpdater(0.001, 0.995)), repeats)
+    t_vec = _best_of(lambda: kernel.apply(current, sponge, HebbianUpdater(0.001, 0.995)), repeats)
+    return {
+        "grid": topo.grid,
+        "radius": radius,
+        "reference_ms": 1e3 * t_ref,
+        "vectorized_ms": 1e3 * t_vec,
+        "speedup": t_ref / max(t_vec, 1e-12),
+        "max_abs_diff": float(np.abs(ref_out - vec_out).max()),
+    }
+
+
+def bench_ann(n: int = 50000, dim: int = 256, clusters: int = 256, queries: int = 200) -> Dict[str, Any]:
+    """Exact cosine scan vs. LSH and IVF candidate rescoring on clustered signatures."""
+    from memory.ann import IVFIndex, LSHIndex, check_recall
+    from memory.vector_matrix import VectorMatrix
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    data = (centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+    exact = VectorMatrix(dim, capacity=n)
+    exact.extend([str(i) for i in range(n)], data)
+    qs = data[rng.integers(0, n, queries)] + 0.05 * rng.normal(size=(queries, dim)).astype(np.float32)
+    out: Dict[str, Any] = {"rows": n, "dim": dim}
+    t0 = time.perf_counter()
+    for q in qs:
+        exact.nearest_cosine(q)
+    out["exact_us"] = 1e6 * (time.perf_counter() - t0) / queries
+    for name, index in (("lsh", LSHIndex(dim)), ("ivf", IVFIndex(dim, n_lists=256, n_probe=8, metric="cosine"))):
+        index.add_many(np.arange(n), data)
+        t0 = time.perf_counter()
+        for q in qs:
+            exact.nearest_cosine(q, rows=index.candidates(q))
+        out[f"{name}_us"] = 1e6 * (time.perf_counter() - t0) / queries
+        out[f"{name}_recall"] = check_recall(index, data, "cosine", n_queries=queries)["recall"]
+    return out
+
+
+def bench_projection(sponge_size=(27, 27, 27), holo_dim: int = 1024, batch: int = 8, repeats: int = 5) -> Dict[str, Any]:
+    """Dense holographic matvec vs. SRHT for one signature, a batch and the load-time adjoint."""
+    from memory.projection import SRHTProjection, dense_projection
+
+    n = int(np.prod(sponge_size))
+    rng = np.random.default_rng(0)
+    dense = dense_projection(42, (holo_dim, n))
+    srht = SRHTProjection(42, (holo_dim, n))
+    x = rng.random(n).astype(np.float32)
+    xs = rng.random((batch, n)).astype(np.float32)
+    y = rng.normal(size=holo_dim).astype(np.float32)
+    out: Dict[str, Any] = {"in_dim": n, "holo_dim": holo_dim, "batch": batch}
+    for name, proj in (("dense", dense), ("srht", srht)):
+        out[f"{name}_forward_ms"] = 1e3 * _best_of(lambda: proj.forward(x), repeats)
+        out[f"{name}_batch_ms"] = 1e3 * _best_of(lambda: proj.forward_many(xs), repeats)
+        out[f"{name}_adjoint_ms"] = 1e3 * _best_of(lambda: proj.adjoint(y), repeats)
+    # <Px, y> == <x, P^T y> confirms the adjoint is the exact transpose
+    out["srht_adjoint_error"] = float(abs(np.dot(srht.forward(x), y) - np.dot(x, srht.adjoint(y))) / abs(np.dot(srht.forward(x), y)))
+    out["srht_norm_ratio"] = float(np.linalg.norm(srht.forward(x)) / np.linalg.norm(x))
+    out["srht_matrix_mb"] = 0.0
+    out["dense_matrix_mb"] = dense.matrix.nbytes / 2 ** 20
+    return out
+
+
+def bench_concurrency(readers=(1, 2, 4, 8), seconds: float = 1.0, sponge_size=(27, 27, 27), stored: int = 2000, write_interval: float = 0.005) -> Dict[str, Any]:
+    """Stress test: novelty-query throughput with N reader threads beside one storing writer.
+
+    Runs each reader count under the exclusive lock and the readers-writer
+    lock; reads should scale with threads (up to the core count) in "rw"
+    mode while the writer keeps making progress.
+    """
+    import os
+    import tempfile
+    import threading
+    from memory.sponge_memory import EntangledSpongeMemory
+
+    rng = np.random.default_rng(0)
+    queries = rng.random((64,) + tuple(sponge_size)).astype(np.float32)
+    out: Dict[str, Any] = {"cpus": os.cpu_count(), "seconds": seconds, "stored": stored}
+    for mode in ("lock", "rw"):
+        with tempfile.TemporaryDirectory() as base:
+            mem = EntangledSpongeMemory(base, sponge_size, storage="ram", concurrency=mode, hebbian=False)
+            mem.store_many([f"seed{i}" for i in range(stored)], rng.random((stored,) + tuple(sponge_size)).astype(np.float32))
+            for n in readers:
+                stop = threading.Event()
+                counts = [0] * n
+                writes = [0]
+
+                def reader(slot: int) -> None:
+                    i = slot
+                    while not stop.is_set():
+                        mem.distance_to_nearest(queries[i % len(queries)])
+                        counts[slot] += 1
+                        i += 1
+
+                def writer() -> None:
+                    while not stop.is_set():
+                        mem.store(f"w{writes[0]}", queries[writes[0] % len(queries)])
+                        writes[0] += 1
+                        time.sleep(write_interval)
+
+                threads = [threading.Thread(target=reader, args=(i,)) for i in range(n)] + [threading.Thread(target=writer)]
+                for t in threads:
+                    t.start()
+                time.sleep(seconds)
+                stop.set()
+                for t in threads:
+                    t.join()
+                out[f"{mode}_{n}r_reads_per_s"] = sum(counts) / seconds
+                out[f"{mode}_{n}r_writes_per_s"] = writes[0] / seconds
+            mem.stop()
+    return out
+
+
+def bench_hebbian(cases=(((27, 27, 27), (9, 9, 9)), ((27, 27, 27), (3, 3, 3)), ((64, 64, 64), (4, 4, 4))), repeats: int = 5) -> Dict[str, Any]:
+    """Hebbian modulation per store: scalar scan vs. per-block BlockHebbian, alone and inside the kernel."""
+    from memory.sponge_memory import SpongeTopology
+    from memory.entanglement import EntanglementKernel, apply_reference
+    from memory.hebbian import BlockHebbian, HebbianUpdater, block_means
+
+    rng = np.random.default_rng(0)
+    out: Dict[str, Any] = {}
+    for sponge_size, block_size in cases:
+        topo = SpongeTopology(sponge_size, block_size)
+        kernel = EntanglementKernel(topo, strength=0.15, radius=1)
+        current = rng.random(sponge_size).astype(np.float32)
+        sponge = rng.random(sponge_size).astype(np.float32)
+        pre, post = block_means(sponge, block_size), block_means(current, block_size)
+        scan, block = HebbianUpdater(0.001, 0.995), BlockHebbian(topo.grid, 0.001, 0.995)
+        name = "x".join(str(g) for g in topo.grid)
+        out[f"{name}_blocks"] = int(np.prod(topo.grid))
+        out[f"{name}_scan_ms"] = 1e3 * _best_of(lambda: scan.modulate(pre, post), repeats)
+        out[f"{name}_block_ms"] = 1e3 * _best_of(lambda: block.modulate(pre, post), repeats)
+        out[f"{name}_store_scan_ms"] = 1e3 * _best_of(lambda: kernel.apply(current, sponge, scan), repeats)
+        out[f"{name}_store_block_ms"] = 1e3 * _best_of(lambda: kernel.apply(current, sponge, block), repeats)
+        if np.prod(topo.grid) <= 729:
+            out[f"{name}_store_reference_ms"] = 1e3 * _best_of(lambda: apply_reference(topo, current, sponge, 0.15, 1, HebbianUpdater(0.001, 0.995)), 1)
+        # Reshape reductions agree with the kernel's masked block means
+        out[f"{name}_means_max_diff"] = float(np.abs(kernel.block_means(kernel.to_blocks(sponge)) - pre).max())
+    return out
+
+
+def bench_replay(capacity: int = 1_000_000, dim: int = 8, batch: int = 32, repeats: int = 200) -> Dict[str, Any]:
+    """Prioritized replay at full capacity: sum-tree draw and reprioritization vs. the old O(n) draw."""
+    from memory.prioritized_replay import PrioritizedReplayBuffer
+
+    rng = np.random.default_rng(0)
+    buf = PrioritizedReplayBuffer(capacity=capacity)
+    t0 = time.perf_counter()
+    for start in range(0, capacity, 65536):
+        n = min(65536, capacity - start)
+        buf.add_many(rng.random((n, dim), dtype=np.float32), rng.random(n))
+    fill = time.perf_counter() - t0
+    _, idxs, weights = buf.sample_batch(batch)
+    priorities = rng.random(capacity) + buf.epsilon
+    return {
+        "capacity": capacity,
+        "batch": batch,
+        "fill_s": fill,
+        "sample_us": 1e6 * _best_of(lambda: buf.sample_batch(batch), repeats),
+        "update_priorities_us": 1e6 * _best_of(lambda: buf.update_priorities(idxs, rng.random(batch)), repeats),
+        "add_us": 1e6 * _best_of(lambda: buf.add(np.zeros(dim, dtype=np.float32), 0.5), repeats),
+        "max_weight": float(weights.max()),
+        # Previous implementation: normalize every priority, then np.random.choice without replacement
+        "full_scan_sample_us": 1e6 * _best_of(lambda: np.random.choice(capacity, size=batch, p=priorities / priorities.sum(), replace=False), 3),
+        "memory": buf.memory_report(),
+    }
+
+
+def bench_ring(capacity: int = 20000, dim: int = 512, batch: int = 64, repeats: int = 200) -> Dict[str, Any]:
+    """Uniform replay: list of per-sample arrays + np.stack vs. the preallocated ring gather."""
+    from memory.replay_buffer import ReplayBuffer
+
+    rng = np.random.default_rng(0)
+    data = rng.random((capacity, dim), dtype=np.float32)
+    rows = list(data)
+    buf = ReplayBuffer(capacity=capacity, dim=dim)
+    t0 = time.perf_counter()
+    for start in range(0, capacity, 4096):
+        buf.add_many(data[start:start + 4096])
+    fill = time.perf_counter() - t0
+    out = np.empty((batch, dim), dtype=np.float32)
+    idxs = rng.integers(0, capacity, size=batch)
+    return {
+        "capacity": capacity,
+        "dim": dim,
+        "batch": batch,
+        "fill_s": fill,
+        # Previous layout: one array per sample, stacked on every draw
+        "list_stack_us": 1e6 * _best_of(lambda: np.stack([rows[i] for i in idxs], axis=0), repeats),
+        "ring_gather_us": 1e6 * _best_of(lambda: buf.storage.gather(idxs), repeats),
+        "ring_gather_out_us": 1e6 * _best_of(lambda: buf.storage.gather(idxs, out=out), repeats),
+        "ring_sample_us": 1e6 * _best_of(lambda: buf.sample(batch), repeats),
+        "add_us": 1e6 * _best_of(lambda: buf.add(data[0]), repeats),
+        "memory": buf.memory_report(),
+    }
+
+
+def bench_sharding(threads=(1, 2, 4, 8), shards: int = 4, seconds: float = 1.0, capacity: int = 100_000, dim: int = 64, batch: int = 32) -> Dict[str, Any]:
+    """Replay add/sample throughput with N producer and N consumer threads, one lock vs. per-shard locks.
+
+    Producers on different shards never wait on each other, while a sharded
+    draw pays one small tree search per shard it touches; with the GIL the
+    gain from shards is reduced lock waiting, not parallel NumPy work.
+    """
+    import os
+    import threading
+    from memory.prioritized_replay import PrioritizedReplayBuffer
+    from memory.sharded_replay import ShardedReplayBuffer
+
+    rng = np.random.default_rng(0)
+    seed = rng.random((capacity // 2, dim), dtype=np.float32)
+    rows = rng.random((256, dim), dtype=np.float32)
+    out: Dict[str, Any] = {"cpus": os.cpu_count(), "seconds": seconds, "shards": shards}
+    builders = {
+        "single": lambda: PrioritizedReplayBuffer(capacity, dim=dim),
+        "sharded": lambda: ShardedReplayBuffer([PrioritizedReplayBuffer(capacity // shards, dim=dim) for _ in range(shards)]),
+    }
+    for name, build in builders.items():
+        for n in threads:
+            buf = build()
+            buf.add_many(seed, np.ones(len(seed)))
+            stop = threading.Event()
+            adds = [0] * n
+            draws = [0] * n
+
+            def producer(slot: int) -> None:
+                while not stop.is_set():
+                    buf.add(rows[adds[slot] % len(rows)], 1.0)
+                    adds[slot] += 1
+
+            def consumer(slot: int) -> None:
+                while not stop.is_set():
+                    _, idxs, _ = buf.sample_batch(batch)
+                    buf.update_priorities(idxs, np.ones(len(idxs)))
+                    draws[slot] += 1
+
+            workers = [threading.Thread(target=producer, args=(i,)) for i in range(n)] + [threading.Thread(target=consumer, args=(i,)) for i in range(n)]
+            for t in workers:
+                t.start()
+            time.sleep(seconds)
+            stop.set()
+            for t in workers:
+                t.join()
+            out[f"{name}_{n}t_adds_per_s"] = sum(adds) / seconds
+            out[f"{name}_{n}t_batches_per_s"] = sum(draws) / seconds
+    return out
+
+
+def bench_spine(sponge_size=(15, 15, 15), batch: int = 32, repeats: int = 5) -> Dict[str, Any]:
+    """Learner step over a replay batch: per-row NeuralSpine.train_step loop vs. one train_step_batch."""
+    import copy
+    from spine.neural_spine import NeuralSpine
+
+    modules = {name: f"spine.modules.{name}" for name in ("dense", "hopfield", "hrr", "ssm")}
+    spine = NeuralSpine({"modules": modules, "filepaths": {"sponge_size": list(sponge_size)}, "training": {"ssm_hidden": 256}})
+    x = np.random.default_rng(0).random((batch, int(np.prod(sponge_size))), dtype=np.float32)
+    out: Dict[str, Any] = {"dim": int(x.shape[1]), "batch": batch}
+    for name, module in spine.modules.items():
+        a, b = copy.deepcopy(module), copy.deepcopy(module)
+        out[f"{name}_rows_ms"] = 1e3 * _best_of(lambda: [a.train_step(row, row) for row in x], repeats)
+        out[f"{name}_batch_ms"] = 1e3 * _best_of(lambda: b.train_step_batch(x, x), repeats)
+    out["spine_rows_ms"] = 1e3 * _best_of(lambda: [spine.train_step(row, row) for row in x], repeats)
+    out["spine_batch_ms"] = 1e3 * _best_of(lambda: spine.train_step_batch(x, x), repeats)
+    return out
+
+
+BENCHMARKS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "entanglement": bench_entanglement,
+    "ann": bench_ann,
+    "projection": bench_projection,
+    "concurrency": bench_concurrency,
+    "hebbian": bench_hebbian,
+    "replay": bench_replay,
+    "ring": bench_ring,
+    "sharding": bench_sharding,
+    "spine": bench_spine,
+}
+
+
+def main(name: str) -> None:
+    print(BENCHMARKS[name]())
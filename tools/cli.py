@@ -2,6 +2,7 @@ import argparse
 
 from tools.trainer import run_multithreaded_training
 from tools.federated import main as federated_main
+from tools.benchmarks import BENCHMARKS, main as bench_main
 
 
 def main():
@@ -13,12 +14,17 @@ def main():
 
     c = sub.add_parser('chain', help='Run federated chain simulation')
 
+    b = sub.add_parser('bench', help='Run a micro-benchmark')
+    b.add_argument('name', choices=sorted(BENCHMARKS))
+
     args = parser.parse_args()
     if args.cmd == 'train':
         import tomllib as toml_loader
         with open('configs/rs-config.toml', 'rb') as f:
             cfg = toml_loader.load(f)
         run_multithreaded_training(cfg, duration_seconds=args.seconds)
+    elif args.cmd == 'bench':
+        bench_main(args.name)
     else:
         federated_main()
 
@@ -9,8 +9,8 @@ from spine.neural_spine import NeuralSpine
 from spine.curiosity_engine import CuriosityEngine
 from spine.introspection import Introspection
 from spine.checkpoint import save_checkpoint, load_checkpoint
-from memory.memory_hffs import HFFSMemory
-from memory.prioritized_replay import PrioritizedReplayBuffer
+from memory.memory_hffs import create as create_hffs
+from memory.sharded_replay import create as create_replay
 from tools.reflection_logbook import ReflectionLogbook
 from tools.metrics import MetricsRegistry
 from tools.dashboard import start_dashboard, ControlBridge
@@ -18,10 +18,12 @@ from memory.sponge_memory import create as create_entangled
 from memory.multiscale import create_multiscale
 from memory.guarded import GuardedMemory
 from tools.policy import PolicyEnforcer
-from memory.auto_memory import AutoMemory
+from memory.auto_memory import create as create_auto
 from spine.auto import AutoSelector
 from spine.gating import ModuleGater
 from memory.tensor_network import TensorNetworkCompressor
+from memory.novelty_cache import CachedNoveltyMemory, NoveltyCache
+from memory.write_behind import WriteBehindMemory
 from spine.world_model import WorldModel
 from tools.zkml import generate_proof, verify_proof
 from tools.tee import attest_run
@@ -36,23 +38,38 @@ class Orchestrator:
 
         # IO
         self.logbook = ReflectionLogbook(config['filepaths']['logbook'])
+        self.metrics = MetricsRegistry()
         mem_backend = (config.get('memory', {}).get('backend', 'hffs') or 'hffs').lower()
+        # Novelty distances are memoized per backend in one shared LRU
+        cache_size = int(config.get('memory', {}).get('novelty_cache', 4096))
+        self.novelty_cache = NoveltyCache(cache_size, metrics=self.metrics) if cache_size > 0 else None
+
+        def prepare(mem):
+            # Retention evictions go to the shared registry (multiscale: the primary scale)
+            for leaf in getattr(mem, 'scales', None) or (mem,):
+                if getattr(leaf, 'retention', None) is not None:
+                    leaf.retention.metrics = self.metrics
+            return CachedNoveltyMemory(mem, self.novelty_cache) if self.novelty_cache is not None else mem
+
         if mem_backend == 'entangled':
-            backend = create_entangled(config)
+            backend = prepare(create_entangled(config))
         elif mem_backend == 'multiscale':
-            backend = create_multiscale(config)
+            backend = prepare(create_multiscale(config))
         elif mem_backend == 'auto':
-            backends = [HFFSMemory(config['filepaths']['memory_base'], tuple(config['filepaths']['sponge_size'])), create_entangled(config)]
-            backend = AutoMemory(backends)
+            backends = [prepare(create_hffs(config)), prepare(create_entangled(config))]
+            backend = create_auto(config, backends, metrics=self.metrics)
         else:
-            backend = HFFSMemory(
-                base_path=config['filepaths']['memory_base'],
-                sponge_size=tuple(config['filepaths']['sponge_size'])
-            )
+            backend = prepare(create_hffs(config))
         # Optional tensor compression layer
         if bool(config.get('compression', {}).get('enabled', False)):
             rank = int(config.get('compression', {}).get('rank', 8))
-            backend = TensorNetworkCompressor(backend, rank=rank)
+            cache_size = int(config.get('compression', {}).get('cache_size', 64))
+            backend = TensorNetworkCompressor(backend, rank=rank, cache_size=cache_size, metrics=self.metrics)
+        # Optional write-behind queue: stores return after a copy, a background thread writes
+        write_behind = int(config.get('memory', {}).get('write_behind', 0))
+        if write_behind > 0:
+            batch = int(config.get('memory', {}).get('write_behind_batch', 64))
+            backend = WriteBehindMemory(backend, max_pending=write_behind, batch_size=batch, metrics=self.metrics)
         # Wrap with policy guard
         policies = config.get('policies', {})
         self.policy = PolicyEnforcer(policies)
@@ -62,10 +79,9 @@ class Orchestrator:
         self.spine = NeuralSpine(config)
         self.curiosity = CuriosityEngine(memory=self.memory, threshold=config['training']['threshold'])
         self.introspect = Introspection(spine=self.spine, logbook=self.logbook)
-        self.replay = PrioritizedReplayBuffer(
-            capacity=int(config.get('training', {}).get('replay_capacity', 5000)),
-            alpha=float(config.get('training', {}).get('replay_alpha', 0.6))
-        )
+        # A persisted buffer reopens full, so the learner trains from its first iteration
+        self.replay = create_replay(config)
+        self.metrics.set('replay_size', self.replay.size())
         # World model for next-step prediction (optional for low-memory)
         self.world = None
         self._prev_sample = None
@@ -73,8 +89,7 @@ class Orchestrator:
             shape = tuple(config['filepaths']['sponge_size'])
             self.world = WorldModel(dim=int(np.prod(shape)), lr=float(config.get('training', {}).get('world_lr', 1e-3)))
 
-        # Metrics + Dashboard
-        self.metrics = MetricsRegistry()
+        # Dashboard
         self.bridge = ControlBridge()
         self.bridge.set_orchestrator(self)
         self.http_server = None
@@ -139,6 +154,10 @@ class Orchestrator:
             self.http_server.shutdown()
         for t in (self.explorer_thread, self.learner_thread, self.meta_thread, self.http_thread or threading.Thread()):
             t.join(timeout=2.0)
+        self.memory.stop()
+        close = getattr(self.replay, 'close', None)
+        if close is not None:
+            close()
         save_checkpoint(self.spine, self.ckpt_path, extra={"timestamp": time.time()})
 
     # Threads
@@ -180,19 +199,19 @@ class Orchestrator:
             except queue.Empty:
                 pass
             if self.replay.size() >= batch_size:
-                batch = self.replay.sample(batch_size)
-                losses = []
-                for i in range(batch.shape[0]):
-                    x = batch[i]
-                    loss = self.spine.train_step(x, x)
-                    # World model next-step training
-                    if self._prev_sample is not None and self.world is not None:
-                        _ = self.world.train_step(self._prev_sample, x)
-                    self._prev_sample = x
-                    losses.append(loss)
+                batch, idxs, _ = self.replay.sample_batch(batch_size)
+                losses = self.spine.train_step_batch(batch, batch)
+                # World model next-step training: each row predicts the next, starting from the last batch's tail
+                if self.world is not None:
+                    seq = batch if self._prev_sample is None else np.vstack([self._prev_sample[None, :], batch])
+                    if seq.shape[0] > 1:
+                        self.world.train_step_batch(seq[:-1], seq[1:])
+                self._prev_sample = batch[-1]
+                # Reprioritize by reconstruction loss so poorly learned samples come back sooner
+                self.replay.update_priorities(idxs, losses)
                 steps += 1
                 self.metrics.set('trainer_steps', steps)
-                avg_loss = float(np.mean(losses)) if losses else 0.0
+                avg_loss = float(np.mean(losses)) if len(losses) else 0.0
                 self.metrics.set('avg_loss', avg_loss)
                 # Use gater to reorder modules on the fly
                 self.gater.step(avg_loss)